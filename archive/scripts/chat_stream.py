@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Incremental parsing of streamed OpenAI intent analysis for SSE `/chat`.
+
+The model is asked to emit `intent_type` and `details` before `response`, so
+the intent can be forwarded as soon as those fields are complete, while the
+`response` string is decoded and forwarded chunk by chunk.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+INTENT_TYPE_PATTERN = re.compile(r'"intent_type"\s*:\s*"([a-z_]*)"')
+DETAILS_KEY_PATTERN = re.compile(r'"details"\s*:\s*')
+RESPONSE_KEY_PATTERN = re.compile(r'"response"\s*:\s*"')
+
+SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _object_end(text: str, start: int) -> Optional[int]:
+    """Index just past the JSON object starting at text[start], or None if incomplete"""
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+
+class StreamingAnalysisParser:
+    """Feeds on streamed JSON text and yields ("intent", analysis) / ("token", text) events"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.intent: Optional[Dict[str, Any]] = None
+        self.response_text = ""
+        self._response_pos: Optional[int] = None
+        self._response_done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.buffer += chunk
+        events: List[Tuple[str, Any]] = []
+
+        if self.intent is None:
+            self.intent = self._parse_intent()
+            if self.intent is not None:
+                events.append(("intent", self.intent))
+
+        text = self._decode_response()
+        if text:
+            self.response_text += text
+            events.append(("token", text))
+        return events
+
+    def _parse_intent(self) -> Optional[Dict[str, Any]]:
+        intent_type = INTENT_TYPE_PATTERN.search(self.buffer)
+        if not intent_type:
+            return None
+        if intent_type.group(1) == "none":
+            return {"intent_type": "none", "details": {}}
+
+        details_key = DETAILS_KEY_PATTERN.search(self.buffer)
+        if not details_key or details_key.end() >= len(self.buffer):
+            return None
+        start = details_key.end()
+        if self.buffer[start] != "{":
+            return None
+        end = _object_end(self.buffer, start)
+        if end is None:
+            return None
+        try:
+            details = json.loads(self.buffer[start:end])
+        except json.JSONDecodeError:
+            return None
+        return {"intent_type": intent_type.group(1), "details": details}
+
+    def _decode_response(self) -> str:
+        if self._response_done:
+            return ""
+        if self._response_pos is None:
+            key = RESPONSE_KEY_PATTERN.search(self.buffer)
+            if not key:
+                return ""
+            self._response_pos = key.end()
+
+        out = []
+        i = self._response_pos
+        buf = self.buffer
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self._response_done = True
+                i += 1
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+            # Escape sequence: wait for the rest of it if it was split across chunks
+            if i + 1 >= len(buf):
+                break
+            code = buf[i + 1]
+            if code == "u":
+                if i + 6 > len(buf):
+                    break
+                out.append(chr(int(buf[i + 2:i + 6], 16)))
+                i += 6
+            else:
+                out.append(SIMPLE_ESCAPES.get(code, code))
+                i += 2
+        self._response_pos = i
+        return "".join(out)
+
+    def result(self) -> Dict[str, Any]:
+        """The full analysis once the stream has ended"""
+        try:
+            return json.loads(self.buffer)
+        except json.JSONDecodeError:
+            analysis = dict(self.intent or {"intent_type": "none", "details": {}})
+            analysis["response"] = self.response_text
+            return analysis
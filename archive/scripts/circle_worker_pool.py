@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Pool of long-lived Node workers for Circle USDC operations.
+
+Each worker runs circle/transferWorker.js and speaks line-delimited JSON over
+stdin/stdout, so the Node startup and Circle SDK initialization are paid once
+per worker instead of once per transfer.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class CircleWorkerError(Exception):
+    """Raised when a worker rejects a request or dies while handling it"""
+
+
+class CircleWorkerOutcomeUnknown(CircleWorkerError):
+    """The worker accepted the request but never answered (timeout or exit); it may have been carried out"""
+
+
+class CircleWorker:
+    """A single resident `node transferWorker.js` process"""
+
+    def __init__(self, index: int, circle_dir: Path, script: str = "transferWorker.js"):
+        self.index = index
+        self.circle_dir = circle_dir
+        self.script = script
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self._ids = itertools.count(1)
+        self._ready: Optional[asyncio.Future] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._stderr: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self.pending)
+
+    async def start(self, timeout: float = 30.0):
+        loop = asyncio.get_running_loop()
+        self._ready = loop.create_future()
+        self.proc = await asyncio.create_subprocess_exec(
+            "node", str(self.circle_dir / self.script),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=str(self.circle_dir),
+            env=os.environ.copy(),
+            limit=1024 * 1024,
+        )
+        self._reader = asyncio.create_task(self._read_responses())
+        self._stderr = asyncio.create_task(self._drain_stderr())
+        try:
+            await asyncio.wait_for(asyncio.shield(self._ready), timeout=timeout)
+        except asyncio.TimeoutError:
+            # Kill the half-started process so the next request spawns a fresh one
+            self._kill()
+            raise CircleWorkerError(f"Circle worker {self.index} did not become ready within {timeout}s")
+        print(f"✅ Circle worker {self.index} ready (pid {self.proc.pid})")
+
+    async def stop(self):
+        if self.alive:
+            self.proc.stdin.close()
+            try:
+                await asyncio.wait_for(self.proc.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                self.proc.kill()
+        for task in (self._reader, self._stderr):
+            if task:
+                task.cancel()
+        self._fail_pending("Circle worker stopped")
+
+    def _kill(self):
+        if self.alive:
+            self.proc.kill()
+
+    async def request(self, op: str, params: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        async with self._start_lock:
+            if not self.alive:
+                self.restarts += 1
+                try:
+                    await self.start()
+                except OSError as e:
+                    raise CircleWorkerError(f"Circle worker {self.index} could not be started: {e}")
+
+        request_id = f"{self.index}-{next(self._ids)}"
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+
+        line = json.dumps({"id": request_id, "op": op, "params": params}) + "\n"
+        try:
+            async with self._write_lock:
+                self.proc.stdin.write(line.encode())
+                await self.proc.stdin.drain()
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise CircleWorkerOutcomeUnknown(f"Circle worker {self.index} timed out after {timeout}s on '{op}'")
+        except (BrokenPipeError, ConnectionResetError) as e:
+            # Died after the liveness check; make sure it is gone so the next request respawns it
+            self._kill()
+            raise CircleWorkerError(f"Circle worker {self.index} died before accepting '{op}': {e}")
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def _read_responses(self):
+        while True:
+            line = await self.proc.stdout.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"[WARNING] Circle worker {self.index} wrote non-JSON line: {line!r}")
+                continue
+
+            if message.get("id") is None:
+                if self._ready and not self._ready.done():
+                    self._ready.set_result(message.get("result"))
+                continue
+
+            future = self.pending.get(message["id"])
+            if future is None or future.done():
+                continue
+            if message.get("ok"):
+                self.completed += 1
+                future.set_result(message.get("result") or {})
+            else:
+                self.failed += 1
+                future.set_exception(CircleWorkerError(message.get("error", "Unknown worker error")))
+
+        code = await self.proc.wait()
+        print(f"[WARNING] Circle worker {self.index} exited with code {code}")
+        if self._ready and not self._ready.done():
+            self._ready.set_exception(CircleWorkerError(f"Circle worker {self.index} exited during startup"))
+        self._fail_pending(f"Circle worker {self.index} exited with code {code}")
+
+    async def _drain_stderr(self):
+        while True:
+            line = await self.proc.stderr.readline()
+            if not line:
+                break
+            print(f"[circle-worker-{self.index}] {line.decode(errors='replace').rstrip()}")
+
+    def _fail_pending(self, reason: str):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(CircleWorkerOutcomeUnknown(reason))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker": self.index,
+            "pid": self.proc.pid if self.proc else None,
+            "alive": self.alive,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+        }
+
+
+class CircleWorkerPool:
+    """Dispatches Circle requests to the least-loaded resident worker"""
+
+    def __init__(self, circle_dir: Path, size: int = 2, script: str = "transferWorker.js"):
+        self.workers: List[CircleWorker] = [CircleWorker(i, circle_dir, script) for i in range(size)]
+
+    async def start(self):
+        results = await asyncio.gather(*(w.start() for w in self.workers), return_exceptions=True)
+        for worker, result in zip(self.workers, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Circle worker {worker.index} failed to start: {result}")
+
+    async def stop(self):
+        await asyncio.gather(*(w.stop() for w in self.workers), return_exceptions=True)
+
+    async def submit(self, op: str, params: Dict[str, Any], timeout: float = 60.0) -> Dict[str, Any]:
+        worker = min(self.workers, key=lambda w: (not w.alive, w.queue_depth))
+        return await worker.request(op, params, timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        workers = [w.stats() for w in self.workers]
+        return {
+            "size": len(workers),
+            "alive": sum(1 for w in workers if w["alive"]),
+            "queue_depth": sum(w["queue_depth"] for w in workers),
+            "workers": workers,
+        }
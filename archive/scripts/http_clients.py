@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Service-wide registry of pooled httpx clients.
+
+One keep-alive AsyncClient is kept per origin, so per-host connection limits
+apply naturally and no call pays a fresh TCP/TLS handshake. Requests aimed at
+this service's own origin are dispatched in-process through an ASGI
+transport instead of looping back over HTTP.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class HTTPClientRegistry:
+    """Pooled clients keyed by origin, closed together on app shutdown"""
+
+    def __init__(self, max_connections_per_host: int = 20, max_keepalive_per_host: int = 10,
+                 keepalive_expiry: float = 30.0, timeout: float = 30.0,
+                 header_hook: Optional[Callable[[Dict[str, str]], Dict[str, str]]] = None):
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_per_host,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        # Called with each request's headers, e.g. to add a trace context
+        self.header_hook = header_hook
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._local_client: Optional[httpx.AsyncClient] = None
+        self._local_origins = set()
+        self._app = None
+        self.local_dispatches = 0
+        self.remote_requests = 0
+
+    def register_app(self, app, port: int, hosts: Iterable[str] = ("localhost", "127.0.0.1", "0.0.0.0")):
+        """Route requests for our own origin straight into `app`"""
+        self._app = app
+        self._local_origins = {f"http://{host}:{port}" for host in hosts}
+
+    def is_local(self, url: str) -> bool:
+        return self._app is not None and _origin(url) in self._local_origins
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        if self.is_local(url):
+            if self._local_client is None:
+                self._local_client = httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=self._app),
+                    base_url="http://in-process",
+                    timeout=self.timeout,
+                )
+            return self._local_client
+
+        origin = _origin(url)
+        client = self._clients.get(origin)
+        if client is None:
+            client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self._clients[origin] = client
+        return client
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        client = self.client_for(url)
+        if self.header_hook is not None:
+            kwargs["headers"] = self.header_hook(dict(kwargs.get("headers") or {}))
+        if client is self._local_client:
+            self.local_dispatches += 1
+            parts = urlsplit(url)
+            url = parts.path + (f"?{parts.query}" if parts.query else "")
+        else:
+            self.remote_requests += 1
+        return await client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        if self._local_client is not None:
+            clients.append(self._local_client)
+        for client in clients:
+            await client.aclose()
+        self._clients.clear()
+        self._local_client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "origins": sorted(self._clients),
+            "local_dispatches": self.local_dispatches,
+            "remote_requests": self.remote_requests,
+        }
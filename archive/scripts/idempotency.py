@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Idempotent request coalescing for the transfer endpoints.
+
+Each transfer request resolves to an idempotency key: the client's
+`Idempotency-Key` header / `idempotency_key` field when given, otherwise a
+hash of the transfer details. Concurrent duplicates join the in-flight
+call, and successful results are kept in a bounded store so retries replay
+them instead of sending USDC twice. Results under content-derived keys
+expire `content_window` seconds after the send completes, however that
+aligns with the clock, so a deliberate repeat later on is sent again.
+
+A failed call releases its key only when `pending_result` says the failure
+was a definite rejection (returns None). Otherwise the send may have gone
+out, and the pending result it returns is stored under the key like a
+success, so a retry replays it instead of sending again.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+def content_key(scope: str, payload: Dict[str, Any]) -> str:
+    """Key derived from the request body; how long it dedupes is the store's `content_window`"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(f"{scope}|{canonical}".encode()).hexdigest()
+    return f"{scope}:auto:{digest[:32]}"
+
+
+class IdempotencyStore:
+    """In-flight futures plus a bounded LRU of completed results"""
+
+    def __init__(self, maxsize: int = 1000, ttl: float = 24 * 3600.0, content_window: float = 60.0,
+                 pending_result: Optional[Callable[[Exception], Any]] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.content_window = content_window
+        self.pending_result = pending_result
+        self._completed: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.executed = 0
+        self.joined = 0
+        self.replayed = 0
+        self.reserved = 0
+
+    def key_for(self, scope: str, payload: Dict[str, Any], client_key: Optional[str] = None) -> str:
+        if client_key:
+            return f"{scope}:{client_key}"
+        return content_key(scope, payload)
+
+    def _ttl_for(self, key: str) -> float:
+        return self.content_window if ":auto:" in key else self.ttl
+
+    def _lookup(self, key: str):
+        entry = self._completed.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._completed[key]
+            return None
+        self._completed.move_to_end(key)
+        return entry
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run `call` once per key; returns (result, replayed)"""
+        entry = self._lookup(key)
+        if entry is not None:
+            self.replayed += 1
+            return entry[1], True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.joined += 1
+            return await asyncio.shield(inflight), True
+
+        # The call runs as its own task so a disconnecting client can't abort a send midway
+        task = asyncio.ensure_future(self._execute(key, call))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = task
+        return await asyncio.shield(task), False
+
+    async def _execute(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            self.executed += 1
+            try:
+                result = await call()
+            except Exception as e:
+                result = self.pending_result(e) if self.pending_result else None
+                if result is None:
+                    raise  # a definite rejection is not stored: a retry really retries
+                self.reserved += 1
+            self._completed[key] = (time.monotonic() + self._ttl_for(key), result)
+            while len(self._completed) > self.maxsize:
+                self._completed.popitem(last=False)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "completed": len(self._completed),
+            "inflight": len(self._inflight),
+            "executed": self.executed,
+            "joined": self.joined,
+            "replayed": self.replayed,
+            "reserved": self.reserved,
+        }
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""LRU/TTL cache for OpenAI intent classification.
+
+Messages are normalized (case, whitespace, trailing punctuation) and standalone
+numeric amounts are abstracted into slots, so "send 0.1 USDC to alice" and
+"Send 2  USDC to Alice" share one entry. Wallet addresses keep their case,
+since Solana's base58 addresses are case-sensitive. On a hit the cached
+`amount` fields, and "<n> USDC" in the response text, are rehydrated with
+the amounts from the new message, matched by numeric value. Analyses with
+an `amount` that is not one of the message's amounts are never cached.
+"""
+
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Standalone numbers only: digits inside proof IDs or addresses are left alone
+AMOUNT_PATTERN = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?!\w|\.\d)")
+# Amounts as they appear in prose replies, e.g. "Sending 5 USDC to alice"
+RESPONSE_AMOUNT_PATTERN = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?=\s*USDC\b)", re.IGNORECASE)
+ADDRESS_PATTERN = re.compile(r"\b(?:0x[a-fA-F0-9]{40}|[1-9A-HJ-NP-Za-km-z]{32,44})\b")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+AMOUNT_SLOT = "<amount>"
+
+
+def _lower_except_addresses(text: str) -> str:
+    parts, last = [], 0
+    for match in ADDRESS_PATTERN.finditer(text):
+        parts.append(text[last:match.start()].lower())
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(text[last:].lower())
+    return "".join(parts)
+
+
+def normalize_message(message: str) -> Tuple[str, List[str]]:
+    """Return the cache key for a message and the amounts abstracted out of it"""
+    text = WHITESPACE_PATTERN.sub(" ", _lower_except_addresses(message.strip())).rstrip(" .!?")
+    amounts = AMOUNT_PATTERN.findall(text)
+    return AMOUNT_PATTERN.sub(AMOUNT_SLOT, text), amounts
+
+
+def _as_decimal(value: Any) -> Optional[Decimal]:
+    """Amounts compare as numbers, since the model may write "1" as 1.0 or "0.50" as 0.5"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        return None
+    return amount if amount.is_finite() else None
+
+
+def _amount_fields(value: Any) -> Iterator[Any]:
+    if isinstance(value, dict):
+        for k, v in value.items():
+            if k == "amount":
+                yield v
+            else:
+                yield from _amount_fields(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from _amount_fields(v)
+
+
+def _rehydrate_amount(value: Any, mapping: Dict[Decimal, str]) -> Any:
+    if value is None:
+        return value
+    amount = mapping[_as_decimal(value)]  # put() only caches analyses whose amounts all map
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(amount) if isinstance(value, float) or "." in amount else int(amount)
+    return amount
+
+
+def _substitute_amounts(value: Any, mapping: Dict[Decimal, str]) -> Any:
+    """Rewrite `amount` fields only; other numbers in the analysis are left alone"""
+    if isinstance(value, dict):
+        return {k: _rehydrate_amount(v, mapping) if k == "amount" else _substitute_amounts(v, mapping)
+                for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute_amounts(v, mapping) for v in value]
+    return value
+
+
+def _substitute_response(response: str, mapping: Dict[Decimal, str]) -> str:
+    return RESPONSE_AMOUNT_PATTERN.sub(lambda m: mapping.get(Decimal(m.group(0)), m.group(0)), response)
+
+
+class IntentCache:
+    """Bounded LRU cache of (response, analysis) pairs with per-entry TTL.
+
+    Thread-safe: /parse/batch classifies commands concurrently in worker threads.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str, Dict[str, Any], List[str]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+
+    def get(self, message: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        key, amounts = normalize_message(message)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, response, analysis, cached_amounts = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            mapping = dict(zip(map(Decimal, cached_amounts), amounts))
+            if any(_as_decimal(v) not in mapping for v in _amount_fields(analysis) if v is not None):
+                # Never serve an amount that did not come from this message
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return _substitute_response(response, mapping), _substitute_amounts(copy.deepcopy(analysis), mapping)
+
+    def put(self, message: str, response: str, analysis: Dict[str, Any]):
+        """Cache a classified command; conversational replies are not cached"""
+        if not response or analysis.get("intent_type", "none") == "none":
+            return
+
+        key, amounts = normalize_message(message)
+        numbers = set(map(Decimal, amounts))
+        if len(numbers) != len(amounts):
+            # Repeated amounts can't be mapped back to their slots unambiguously
+            return
+        if any(_as_decimal(v) not in numbers for v in _amount_fields(analysis) if v is not None):
+            # An amount the message doesn't contain would be replayed verbatim for other amounts
+            return
+
+        entry = (time.monotonic() + self.ttl, response, copy.deepcopy(analysis), amounts)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Single-pass keyword matcher for chat intents.
+
+All intent keywords are compiled into one regex automaton that scans the
+lowercased message once. At every position the longest keyword is taken and
+every keyword contained in it is implied, which yields the same set of
+substring hits as checking each keyword with `in`, without rescanning the
+message per helper. Intents are then scored from that hit set.
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Set
+
+# Each intent is a list of alternatives; an alternative is a list of keyword
+# groups that must all be present (any keyword in a group satisfies it).
+INTENT_SPECS: Dict[str, List[List[List[str]]]] = {
+    "transfer": [[["usdc"], ["send", "transfer", "pay"]]],
+    "kyc_proof": [[["kyc"], ["prove", "proof"]]],
+    "ai_proof": [[["ai", "content"], ["authenticity", "authentic"], ["prove", "proof"]]],
+    "location_proof": [[
+        ["location", "device", "sf", "san francisco", "new york", "nyc", "london", "tokyo"],
+        ["prove", "proof"],
+    ]],
+    "collatz_proof": [[["collatz"], ["prove", "proof", "steps"]]],
+    "prime_proof": [[["prime"], ["prove", "proof", "check"]]],
+    "digital_root_proof": [[["digital"], ["root"], ["prove", "proof"]]],
+    "verify": [[["verify"], ["proof"]]],
+    "list": [
+        [["list"], ["proof", "verification"]],
+        [["proof history"]],
+        [["verification history"]],
+    ],
+}
+
+# Keywords that veto an otherwise complete intent
+INTENT_EXCLUSIONS: Dict[str, List[str]] = {
+    "kyc_proof": ["usdc"],
+}
+
+# Transfers need a KYC proof when a proof keyword and a KYC keyword co-occur
+PROOF_KEYWORDS = ["proof", "prove", "verified", "verify"]
+KYC_KEYWORDS = ["kyc", "compliant", "compliance"]
+
+# Cues that the user wants a conversational answer, not just the command
+CONVERSATION_CUES = ["humor", "humour", "funny", "joke", "explain", "why", "how ", "what", "?"]
+
+LOCATIONS = [
+    ("san francisco", "San Francisco"), ("sf", "San Francisco"),
+    ("new york", "New York"), ("nyc", "New York"),
+    ("london", "London"), ("tokyo", "Tokyo"),
+]
+
+PROOF_ID_PATTERN = re.compile(r"proof_\d+_[a-f0-9]+")
+CUSTOM_PREFIX = "prove custom "
+
+
+@dataclass
+class IntentMatch:
+    """Every intent feature found in one message, with confidence scores"""
+    keywords: FrozenSet[str]
+    scores: Dict[str, float]
+    requires_kyc: bool = False
+    proof_id: Optional[str] = None
+    location: Optional[str] = None
+    is_custom: bool = False
+    conversational: bool = False
+    matched: List[str] = field(default_factory=list)
+
+    def has(self, intent: str) -> bool:
+        return self.scores.get(intent, 0.0) >= 1.0
+
+    @property
+    def unambiguous(self) -> bool:
+        """Exactly one complete intent and nothing asking for a chatty reply"""
+        return len(self.matched) == 1 and not self.conversational
+
+
+class IntentMatcher:
+    """Compiles INTENT_SPECS into one scanner; build once, reuse per message"""
+
+    def __init__(self, specs: Dict[str, List[List[List[str]]]] = INTENT_SPECS):
+        self.specs = specs
+        vocabulary: Set[str] = set(PROOF_KEYWORDS) | set(KYC_KEYWORDS) | set(CONVERSATION_CUES)
+        vocabulary |= {"if kyc"} | {name for name, _ in LOCATIONS}
+        for alternatives in specs.values():
+            for groups in alternatives:
+                for group in groups:
+                    vocabulary.update(group)
+        for excluded in INTENT_EXCLUSIONS.values():
+            vocabulary.update(excluded)
+
+        # Longest first so the alternation picks the longest keyword at each position
+        ordered = sorted(vocabulary, key=len, reverse=True)
+        self._scanner = re.compile("(?=(" + "|".join(re.escape(k) for k in ordered) + "))")
+        self._implied = {k: frozenset(o for o in vocabulary if o in k) for k in vocabulary}
+        self._compiled = [
+            (intent, [[frozenset(group) for group in groups] for groups in alternatives],
+             frozenset(INTENT_EXCLUSIONS.get(intent, [])))
+            for intent, alternatives in specs.items()
+        ]
+        self._proof_keywords = frozenset(PROOF_KEYWORDS)
+        self._kyc_keywords = frozenset(KYC_KEYWORDS)
+        self._conversation_cues = frozenset(CONVERSATION_CUES)
+
+    def scan(self, message: str) -> FrozenSet[str]:
+        """Every vocabulary keyword occurring in the message, in one pass"""
+        implied = self._implied
+        return frozenset().union(*(implied[k] for k in set(self._scanner.findall(message.lower()))))
+
+    def match(self, message: str) -> IntentMatch:
+        keywords = self.scan(message)
+        scores: Dict[str, float] = {}
+        for intent, alternatives, excluded in self._compiled:
+            best = 0.0
+            for groups in alternatives:
+                satisfied = sum(1 for group in groups if not group.isdisjoint(keywords))
+                best = max(best, satisfied / len(groups))
+            if best >= 1.0 and not excluded.isdisjoint(keywords):
+                best = 0.5
+            if best > 0:
+                scores[intent] = round(best, 3)
+
+        proof_id = None
+        if scores.get("verify", 0.0) >= 1.0:
+            found = PROOF_ID_PATTERN.search(message)
+            proof_id = found.group(0) if found else None
+            if proof_id is None:
+                scores["verify"] = 0.667
+
+        location = next((label for name, label in LOCATIONS if name in keywords), None)
+        requires_kyc = (
+            not self._proof_keywords.isdisjoint(keywords) and not self._kyc_keywords.isdisjoint(keywords)
+        ) or "if kyc" in keywords
+
+        return IntentMatch(
+            keywords=keywords,
+            scores=scores,
+            requires_kyc=requires_kyc,
+            proof_id=proof_id,
+            location=location,
+            is_custom=message.startswith(CUSTOM_PREFIX),
+            conversational=not self._conversation_cues.isdisjoint(keywords),
+            matched=[intent for intent, score in scores.items() if score >= 1.0],
+        )
+
+
+def _naive_keywords(matcher: IntentMatcher, message: str) -> FrozenSet[str]:
+    """Reference implementation: one `in` scan per keyword, as the old helpers did"""
+    msg_lower = message.lower()
+    return frozenset(k for k in matcher._implied if k in msg_lower)
+
+
+def _legacy_chain(message: str) -> None:
+    """The old /chat routing: one lowercase + keyword rescan per is_*_request helper"""
+    for groups in ([["usdc"], ["send", "transfer", "pay"]], [["kyc"], ["prove", "proof"], ["usdc"]],
+                   [["ai", "content"], ["authenticity", "authentic"], ["prove", "proof"]],
+                   [["location", "device", "sf", "san francisco", "new york", "nyc", "london", "tokyo"],
+                    ["prove", "proof"]],
+                   [["collatz"], ["prove", "proof", "steps"]], [["prime"], ["prove", "proof", "check"]],
+                   [["digital"], ["root"], ["prove", "proof"]], [["verify"], ["proof"]]):
+        msg_lower = message.lower()
+        all(any(k in msg_lower for k in group) for group in groups)
+
+
+def benchmark(history_path: str, rounds: int = 200) -> Dict[str, float]:
+    """Messages per second on workflow_history.json descriptions"""
+    import json
+
+    with open(history_path, "r") as f:
+        history = json.load(f)
+    corpus = [wf.get("description", "") for wf in history.values() if wf.get("description")]
+
+    matcher = IntentMatcher()
+    for message in corpus:
+        assert matcher.scan(message) == _naive_keywords(matcher, message), message
+
+    results = {"corpus_size": len(corpus)}
+    for name, fn in (("matcher", matcher.match), ("scan_only", matcher.scan),
+                     ("naive_scan", lambda m: _naive_keywords(matcher, m)), ("legacy_chain", _legacy_chain)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for message in corpus:
+                fn(message)
+        elapsed = time.perf_counter() - start
+        results[f"{name}_msgs_per_sec"] = round(rounds * len(corpus) / elapsed)
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+
+    default_history = Path(__file__).resolve().parents[2] / "data" / "workflow_history.json"
+    history_path = sys.argv[1] if len(sys.argv) > 1 else str(default_history)
+
+    for name, value in benchmark(history_path).items():
+        print(f"{name}: {value}")
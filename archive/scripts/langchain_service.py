@@ -3,25 +3,49 @@
 print("✅ Script starting up...")
 
 import base64
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+import asyncio
 import time
 import re
 import subprocess
 import json
 from pathlib import Path
-import httpx
 import uvicorn
 import uuid
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-from openai import OpenAI
+from circle_worker_pool import CircleWorkerPool, CircleWorkerError, CircleWorkerOutcomeUnknown
+from transfer_status import TransferStatusService
+from http_clients import HTTPClientRegistry
+from idempotency import IdempotencyStore
+from loop_monitor import LoopStallMonitor, LoopStallMiddleware
+from intent_cache import IntentCache
+from intent_matcher import IntentMatch, IntentMatcher
+from openai_health import OpenAIHealth
+from chat_stream import StreamingAnalysisParser, sse_event
+from workflow_parser import WorkflowParserService
+from proof_files import ProofFileServer
+import prover_admission
+
+# The service is deployed as ~/agentkit/langchain_service.py; every repo path is built from this root
+AGENTKIT_ROOT = Path(os.path.expanduser(os.getenv("AGENTKIT_ROOT", "~/agentkit")))
+
+# Span tracing is shared with the workflow executor in scripts/utils
+sys.path.append(str(AGENTKIT_ROOT / "scripts" / "utils"))
+from span_tracer import TRACE_EXPORT_DIR, TraceMiddleware, tracer
+from workflow_store import batch_status
+from proof_index import get_proof_index, proof_record
+from proof_blobs import proof_blobs
+from transfer_ledger import get_transfer_ledger
 
 # Models
 class ProofIntent(BaseModel):
@@ -39,34 +63,81 @@ class ChatResponse(BaseModel):
     response: str
     metadata: Optional[Dict[str, Any]] = None
 
+class WorkflowParseRequest(BaseModel):
+    command: str
+
+class ProverAdmitRequest(BaseModel):
+    function: str
+    priority: str = "workflow"
+    owner: Optional[str] = None
+
+class ProverReleaseRequest(BaseModel):
+    lease_id: str
+
+class ProofRecordRequest(BaseModel):
+    metadata: Dict[str, Any]
+    metrics: Optional[Dict[str, Any]] = None
+
+class ProofVerifiedRequest(BaseModel):
+    valid: bool = True
+
+class WorkflowBatchRequest(BaseModel):
+    commands: List[str] = Field(..., min_length=1)
+    batch_id: Optional[str] = Field(default=None, pattern=r"^[A-Za-z0-9_\-]+$")
+
+class BatchParseRequest(BaseModel):
+    commands: List[str]
+    use_openai: bool = True
+    max_openai_concurrency: int = Field(default=4, ge=1, le=32)
+
 # Configuration
 app = FastAPI(title="ZKP Agent Service")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
-# Initialize OpenAI client
-openai_client = None
-openai_available = False
+# One span per request; incoming traceparent headers continue the caller's trace
+tracer.service = "langchain_service"
+app.add_middleware(TraceMiddleware, tracer=tracer)
 
-api_key = os.getenv("OPENAI_API_KEY")
-if api_key:
-    try:
-        openai_client = OpenAI(api_key=api_key)
-        # Test the connection with gpt-4o-mini
-        test_response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": "test"}],
-            max_tokens=5
-        )
-        openai_available = True
-        print("✅ OpenAI client initialized and tested successfully with GPT-4o-mini")
-    except Exception as e:
-        print(f"⚠️ OpenAI initialization failed: {e}")
-        openai_available = False
-else:
-    print("⚠️ WARNING: OPENAI_API_KEY environment variable not set!")
-    print("   The system will work but without natural language capabilities.")
+SERVICE_PORT = 8002
+
+# Pooled outbound HTTP clients; calls back into this service are dispatched in-process
+http_clients = HTTPClientRegistry(header_hook=tracer.inject)
+http_clients.register_app(app, port=SERVICE_PORT)
 
-CIRCLE_DIR = Path(__file__).parent / "circle"
+@app.on_event("shutdown")
+async def close_http_clients():
+    await http_clients.aclose()
+
+# Opt-in event-loop stall detection: LOOP_STALL_DEBUG=1 [LOOP_STALL_THRESHOLD_MS=100]
+loop_monitor = None
+if os.getenv("LOOP_STALL_DEBUG", "").lower() in ("1", "true", "yes"):
+    loop_monitor = LoopStallMonitor(threshold_ms=float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100")))
+    app.add_middleware(LoopStallMiddleware, monitor=loop_monitor)
+
+    @app.on_event("startup")
+    async def start_loop_monitor():
+        await loop_monitor.start()
+
+    @app.on_event("shutdown")
+    async def stop_loop_monitor():
+        await loop_monitor.stop()
+
+# OpenAI client is built lazily; availability is refreshed by a background probe
+openai_status = OpenAIHealth(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    interval=float(os.getenv("OPENAI_HEALTH_INTERVAL", "60")),
+    timeout=float(os.getenv("OPENAI_HEALTH_TIMEOUT", "10"))
+)
+
+@app.on_event("startup")
+async def start_openai_probe():
+    await openai_status.start()
+
+@app.on_event("shutdown")
+async def stop_openai_probe():
+    await openai_status.stop()
+
+CIRCLE_DIR = AGENTKIT_ROOT / "circle"
 TEST_ADDRESSES = {
     "alice": "0x70997970C51812dc3A010C7d01b50e0d17dc79C8",
     "alice_solana": "7UX2i7SucgLMQcfZ75s3VXmZZY4YRUyJN9X1RgfMoDUi",
@@ -76,6 +147,90 @@ TEST_ADDRESSES = {
     "charlie_solana": "2sWRYvL8M4S9XPvKNfUdy2Qvn6LYaXjqXDvMv9KsxbUa"
 }
 
+# Precompiled patterns and a per-chain name index for extract_transfer_details
+AMOUNT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)")
+ETH_ADDRESS_PATTERN = re.compile(r"0x[a-fA-F0-9]{40}")
+SOL_ADDRESS_PATTERN = re.compile(r"[1-9A-HJ-NP-Za-km-z]{32,44}")
+ADDRESS_BOOK = {
+    "ETH": {name: addr for name, addr in TEST_ADDRESSES.items() if "_solana" not in name},
+    "SOL": {name.replace("_solana", ""): addr for name, addr in TEST_ADDRESSES.items() if "_solana" in name},
+}
+RECIPIENT_NAMES = sorted(ADDRESS_BOOK["ETH"].keys() | ADDRESS_BOOK["SOL"].keys(), key=len, reverse=True)
+RECIPIENT_NAME_SCANNER = re.compile("(?=(" + "|".join(re.escape(n) for n in RECIPIENT_NAMES) + "))")
+
+# Resident Node workers for Circle transfers (see circle/transferWorker.js)
+TRANSFER_TIMEOUT = float(os.getenv("CIRCLE_TRANSFER_TIMEOUT", "60"))
+transfer_pool = CircleWorkerPool(CIRCLE_DIR, size=int(os.getenv("CIRCLE_WORKER_POOL_SIZE", "2")))
+transfer_status = TransferStatusService(transfer_pool)
+
+def unconfirmed_transfer(error: Exception, **details: Any) -> Dict[str, Any]:
+    """Response for a send that may have gone out without us hearing back (worker timeout or an
+    unexpected error): reported as pending with an unknown outcome, never as a retryable failure"""
+    print(f"WARNING: transfer outcome unknown, reporting it as pending: {error}")
+    return {
+        "success": False,
+        "status": "unknown",
+        "message": f"Transfer outcome unknown ({error}); check Circle before sending again",
+        **details,
+    }
+
+
+def unknown_transfer_outcome(error: Exception) -> Optional[Dict[str, Any]]:
+    """Idempotency result for a failed transfer call. HTTPExceptions are definite rejections and
+    release the key; anything else may have sent USDC, so the key stays reserved"""
+    return None if isinstance(error, HTTPException) else unconfirmed_transfer(error)
+
+
+# Duplicate transfer submissions join the in-flight call or replay its result
+transfer_idempotency = IdempotencyStore(
+    maxsize=int(os.getenv("IDEMPOTENCY_STORE_SIZE", "1000")),
+    content_window=float(os.getenv("IDEMPOTENCY_WINDOW_SECONDS", "60")),
+    pending_result=unknown_transfer_outcome
+)
+
+# Resident workflow parser (circle/workflowParserWorker.js) behind a per-command memo
+parser_pool = CircleWorkerPool(CIRCLE_DIR, size=int(os.getenv("WORKFLOW_PARSER_POOL_SIZE", "1")),
+                               script="workflowParserWorker.js")
+workflow_parser = WorkflowParserService(parser_pool, maxsize=int(os.getenv("WORKFLOW_PARSE_CACHE_SIZE", "512")))
+
+# Global gate in front of zkEngine: the Rust server leases a slot before every proof
+prover_admission_controller = prover_admission.from_env(
+    AGENTKIT_ROOT / db for db in ("data/proofs_db.json", "circle/proofs_db.json")
+)
+
+# Every executed transfer is appended to the segmented ledger; sealed segments are compacted in the background
+transfer_ledger = get_transfer_ledger()
+
+@app.on_event("startup")
+async def start_transfer_pool():
+    await transfer_pool.start()
+    await parser_pool.start()
+    prover_admission_controller.start()
+    transfer_ledger.start_compaction(float(os.getenv("TRANSFER_LEDGER_COMPACT_INTERVAL", "600")))
+
+@app.on_event("shutdown")
+async def stop_transfer_pool():
+    await transfer_pool.stop()
+    await parser_pool.stop()
+    await prover_admission_controller.stop()
+    transfer_ledger.stop_compaction()
+
+# One compiled keyword scanner shared by every /chat request
+intent_matcher = IntentMatcher()
+
+LOCATION_COORDINATES = {
+    "San Francisco": (96, 122),
+    "New York": (103, 182),
+    "London": (130, 242),
+    "Tokyo": (90, 140),
+}
+
+# Cache of classified commands so templated messages skip the LLM round trip
+intent_cache = IntentCache(
+    maxsize=int(os.getenv("INTENT_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("INTENT_CACHE_TTL", "600"))
+)
+
 # System prompt for OpenAI - Enhanced for better mixed prompt detection
 SYSTEM_PROMPT = """You are an AI assistant for a Zero-Knowledge Proof (ZKP) system. You can:
 1. Have natural conversations on any topic
@@ -114,59 +269,41 @@ you should both detect the location proof intent AND provide a humorous response
 
 # Helper Functions
 def extract_transfer_details(message: str) -> Dict[str, str]:
-    amount_match = re.search(r"(\d+(?:\.\d+)?)", message)
+    amount_match = AMOUNT_PATTERN.search(message)
     amount = amount_match.group(1) if amount_match else "0.1"
     
     # Determine blockchain first
-    blockchain = "SOL" if ("solana" in message.lower() or " sol" in message.lower()) else "ETH"
-    
-    # Initialize recipient
-    recipient_address = None
-    
-    # Check for explicit addresses first
-    eth_addr_match = re.search(r"0x[a-fA-F0-9]{40}", message)
-    sol_addr_match = re.search(r"[1-9A-HJ-NP-Za-km-z]{32,44}", message)
+    msg_lower = message.lower()
+    blockchain = "SOL" if ("solana" in msg_lower or " sol" in msg_lower) else "ETH"
     
-    if eth_addr_match and blockchain == "ETH":
-        recipient_address = eth_addr_match.group(0)
-    elif sol_addr_match and blockchain == "SOL":
-        recipient_address = sol_addr_match.group(0)
+    # Check for an explicit address on the chosen chain first
+    addr_match = (ETH_ADDRESS_PATTERN if blockchain == "ETH" else SOL_ADDRESS_PATTERN).search(message)
+    if addr_match:
+        recipient_address = addr_match.group(0)
     else:
-        # Look for named recipients
-        msg_lower = message.lower()
-        
-        if blockchain == "SOL":
-            # For Solana, look for _solana suffixed addresses
-            for name, addr in TEST_ADDRESSES.items():
-                if "_solana" in name:
-                    base_name = name.replace("_solana", "")
-                    if base_name in msg_lower:
-                        recipient_address = addr
-                        break
-        else:
-            # For Ethereum, look for addresses without _solana suffix
-            for name, addr in TEST_ADDRESSES.items():
-                if "_solana" not in name and name in msg_lower:
-                    recipient_address = addr
-                    break
+        # Look for named recipients; earlier address-book entries win, as before
+        named = set(RECIPIENT_NAME_SCANNER.findall(msg_lower))
+        recipient_address = next(
+            (addr for name, addr in ADDRESS_BOOK[blockchain].items() if name in named),
+            None
+        )
     
     # Default to alice if nothing found
     if not recipient_address:
-        recipient_address = TEST_ADDRESSES["alice_solana" if blockchain == "SOL" else "alice"]
-    
-    # DEBUG: Print what we're returning
-    print(f"DEBUG extract_transfer_details: blockchain={blockchain}, recipient={recipient_address}, amount={amount}")
+        recipient_address = ADDRESS_BOOK[blockchain]["alice"]
     
     return {"amount": amount, "recipient": recipient_address, "blockchain": blockchain}
 
-def get_openai_response(message: str, context: str = "") -> tuple[str, Dict[str, Any]]:
-    """Get response from OpenAI and extract any intents"""
-    if not openai_available:
-        return None, {}
-    
-    try:
-        # Create a more specific prompt based on the message
-        analysis_prompt = f"""Analyze this message and determine:
+def build_analysis_prompt(message: str, intent_first: bool = False) -> str:
+    """Prompt for OpenAI's intent analysis.
+
+    The streaming endpoint sets intent_first so the model emits intent_type and
+    details before the natural-language response.
+    """
+    response_field = '"response": "Your natural language response to the user"'
+    response_first = "" if intent_first else f"\n    {response_field},"
+    response_last = f",\n    {response_field}" if intent_first else ""
+    return f"""Analyze this message and determine:
 1. What the user wants (natural conversation, proof generation, transfer, etc.)
 2. Generate an appropriate response (if they ask for humor, be funny!)
 3. If it's a command, identify which type
@@ -188,8 +325,7 @@ For USDC transfers:
 Message: "{message}"
 
 Respond in JSON format:
-{{
-    "response": "Your natural language response to the user",
+{{{response_first}
     "intent_type": "none|kyc_proof|ai_proof|location_proof|transfer|verify|list|custom_proof",
     "details": {{
         // Any relevant details based on intent_type
@@ -203,25 +339,42 @@ Respond in JSON format:
         "add_humor": true/false,
         "add_explanation": true/false,
         "tone": "friendly|professional|humorous|educational"
-    }}
+    }}{response_last}
 }}"""
+
+def get_openai_response(message: str, context: str = "") -> tuple[str, Dict[str, Any]]:
+    """Get response from OpenAI and extract any intents"""
+    if not openai_status.available:
+        return None, {}
+    
+    cached = intent_cache.get(message)
+    if cached:
+        return cached
+    
+    try:
+        analysis_prompt = build_analysis_prompt(message)
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": analysis_prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500,
-            response_format={ "type": "json_object" }
-        )
+        with tracer.span("openai.chat", model="gpt-4o-mini"):
+            response = openai_status.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": analysis_prompt}
+                ],
+                temperature=0.7,
+                max_tokens=500,
+                response_format={ "type": "json_object" }
+            )
         
         result = json.loads(response.choices[0].message.content)
-        return result.get("response", "I'll help you with that."), result
+        ai_response = result.get("response", "I'll help you with that.")
+        intent_cache.put(message, ai_response, result)
+        openai_status.mark_success()
+        return ai_response, result
         
     except Exception as e:
         print(f"OpenAI API error: {e}")
+        openai_status.mark_failure(e)
         return None, {}
 
 def is_transfer_request(message: str) -> tuple[bool, bool]:
@@ -229,54 +382,31 @@ def is_transfer_request(message: str) -> tuple[bool, bool]:
     Check if message is a transfer request and if it requires KYC proof.
     Returns: (is_transfer, requires_kyc)
     """
-    msg_lower = message.lower()
-    has_usdc = "usdc" in msg_lower
-    has_transfer_verb = any(k in msg_lower for k in ["send", "transfer", "pay"])
-    
-    if has_usdc and has_transfer_verb:
-        # Check if KYC proof is explicitly requested
-        has_proof_keyword = any(k in msg_lower for k in ["proof", "prove", "verified", "verify"])
-        has_kyc_keyword = any(k in msg_lower for k in ["kyc", "compliant", "compliance"])
-        requires_kyc = has_proof_keyword and has_kyc_keyword
-        
-        # Additional check for "if KYC compliant" pattern
-        if "if kyc" in msg_lower:
-            requires_kyc = True
-        
-        return True, requires_kyc
-    
+    match = intent_matcher.match(message)
+    if match.has("transfer"):
+        return True, match.requires_kyc
     return False, False
 
 def is_kyc_proof_request(message: str) -> bool:
-    msg_lower = message.lower()
-    return "kyc" in msg_lower and ("prove" in msg_lower or "proof" in msg_lower) and "usdc" not in msg_lower
+    return intent_matcher.match(message).has("kyc_proof")
 
 def is_ai_content_proof_request(message: str) -> bool:
-    msg_lower = message.lower()
-    return (("ai" in msg_lower or "content" in msg_lower) and 
-            ("authenticity" in msg_lower or "authentic" in msg_lower) and 
-            ("prove" in msg_lower or "proof" in msg_lower))
+    return intent_matcher.match(message).has("ai_proof")
 
 def is_location_proof_request(message: str) -> bool:
-    msg_lower = message.lower()
-    return (("location" in msg_lower or "device" in msg_lower or 
-             any(city in msg_lower for city in ["sf", "san francisco", "new york", "nyc", "london", "tokyo"])) and 
-            ("prove" in msg_lower or "proof" in msg_lower))
+    return intent_matcher.match(message).has("location_proof")
 
 def is_collatz_proof_request(message: str) -> bool:
     """Check if message is requesting a Collatz proof"""
-    msg_lower = message.lower()
-    return ("collatz" in msg_lower and ("prove" in msg_lower or "proof" in msg_lower or "steps" in msg_lower))
+    return intent_matcher.match(message).has("collatz_proof")
 
 def is_prime_proof_request(message: str) -> bool:
     """Check if message is requesting a prime number proof"""
-    msg_lower = message.lower()
-    return ("prime" in msg_lower and ("prove" in msg_lower or "proof" in msg_lower or "check" in msg_lower))
+    return intent_matcher.match(message).has("prime_proof")
 
 def is_digital_root_proof_request(message: str) -> bool:
     """Check if message is requesting a digital root proof"""
-    msg_lower = message.lower()
-    return ("digital" in msg_lower and "root" in msg_lower and ("prove" in msg_lower or "proof" in msg_lower))
+    return intent_matcher.match(message).has("digital_root_proof")
 
 def is_custom_proof_request(message: str) -> tuple:
     """Check if message is a custom proof request with base64 encoded C code"""
@@ -291,171 +421,163 @@ def is_custom_proof_request(message: str) -> tuple:
 
 def is_verification_request(message: str) -> tuple:
     """Check if message is a verification request"""
-    msg_lower = message.lower()
-    if "verify" in msg_lower and "proof" in msg_lower:
-        # Extract proof ID
-        proof_match = re.search(r"proof_\d+_[a-f0-9]+", message)
-        if proof_match:
-            return True, proof_match.group(0)
+    match = intent_matcher.match(message)
+    if match.has("verify"):
+        return True, match.proof_id
     return False, None
 
-# API Endpoints
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    user_message = request.message
+def build_ai_intent_response(user_message: str, ai_response: str, ai_analysis: Dict[str, Any],
+                             match: IntentMatch, proof_id: str) -> Optional[ChatResponse]:
+    """Turn OpenAI's intent analysis into a ChatResponse; None if the intent is not recognized.
+
+    Has no side effects, so the streaming endpoint can call it as soon as the
+    intent part of the model output has arrived.
+    """
     msg_lower = user_message.lower()
+    intent_type = ai_analysis.get("intent_type")
+    details = ai_analysis.get("details", {})
     
-    proof_id = f"proof_{int(time.time() * 1000)}_{uuid.uuid4().hex[:6]}"
-
-    # First, try to get OpenAI's analysis if available
-    ai_response, ai_analysis = get_openai_response(user_message)
+    # Handle different intent types based on OpenAI's analysis
+    if intent_type == "verify":
+        verify_proof_id = details.get("proof_id") or proof_id
+        return ChatResponse(
+            response=ai_response,
+            intent=ProofIntent(
+                function="prove_kyc",
+                arguments=["1"],
+                explanation=f"Verify existing proof {verify_proof_id}",
+                additional_context={
+                    "action": "verify",
+                    "proof_id": verify_proof_id,
+                    "is_verification": True
+                }
+            ),
+            metadata={
+                "type": "verification_request",
+                "proof_id": verify_proof_id,
+                "action": "verify"
+            }
+        )
     
-    # If OpenAI is available and detected an intent, use its analysis
-    if ai_response and ai_analysis.get("intent_type") != "none":
-        intent_type = ai_analysis.get("intent_type")
-        details = ai_analysis.get("details", {})
+    elif intent_type == "transfer":
+        transfer_details = extract_transfer_details(user_message)
+        print(f"DEBUG 1: After extract_transfer_details: {transfer_details}")
+        if details.get("amount"):
+            transfer_details["amount"] = details["amount"]
+        print(f"DEBUG 2: AI details.recipient = {details.get('recipient')}")
+        if details.get("recipient") in TEST_ADDRESSES:
+            # Recipient already set correctly by extract_transfer_details
+            pass
+        
+        # Check if KYC is required based on the message or AI detection
+        requires_kyc = details.get("requires_kyc", False)
+        if not requires_kyc:
+            # Double-check with our pattern matching
+            requires_kyc = match.requires_kyc
         
-        # Handle different intent types based on OpenAI's analysis
-        if intent_type == "verify":
-            verify_proof_id = details.get("proof_id") or proof_id
+        if requires_kyc:
             return ChatResponse(
                 response=ai_response,
                 intent=ProofIntent(
                     function="prove_kyc",
                     arguments=["1"],
-                    explanation=f"Verify existing proof {verify_proof_id}",
+                    explanation="Automated KYC proof for USDC transfer.",
                     additional_context={
-                        "action": "verify",
-                        "proof_id": verify_proof_id,
-                        "is_verification": True
-                    }
-                ),
-                metadata={
-                    "type": "verification_request",
-                    "proof_id": verify_proof_id,
-                    "action": "verify"
-                }
-            )
-        
-        elif intent_type == "transfer":
-            transfer_details = extract_transfer_details(user_message)
-            print(f"DEBUG 1: After extract_transfer_details: {transfer_details}")
-            if details.get("amount"):
-                transfer_details["amount"] = details["amount"]
-            print(f"DEBUG 2: AI details.recipient = {details.get('recipient')}")
-            if details.get("recipient") in TEST_ADDRESSES:
-                # Recipient already set correctly by extract_transfer_details
-                pass
-            
-            # Check if KYC is required based on the message or AI detection
-            requires_kyc = details.get("requires_kyc", False)
-            if not requires_kyc:
-                # Double-check with our pattern matching
-                _, requires_kyc = is_transfer_request(user_message)
-            
-            if requires_kyc:
-                return ChatResponse(
-                    response=ai_response,
-                    intent=ProofIntent(
-                        function="prove_kyc",
-                        arguments=["1"],
-                        explanation="Automated KYC proof for USDC transfer.",
-                        additional_context={
-                        "is_automated_transfer": True,
-                            "transfer_details": transfer_details
-                        }
-                    ),
-                    metadata={
-                        "type": "kyc_transfer_automation_start",
                     "is_automated_transfer": True,
-                        "proof_id": proof_id,
-                        "is_automated_transfer": True,
-                        "transfer_details": transfer_details
-                    }
-                )
-            else:
-                # Direct transfer without KYC
-                return ChatResponse(
-                    response=ai_response or f"Initiating direct transfer of {transfer_details['amount']} USDC to {transfer_details['recipient'][:10]}...",
-                    metadata={
-                        "type": "direct_transfer",
                         "transfer_details": transfer_details
                     }
-                )
-            
-        elif intent_type == "kyc_proof":
-            return ChatResponse(
-                response=ai_response,
-                intent=ProofIntent(
-                    function="prove_kyc",
-                    arguments=["1"],
-                    explanation="Manual KYC compliance proof",
-                    additional_context={"is_automated_transfer": False}
                 ),
                 metadata={
-                    "type": "manual_proof",
+                    "type": "kyc_transfer_automation_start",
+                "is_automated_transfer": True,
                     "proof_id": proof_id,
-                    "proof_type": "kyc"
+                    "is_automated_transfer": True,
+                    "transfer_details": transfer_details
                 }
             )
-            
-        elif intent_type == "ai_proof":
+        else:
+            # Direct transfer without KYC
             return ChatResponse(
-                response=ai_response,
-                intent=ProofIntent(
-                    function="prove_ai_content",
-                    arguments=["987654321", "1000"],
-                    explanation="AI content authenticity verification",
-                    additional_context={"is_automated_transfer": False}
-                ),
+                response=ai_response or f"Initiating direct transfer of {transfer_details['amount']} USDC to {transfer_details['recipient'][:10]}...",
                 metadata={
-                    "type": "manual_proof",
-                    "proof_id": proof_id,
-                    "proof_type": "ai_content"
+                    "type": "direct_transfer",
+                    "transfer_details": transfer_details
                 }
             )
+        
+    elif intent_type == "kyc_proof":
+        return ChatResponse(
+            response=ai_response,
+            intent=ProofIntent(
+                function="prove_kyc",
+                arguments=["1"],
+                explanation="Manual KYC compliance proof",
+                additional_context={"is_automated_transfer": False}
+            ),
+            metadata={
+                "type": "manual_proof",
+                "proof_id": proof_id,
+                "proof_type": "kyc"
+            }
+        )
+        
+    elif intent_type == "ai_proof":
+        return ChatResponse(
+            response=ai_response,
+            intent=ProofIntent(
+                function="prove_ai_content",
+                arguments=["987654321", "1000"],
+                explanation="AI content authenticity verification",
+                additional_context={"is_automated_transfer": False}
+            ),
+            metadata={
+                "type": "manual_proof",
+                "proof_id": proof_id,
+                "proof_type": "ai_content"
+            }
+        )
+        
+    elif intent_type == "location_proof":
+        location = details.get("location", "New York")
+        lat, lon = 103, 182  # NYC default
+        
+        if "london" in location.lower():
+            lat, lon = 130, 242
+        elif "new york" in location.lower() or "nyc" in location.lower():
+            lat, lon = 103, 182
+        elif "tokyo" in location.lower():
+            lat, lon = 90, 140
+        elif "san francisco" in location.lower() or "sf" in location.lower():
+            lat, lon = 96, 122
             
-        elif intent_type == "location_proof":
-            location = details.get("location", "New York")
-            lat, lon = 103, 182  # NYC default
-            
-            if "london" in location.lower():
-                lat, lon = 130, 242
-            elif "new york" in location.lower() or "nyc" in location.lower():
-                lat, lon = 103, 182
-            elif "tokyo" in location.lower():
-                lat, lon = 90, 140
-            elif "san francisco" in location.lower() or "sf" in location.lower():
-                lat, lon = 96, 122
-                
-            device_id = 1234
-            packed_input = (lat << 24) | (lon << 16) | device_id
-            
-            return ChatResponse(
-                response=ai_response,
-                intent=ProofIntent(
-                    function="prove_location",
-                    arguments=[str(packed_input)],
-                    explanation=f"Device location proof for {location} - Zone verification",
-                    additional_context={
-                        "is_automated_transfer": False,
-                        "location": location,
-                        "zone_type": "city boundary verification"
-                    }
-                ),
-                metadata={
-                    "type": "manual_proof",
-                    "proof_id": proof_id,
-                    "proof_type": "location"
+        device_id = 1234
+        packed_input = (lat << 24) | (lon << 16) | device_id
+        
+        return ChatResponse(
+            response=ai_response,
+            intent=ProofIntent(
+                function="prove_location",
+                arguments=[str(packed_input)],
+                explanation=f"Device location proof for {location} - Zone verification",
+                additional_context={
+                    "is_automated_transfer": False,
+                    "location": location,
+                    "zone_type": "city boundary verification"
                 }
-            )
-            
-        elif intent_type == "custom_proof":
-            proof_type = details.get("proof_type", "custom")
-            
-            # Generate the appropriate C code for the proof type
-            if proof_type == "collatz":
-                c_code = """// Collatz Conjecture Steps
+            ),
+            metadata={
+                "type": "manual_proof",
+                "proof_id": proof_id,
+                "proof_type": "location"
+            }
+        )
+        
+    elif intent_type == "custom_proof":
+        proof_type = details.get("proof_type", "custom")
+        
+        # Generate the appropriate C code for the proof type
+        if proof_type == "collatz":
+            c_code = """// Collatz Conjecture Steps
 int main() {
     int n = 27;
     int steps = 0;
@@ -466,12 +588,12 @@ int main() {
     }
     return steps;
 }"""
-                description = "Collatz conjecture computation"
-                wasm_file = "collatz"
-                default_arg = "27"
-                
-            elif proof_type == "prime":
-                c_code = """// Prime Number Checker Example
+            description = "Collatz conjecture computation"
+            wasm_file = "collatz"
+            default_arg = "27"
+            
+        elif proof_type == "prime":
+            c_code = """// Prime Number Checker Example
 int main() {
     int n = 17;
     if (n <= 1) return 0;
@@ -482,73 +604,81 @@ int main() {
     }
     return 1;
 }"""
-                description = "prime number check"
-                wasm_file = "prime_checker"
-                default_arg = "17"
-                
-            elif proof_type == "digital_root":
-                c_code = """// Digital Root Calculator
+            description = "prime number check"
+            wasm_file = "prime_checker"
+            default_arg = "17"
+            
+        elif proof_type == "digital_root":
+            c_code = """// Digital Root Calculator
 int main() {
     int n = 12345;
     if (n == 0) return 0;
     return (n - 1) % 9 + 1;
 }"""
-                description = "digital root calculation"
-                wasm_file = "digital_root"
-                default_arg = "12345"
-                
-            else:
-                # Generic custom proof
-                c_code = "// Custom proof"
-                description = "custom computation"
-                wasm_file = "custom_proof"
-                default_arg = "1"
+            description = "digital root calculation"
+            wasm_file = "digital_root"
+            default_arg = "12345"
             
-            return ChatResponse(
-                response=ai_response,
-                intent=ProofIntent(
-                    function="prove_custom",
-                    arguments=[default_arg],
-                    explanation=f"Custom proof: {description}",
-                    additional_context={
-                        "is_automated_transfer": False,
-                        "c_code": c_code,
-                        "proof_type": "custom",
-                        "is_custom": True,
-                        "custom_description": description,
-                        "wasm_file": wasm_file
-                    }
-                ),
-                metadata={
-                    "type": "manual_proof",
-                    "proof_id": proof_id,
+        else:
+            # Generic custom proof
+            c_code = "// Custom proof"
+            description = "custom computation"
+            wasm_file = "custom_proof"
+            default_arg = "1"
+        
+        return ChatResponse(
+            response=ai_response,
+            intent=ProofIntent(
+                function="prove_custom",
+                arguments=[default_arg],
+                explanation=f"Custom proof: {description}",
+                additional_context={
+                    "is_automated_transfer": False,
+                    "c_code": c_code,
                     "proof_type": "custom",
-                    "description": description,
-                    "is_custom": True
-                }
-            )
-            
-        elif intent_type == "list":
-            # Handle both "list all proofs" and "Proof History" styles
-            list_type = "verifications" if ("verification" in msg_lower or details.get("list_type") == "verifications") else "proofs"
-            return ChatResponse(
-                response=ai_response,
-                intent=ProofIntent(
-                    function="list_proofs",
-                    arguments=[list_type],
-                    explanation=f"List all {list_type}",
-                    additional_context={"list_type": list_type}
-                ),
-                metadata={
-                    "type": "list_request",
-                    "list_type": list_type
+                    "is_custom": True,
+                    "custom_description": description,
+                    "wasm_file": wasm_file
                 }
-            )
+            ),
+            metadata={
+                "type": "manual_proof",
+                "proof_id": proof_id,
+                "proof_type": "custom",
+                "description": description,
+                "is_custom": True
+            }
+        )
+        
+    elif intent_type == "list":
+        # Handle both "list all proofs" and "Proof History" styles
+        list_type = "verifications" if ("verification" in msg_lower or details.get("list_type") == "verifications") else "proofs"
+        return ChatResponse(
+            response=ai_response,
+            intent=ProofIntent(
+                function="list_proofs",
+                arguments=[list_type],
+                explanation=f"List all {list_type}",
+                additional_context={"list_type": list_type}
+            ),
+            metadata={
+                "type": "list_request",
+                "list_type": list_type
+            }
+        )
+
+    return None
+
+
+async def route_local(user_message: str, ai_response: Optional[str], match: IntentMatch,
+                      proof_id: str) -> ChatResponse:
+    """Pattern-matching route used when OpenAI is unavailable, skipped or found no intent"""
+    msg_lower = user_message.lower()
     
     # If OpenAI didn't detect an intent or is unavailable, fall back to pattern matching
     # Check for verification request first
-    is_verify, verify_proof_id = is_verification_request(user_message)
-    if is_verify:
+    if match.has("verify"):
+        verify_proof_id = match.proof_id
         response_text = ai_response or f"I'll verify the proof {verify_proof_id} for you."
         return ChatResponse(
             response=response_text,
@@ -570,7 +700,7 @@ int main() {
         )
 
     # Check for specific proof types (Collatz, Prime, Digital Root)
-    if is_collatz_proof_request(user_message):
+    if match.has("collatz_proof"):
         c_code = """// Collatz Conjecture Steps
 int main() {
     int n = 27;
@@ -607,7 +737,7 @@ int main() {
             }
         )
     
-    elif is_prime_proof_request(user_message):
+    elif match.has("prime_proof"):
         c_code = """// Prime Number Checker Example
 int main() {
     int n = 17;
@@ -644,7 +774,7 @@ int main() {
             }
         )
     
-    elif is_digital_root_proof_request(user_message):
+    elif match.has("digital_root_proof"):
         c_code = """// Digital Root Calculator
 int main() {
     int n = 12345;
@@ -677,8 +807,8 @@ int main() {
         )
 
     # Check for transfer requests
-    is_transfer, requires_kyc = is_transfer_request(user_message)
-    if is_transfer:
+    if match.has("transfer"):
+        requires_kyc = match.requires_kyc
         details = extract_transfer_details(user_message)
         
         if requires_kyc:
@@ -716,7 +846,7 @@ int main() {
                         "type": "direct_transfer_complete",
                         "transfer_details": details,
                         "transaction_result": transfer_result,
-                        "success": True
+                        "success": transfer_result.get("success", True)
                     }
                 )
             except Exception as e:
@@ -729,7 +859,7 @@ int main() {
                     }
                 )
     
-    elif is_kyc_proof_request(user_message):
+    elif match.has("kyc_proof"):
         response_text = ai_response or "I'll generate a KYC compliance proof for you. This will create a zero-knowledge proof of your verification status."
         return ChatResponse(
             response=response_text,
@@ -746,7 +876,7 @@ int main() {
             }
         )
     
-    elif is_ai_content_proof_request(user_message):
+    elif match.has("ai_proof"):
         response_text = ai_response or "I'll generate a proof of AI content authenticity. This will verify that content was generated by an authorized AI system."
         return ChatResponse(
             response=response_text,
@@ -763,23 +893,10 @@ int main() {
             }
         )
     
-    elif is_location_proof_request(user_message):
-        # Extract location from message or use default
-        location = "New York"
-        lat, lon = 103, 182  # NYC normalized coordinates
-        
-        if "san francisco" in msg_lower or "sf" in msg_lower:
-            location = "San Francisco"
-            lat, lon = 96, 122
-        elif "new york" in msg_lower or "nyc" in msg_lower:
-            location = "New York"
-            lat, lon = 103, 182
-        elif "london" in msg_lower:
-            location = "London"
-            lat, lon = 130, 242
-        elif "tokyo" in msg_lower:
-            location = "Tokyo"
-            lat, lon = 90, 140
+    elif match.has("location_proof"):
+        # Extract location from message or use default (NYC normalized coordinates)
+        location = match.location or "New York"
+        lat, lon = LOCATION_COORDINATES[location]
         
         device_id = 1234
         packed_input = (lat << 24) | (lon << 16) | device_id
@@ -804,8 +921,8 @@ int main() {
             }
         )
     
-    elif ("list" in msg_lower and ("proof" in msg_lower or "verification" in msg_lower)) or "proof history" in msg_lower or "verification history" in msg_lower:
-        list_type = "verifications" if "verification" in msg_lower else "proofs"
+    elif match.has("list"):
+        list_type = "verifications" if "verification" in match.keywords else "proofs"
         response_text = ai_response or f"Here are your recent {list_type}. Use the proof IDs to verify or inspect specific proofs."
         return ChatResponse(
             response=response_text,
@@ -824,7 +941,7 @@ int main() {
             }
         )
     
-    elif is_custom_proof_request(user_message)[0]:
+    elif match.is_custom and is_custom_proof_request(user_message)[0]:
         is_custom, c_code = is_custom_proof_request(user_message)
         description = "custom computation"
         wasm_file = "custom_proof"  # Default
@@ -883,8 +1000,207 @@ int main() {
                 metadata={"type": "help"}
             )
 
+
+def new_proof_id() -> str:
+    return f"proof_{int(time.time() * 1000)}_{uuid.uuid4().hex[:6]}"
+
+
+# API Endpoints
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+    user_message = request.message
+    proof_id = new_proof_id()
+
+    # Scan the message once; every routing decision below reads from this match
+    match = intent_matcher.match(user_message)
+
+    # Unambiguous commands are routed locally without an OpenAI round trip
+    if match.unambiguous:
+        ai_response, ai_analysis = None, {}
+    else:
+        ai_response, ai_analysis = get_openai_response(user_message)
+    
+    # If OpenAI is available and detected an intent, use its analysis
+    if ai_response and ai_analysis.get("intent_type") != "none":
+        ai_result = build_ai_intent_response(user_message, ai_response, ai_analysis, match, proof_id)
+        if ai_result:
+            return ai_result
+    
+    return await route_local(user_message, ai_response, match, proof_id)
+
+async def stream_chat_events(user_message: str):
+    """SSE events for /chat/stream: `intent` as soon as it is known, `token` chunks, then `done`"""
+    proof_id = new_proof_id()
+    match = intent_matcher.match(user_message)
+    intent_sent = False
+    streamed_tokens = False
+    ai_response, ai_analysis = None, {}
+
+    def intent_event(result: ChatResponse) -> str:
+        return sse_event("intent", {
+            "intent": result.intent.model_dump() if result.intent else None,
+            "metadata": result.metadata
+        })
+
+    if not match.unambiguous and openai_status.available:
+        cached = intent_cache.get(user_message)
+        if cached:
+            ai_response, ai_analysis = cached
+        else:
+            parser = StreamingAnalysisParser()
+            try:
+                stream = await openai_status.async_client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": build_analysis_prompt(user_message, intent_first=True)}
+                    ],
+                    temperature=0.7,
+                    max_tokens=500,
+                    response_format={ "type": "json_object" },
+                    stream=True
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    for kind, payload in parser.feed(chunk.choices[0].delta.content or ""):
+                        if kind == "intent" and payload.get("intent_type") != "none":
+                            # Intent is complete before the chatty part: let the UI start the proof now
+                            early = build_ai_intent_response(user_message, "", payload, match, proof_id)
+                            if early:
+                                yield intent_event(early)
+                                intent_sent = True
+                        elif kind == "token":
+                            yield sse_event("token", {"text": payload})
+                            streamed_tokens = True
+
+                ai_analysis = parser.result()
+                ai_response = ai_analysis.get("response") or "I'll help you with that."
+                intent_cache.put(user_message, ai_response, ai_analysis)
+                openai_status.mark_success()
+            except Exception as e:
+                print(f"OpenAI streaming error: {e}")
+                openai_status.mark_failure(e)
+                if streamed_tokens:
+                    yield sse_event("error", {"error": str(e)})
+
+    result = None
+    if ai_response and ai_analysis.get("intent_type") != "none":
+        result = build_ai_intent_response(user_message, ai_response, ai_analysis, match, proof_id)
+    if result is None:
+        result = await route_local(user_message, ai_response, match, proof_id)
+
+    if not intent_sent and (result.intent or result.metadata):
+        yield intent_event(result)
+    if not streamed_tokens:
+        yield sse_event("token", {"text": result.response})
+    yield sse_event("done", result.model_dump())
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Streaming /chat over Server-Sent Events"""
+    return StreamingResponse(
+        stream_chat_events(request.message),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def run_idempotent_transfer(scope: str, request: Dict[str, Any], client_key: Optional[str], execute) -> Dict[str, Any]:
+    """Run a transfer once per idempotency key and tag the response with the key used"""
+    key = transfer_idempotency.key_for(
+        scope,
+        request.get("transfer_details", {}),
+        client_key or request.get("idempotency_key")
+    )
+    result, replayed = await transfer_idempotency.run(key, lambda: execute(request))
+    return {**result, "idempotency_key": key, "replayed": replayed}
+
+
+async def record_transfer(transfer_details: Dict[str, Any], response_data: Dict[str, Any], kyc_verified: bool):
+    """Append an executed transfer to the ledger; a ledger failure never fails the transfer itself"""
+    if not (response_data.get("transferId") or response_data.get("id")):
+        # Without Circle's ID the ledger would invent one that matches no real transfer
+        print(f"WARNING: transfer response has no transferId, not recording it in the ledger: {response_data}")
+        return
+    entry = {field: response_data[field] for field in
+             ("transferId", "id", "transactionHash", "amount", "recipient", "from", "blockchain", "status")
+             if response_data.get(field) is not None}
+    entry.setdefault("status", "pending")
+    entry["isKYCVerified"] = kyc_verified
+    if transfer_details.get("workflow_id"):
+        entry["workflowId"] = transfer_details["workflow_id"]
+    try:
+        await asyncio.to_thread(transfer_ledger.record, entry)
+    except OSError as e:
+        print(f"WARNING: could not record transfer in the ledger: {e}")
+
+
+def parse_command_locally(command: str) -> Dict[str, Any]:
+    """Local parse of one command: intent, transfer fields and whether OpenAI is needed"""
+    match = intent_matcher.match(command)
+    row = {
+        "intent": match.matched[0] if len(match.matched) == 1 else None,
+        "amount": None,
+        "recipient": None,
+        "blockchain": None,
+        "requires_kyc": None,
+        "ambiguous": len(match.matched) != 1,
+        "source": "local",
+    }
+    if match.has("transfer"):
+        row.update(extract_transfer_details(command))
+        row["requires_kyc"] = match.requires_kyc
+    return row
+
+
+@app.post("/parse/batch")
+async def parse_batch(request: BatchParseRequest):
+    """Parse many commands at once and return the fields as columns.
+
+    Unambiguous commands are parsed locally with precompiled patterns; only
+    ambiguous ones go to OpenAI (off the event loop, with bounded concurrency).
+    """
+    rows = [parse_command_locally(command) for command in request.commands]
+    
+    ambiguous = [i for i, row in enumerate(rows) if row["ambiguous"]]
+    if request.use_openai and ambiguous and openai_status.available:
+        semaphore = asyncio.Semaphore(request.max_openai_concurrency)
+        
+        async def classify(i: int):
+            async with semaphore:
+                _, analysis = await asyncio.to_thread(get_openai_response, request.commands[i])
+            intent_type = analysis.get("intent_type")
+            if not intent_type:
+                return
+            rows[i]["intent"] = intent_type
+            rows[i]["source"] = "openai"
+            rows[i]["ambiguous"] = False
+            if intent_type == "transfer":
+                rows[i].update(extract_transfer_details(request.commands[i]))
+                details = analysis.get("details", {})
+                if details.get("amount"):
+                    rows[i]["amount"] = str(details["amount"])
+                rows[i]["requires_kyc"] = bool(details.get("requires_kyc")) or intent_matcher.match(request.commands[i]).requires_kyc
+        
+        await asyncio.gather(*(classify(i) for i in ambiguous))
+    
+    columns = ["intent", "amount", "recipient", "blockchain", "requires_kyc", "ambiguous", "source"]
+    return {
+        "count": len(rows),
+        "columns": {name: [row[name] for row in rows] for name in columns},
+        "openai_calls": sum(1 for row in rows if row["source"] == "openai"),
+    }
+
+
 @app.post("/execute_verified_transfer")
-async def execute_verified_transfer(request: Dict[str, Any]):
+async def execute_verified_transfer(request: Dict[str, Any],
+                                    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    return await run_idempotent_transfer("verified", request, idempotency_key, _execute_verified_transfer)
+
+
+async def _execute_verified_transfer(request: Dict[str, Any]) -> Dict[str, Any]:
     transfer_details = request.get("transfer_details", {})
     amount = transfer_details.get("amount", "0.01")
     recipient = transfer_details.get("recipient")
@@ -894,64 +1210,45 @@ async def execute_verified_transfer(request: Dict[str, Any]):
         raise HTTPException(status_code=400, detail="Recipient address is missing.")
 
     try:
-        # Construct the command string
         command_str = f"send {amount} USDC to {recipient}"
         if blockchain == "SOL":
             command_str += " on solana"
         
-        cmd = ["node", str(CIRCLE_DIR / "executeTransfer.js"), command_str]
-        print(f"DEBUG: Executing command: {' '.join(cmd)}")
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=60, env=os.environ.copy(), cwd=str(CIRCLE_DIR))
-        
-        output_lines = result.stdout.strip().split('\n')
-        json_output = None
-        
-        print(f"Circle script output: {result.stdout}")
+        print(f"DEBUG: Dispatching transfer to Circle worker pool: {command_str}")
+        with tracer.span("circle.transfer", blockchain=blockchain):
+            json_output = await transfer_pool.submit("transfer", {"command": command_str}, timeout=TRANSFER_TIMEOUT)
+        print(f"Parsed Circle response: {json_output}")
         
-        for line in output_lines:
-            if line.strip().startswith('{'):
-                try:
-                    json_output = json.loads(line)
-                    print(f"Parsed Circle response: {json_output}")
-                    break
-                except Exception as e:
-                    print(f"Failed to parse line as JSON: {line}, error: {e}")
-                    continue
+        response_data = {
+            "success": True,
+            "blockchain": blockchain,
+            "message": "Transfer successful via Circle SDK.",
+            "from": "0x37b6c846ca0483a0fc6c7702707372ebcd131188",
+            "amount": amount,
+            "recipient": recipient
+        }
         
         if json_output:
-            response_data = {
-                "success": True,
-                "blockchain": blockchain,
-                "message": "Transfer successful via Circle SDK.",
-                "from": "0x37b6c846ca0483a0fc6c7702707372ebcd131188",
-                "amount": amount,
-                "recipient": recipient
-            }
+            response_data.update(json_output)
             
-            if json_output:
-                response_data.update(json_output)
-                
-            print(f"Returning to Rust: {response_data}")
-            return response_data
-        else:
-            return {
-                "success": True,
-                "message": "Transfer completed successfully.",
-                "amount": amount,
-                "recipient": recipient,
-                "from": "0x37b6c846ca0483a0fc6c7702707372ebcd131188"
-            }
+        await record_transfer(transfer_details, response_data, kyc_verified=True)
+        print(f"Returning to Rust: {response_data}")
+        return response_data
             
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(status_code=500, detail=f"Transfer script failed: {e.stderr}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal error occurred: {str(e)}")
+    except CircleWorkerOutcomeUnknown as e:
+        return unconfirmed_transfer(e, amount=amount, recipient=recipient, blockchain=blockchain)
+    except CircleWorkerError as e:
+        raise HTTPException(status_code=500, detail=f"Transfer script failed: {e}")
 
 
 @app.post("/execute_direct_transfer")
-async def execute_direct_transfer(request: Dict[str, Any]):
+async def execute_direct_transfer(request: Dict[str, Any],
+                                  idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
     """Execute a direct USDC transfer without KYC verification"""
+    return await run_idempotent_transfer("direct", request, idempotency_key, _execute_direct_transfer)
+
+
+async def _execute_direct_transfer(request: Dict[str, Any]) -> Dict[str, Any]:
     transfer_details = request.get("transfer_details", {})
     amount = transfer_details.get("amount", "0.01")
     recipient = transfer_details.get("recipient")
@@ -965,30 +1262,9 @@ async def execute_direct_transfer(request: Dict[str, Any]):
         if blockchain == "SOL":
             command_str += " on solana"
         
-        cmd = ["node", str(CIRCLE_DIR / "executeTransfer.js"), command_str]
-        
-        print(f"DEBUG: Executing direct transfer: {' '.join(cmd)}")
-        
-        result = subprocess.run(
-            cmd, 
-            capture_output=True, 
-            text=True, 
-            check=True, 
-            timeout=60, 
-            env=os.environ.copy(), 
-            cwd=str(CIRCLE_DIR)
-        )
-        
-        output_lines = result.stdout.strip().split('\n')
-        json_output = None
-        
-        for line in output_lines:
-            if line.strip().startswith('{'):
-                try:
-                    json_output = json.loads(line)
-                    break
-                except:
-                    continue
+        print(f"DEBUG: Dispatching direct transfer to Circle worker pool: {command_str}")
+        with tracer.span("circle.transfer", blockchain=blockchain):
+            json_output = await transfer_pool.submit("transfer", {"command": command_str}, timeout=TRANSFER_TIMEOUT)
         
         response_data = {
             "success": True,
@@ -1003,94 +1279,304 @@ async def execute_direct_transfer(request: Dict[str, Any]):
         if json_output:
             response_data.update(json_output)
             
+        await record_transfer(transfer_details, response_data, kyc_verified=False)
         return response_data
         
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(status_code=500, detail=f"Transfer failed: {e.stderr}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except CircleWorkerOutcomeUnknown as e:
+        return unconfirmed_transfer(e, amount=amount, recipient=recipient, blockchain=blockchain)
+    except CircleWorkerError as e:
+        raise HTTPException(status_code=500, detail=f"Transfer failed: {e}")
 
 
 async def execute_direct_transfer_internal(transfer_details: dict) -> dict:
     """Internal function to execute direct transfer"""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "http://localhost:8002/execute_direct_transfer",
-            json={"transfer_details": transfer_details},
-            timeout=30.0
+    response = await http_clients.post(
+        f"http://localhost:{SERVICE_PORT}/execute_direct_transfer",
+        json={"transfer_details": transfer_details},
+        # Outlast the worker's own timeout so its pending/unknown answer gets back to us
+        timeout=TRANSFER_TIMEOUT + 10.0
+    )
+    
+    if response.status_code == 200:
+        return response.json()
+    else:
+        raise Exception(f"Transfer failed: {response.text}")
+
+
+@app.post("/workflow/parse")
+async def parse_workflow(request: WorkflowParseRequest):
+    """Parse a workflow command into steps (same schema as workflowParser_generic_final.js)"""
+    try:
+        with tracer.span("workflow.parse"):
+            return await workflow_parser.parse(request.command)
+    except CircleWorkerError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+# Batches run as their own process, like the per-workflow executor; keyed by batch ID
+BATCH_RUNNER = AGENTKIT_ROOT / "scripts" / "utils" / "batch_workflows.py"
+BATCH_DIR = AGENTKIT_ROOT / "data" / "batches"
+batch_processes: Dict[str, asyncio.subprocess.Process] = {}
+
+
+@app.post("/workflow/batch")
+async def submit_workflow_batch(request: WorkflowBatchRequest):
+    """Start a pipelined batch run of many workflow commands; poll /workflow/batch/{batch_id}"""
+    batch_id = request.batch_id or f"batch_{uuid.uuid4().hex[:12]}"
+    if batch_id in batch_processes and batch_processes[batch_id].returncode is None:
+        raise HTTPException(status_code=409, detail=f"Batch {batch_id} is already running")
+
+    BATCH_DIR.mkdir(parents=True, exist_ok=True)
+    commands_path = BATCH_DIR / f"{batch_id}.txt"
+    commands_path.write_text("\n".join(" ".join(c.split()) for c in request.commands) + "\n")
+    with open(BATCH_DIR / f"{batch_id}.log", "ab") as log:
+        batch_processes[batch_id] = await asyncio.create_subprocess_exec(
+            sys.executable, str(BATCH_RUNNER), "--batch-id", batch_id, "--file", str(commands_path),
+            cwd=str(BATCH_RUNNER.parent), stdout=log, stderr=subprocess.STDOUT
         )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"Transfer failed: {response.text}")
+    return {"batch_id": batch_id, "count": len(request.commands), "status_url": f"/workflow/batch/{batch_id}"}
+
+
+@app.get("/workflow/batch/{batch_id}")
+async def workflow_batch_status(batch_id: str):
+    """Per-item stage and status of a batch, plus whether its runner is still going"""
+    status = await asyncio.to_thread(batch_status, batch_id)
+    process = batch_processes.get(batch_id)
+    if process is None and not status["items"]:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    status["running"] = process is not None and process.returncode is None
+    status["exit_code"] = process.returncode if process is not None else None
+    return status
+
+
+@app.get("/workflow/parse/stats")
+async def workflow_parse_stats():
+    """Parse-cache hit rate and parser worker liveness"""
+    return workflow_parser.stats()
+
+
+@app.get("/transfers")
+async def list_transfers(recipient: Optional[str] = None, workflow_id: Optional[str] = None,
+                         status: Optional[str] = None, since: Optional[str] = None,
+                         until: Optional[str] = None, limit: int = 100):
+    """Newest-first transfers from the ledger by recipient, workflow or time range"""
+    return {"transfers": await asyncio.to_thread(transfer_ledger.query, recipient=recipient, workflow_id=workflow_id,
+                                                 status=status, since=since, until=until,
+                                                 limit=max(1, min(limit, 1000)))}
+
+
+@app.get("/transfers/stats")
+async def transfer_ledger_stats():
+    """Transfer count, segments and superseded lines of the transfer ledger"""
+    return await asyncio.to_thread(transfer_ledger.stats)
+
+
+@app.get("/transfers/{transfer_id}")
+async def get_ledger_transfer(transfer_id: str):
+    transfer = await asyncio.to_thread(transfer_ledger.get, transfer_id)
+    if transfer is None:
+        raise HTTPException(status_code=404, detail="Transfer not found")
+    return transfer
+
+
+@app.get("/proofs")
+async def list_indexed_proofs(function: Optional[str] = None, workflow_id: Optional[str] = None,
+                              verified: Optional[bool] = None, since: Optional[str] = None,
+                              until: Optional[str] = None, limit: int = 20, cursor: Optional[str] = None):
+    """Newest-first page of proof records from the append-only proof index"""
+    try:
+        return await asyncio.to_thread(get_proof_index().query, function=function, workflow_id=workflow_id,
+                                       verified=verified, since=since, until=until,
+                                       limit=max(1, min(limit, 500)), cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/proofs/stats")
+async def proof_index_stats():
+    """Record count, per-function totals and log size of the proof index"""
+    return await asyncio.to_thread(get_proof_index().stats)
+
+
+@app.get("/proofs/blobs/report")
+async def proof_blob_report():
+    """Logical vs stored bytes of proofs kept in the chunked, compressed blob store"""
+    return await asyncio.to_thread(proof_blobs.report)
+
+
+@app.post("/proofs/{proof_id}/materialize")
+async def materialize_proof(proof_id: str):
+    """Decompress a stored proof to a temporary proof file for zkEngine verify; the caller deletes it"""
+    try:
+        path = await asyncio.to_thread(proof_blobs.materialize, proof_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Proof not found")
+    return {"path": str(path)}
+
+
+# Proof downloads share one mmap per artifact instead of reading 18 MB per request
+proof_files = ProofFileServer(proof_blobs, lambda proof_id: get_proof_index().get(proof_id))
+
+
+@app.api_route("/proofs/{proof_id}/download", methods=["GET", "HEAD"])
+async def download_proof(proof_id: str, request: Request):
+    """proof.bin with Range, If-Range and If-None-Match support and a strong ETag from its file hash"""
+    try:
+        return await proof_files.response(proof_id, request.headers)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Proof not found")
+
+
+@app.post("/proofs/{proof_id}/record")
+async def record_proof(proof_id: str, request: ProofRecordRequest):
+    """Index a proof the Rust server generated (chat proofs never pass through the executor)"""
+    record = proof_record(proof_id, request.metadata, request.metrics)
+    await asyncio.to_thread(get_proof_index().record, record)
+    return record
+
+
+@app.post("/proofs/{proof_id}/verified")
+async def record_verification(proof_id: str, request: ProofVerifiedRequest):
+    """Record the Rust server's verification result for an indexed proof"""
+    record = await asyncio.to_thread(get_proof_index().mark_verified, proof_id, request.valid)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Proof not found")
+    return record
+
+
+@app.get("/proofs/{proof_id}")
+async def get_indexed_proof(proof_id: str):
+    record = await asyncio.to_thread(get_proof_index().get, proof_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Proof not found")
+    return record
+
+
+@app.post("/prover/admit")
+async def prover_admit(request: ProverAdmitRequest):
+    """Block until a proof job may start; returns a lease to hand back via /prover/release"""
+    try:
+        with tracer.span("prover.admit", function=request.function, priority=request.priority) as span:
+            lease = await prover_admission_controller.acquire(request.function, request.priority, request.owner)
+            span.set(waited_ms=lease["waited_ms"])
+            return lease
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/prover/release")
+async def prover_release(request: ProverReleaseRequest):
+    """Return a proof slot; unknown or expired leases are reported, not rejected"""
+    return {"released": prover_admission_controller.release(request.lease_id)}
+
+
+@app.get("/prover/admission")
+async def prover_admission_stats():
+    """Running proofs, queue depth and wait percentiles per priority, memory in use vs budget"""
+    return prover_admission_controller.stats()
+
+
+@app.get("/transfer_pool/status")
+async def transfer_pool_status():
+    """Report liveness and per-worker queue depth of the Circle worker pool"""
+    return transfer_pool.stats()
+
+
+@app.get("/idempotency/stats")
+async def idempotency_stats():
+    """Executed, joined and replayed transfer submissions"""
+    return transfer_idempotency.stats()
+
+
+@app.get("/http_clients/stats")
+async def http_client_stats():
+    """Pooled origins and how many internal calls skipped the HTTP loopback"""
+    return http_clients.stats()
+
+
+@app.get("/openai/status")
+async def openai_health_status():
+    """Live OpenAI availability as seen by the background health probe"""
+    return openai_status.status()
+
+
+@app.get("/intent_cache/stats")
+async def intent_cache_stats():
+    """Hit/miss counters for the OpenAI intent-classification cache"""
+    return intent_cache.stats()
+
+
+@app.get("/debug/loop_stalls")
+async def loop_stalls():
+    """Per-endpoint event-loop stall histograms and the most recent stall stacks"""
+    if loop_monitor is None:
+        return {"enabled": False, "hint": "Set LOOP_STALL_DEBUG=1 and restart to enable stall detection"}
+    return loop_monitor.report()
+
+
+@app.get("/traces/summary")
+async def traces_summary(trace_id: Optional[str] = None):
+    """Per-span-name latency budget (count, total, p50/p95/max ms), optionally for one trace"""
+    return tracer.summary(trace_id)
+
+
+@app.get("/traces/{trace_id}")
+async def trace_timeline(trace_id: str):
+    """Chrome trace-event JSON for one trace; open it in chrome://tracing or Perfetto"""
+    timeline = tracer.chrome_trace(trace_id)
+    if not timeline["traceEvents"]:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return timeline
+
+
+@app.post("/traces/{trace_id}/export")
+async def export_trace(trace_id: str):
+    """Write one trace to TRACE_EXPORT_DIR (default data/traces) as a Chrome trace file"""
+    if not tracer.spans(trace_id):
+        raise HTTPException(status_code=404, detail="Trace not found")
+    export_dir = Path(TRACE_EXPORT_DIR or AGENTKIT_ROOT / "data" / "traces")
+    path = tracer.export(export_dir / f"{trace_id}.trace.json", trace_id)
+    return {"path": str(path)}
 
 
 @app.post("/check_transfer_status")
 async def check_transfer_status(request: Dict[str, Any]):
-    """Check the status of a Circle transfer"""
-    transfer_id = request.get("transferId")
-    if not transfer_id:
+    """Check the status of one Circle transfer ("transferId") or many ("transferIds")"""
+    transfer_ids = request.get("transferIds")
+    single_id = request.get("transferId")
+    if not transfer_ids and not single_id:
         raise HTTPException(status_code=400, detail="Transfer ID is required")
     
     try:
-        # Create a temporary script to check status
-        script_path = CIRCLE_DIR / "check_status_temp.js"
-        script_content = f"""
-import CircleUSDCHandler from './circleHandler.js';
-
-const handler = new CircleUSDCHandler();
-await handler.initialize();
-
-const status = await handler.getTransactionStatus('{transfer_id}');
-const txHash = await handler.getTransactionHash('{transfer_id}');
-
-console.log(JSON.stringify({{
-    status: status,
-    transactionHash: txHash
-}}));
-"""
-        
-        with open(script_path, "w") as f:
-            f.write(script_content)
-        
-        # Execute the script
-        cmd = ["node", str(script_path)]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10, env=os.environ.copy(), cwd=str(CIRCLE_DIR))
-        
-        # Clean up
-        script_path.unlink(missing_ok=True)
-        
-        if result.returncode == 0:
-            try:
-                # Parse the last line of output (in case there are debug messages)
-                output_lines = result.stdout.strip().split('\n')
-                last_line = output_lines[-1] if output_lines else '{}'
-                data = json.loads(last_line)
-                return data
-            except:
-                return {"status": "unknown", "transactionHash": None}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to check transfer status")
-            
+        statuses = await transfer_status.get_many(transfer_ids or [single_id])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if transfer_ids:
+        return {"statuses": statuses}
+    return statuses[single_id]
+
+
+@app.get("/check_transfer_status/stats")
+async def check_transfer_status_stats():
+    """Cache and upstream counters for transfer status lookups"""
+    return transfer_status.stats()
 
 if __name__ == "__main__":
     print("✅ Checking main execution block...")
     
-    # Check if OpenAI API key is set
-    if not openai_available:
+    # Check if OpenAI API key is set; connectivity is probed in the background after startup
+    if not openai_status.configured:
         print("\n⚠️ OpenAI is NOT available!")
         print("   To enable natural language conversations:")
         print("   1. Set your API key: export OPENAI_API_KEY='sk-...'")
         print("   2. Restart this service")
     else:
-        print("\n✅ OpenAI is connected and ready!")
-        print("   You can now have natural conversations and use AI-enhanced responses.")
+        print("\n✅ OpenAI API key found; connectivity will be checked in the background.")
+        print("   Check GET /openai/status for live availability.")
     
     try:
-        uvicorn.run(app, host="0.0.0.0", port=8002)
+        uvicorn.run(app, host="0.0.0.0", port=SERVICE_PORT)
     except NameError:
         print("\n❌ FATAL ERROR: 'uvicorn' is not defined.")
         print("   It seems the uvicorn library is not installed correctly.")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Event-loop stall detector for the chat service.
+
+A sampler task measures how late the event loop wakes it up, and a watchdog
+thread snapshots the loop thread's stack whenever the loop has not beaten for
+longer than the threshold. Stalls are attributed to the endpoint whose task
+was running at the time, so synchronous calls hiding inside `async def`
+handlers show up by name.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Dict, Optional
+
+# Upper bounds (ms) of the stall histogram buckets; the last bucket is open-ended
+STALL_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class LoopStallMonitor:
+    """Measures event-loop lag and records the stack of whoever holds the loop"""
+
+    def __init__(self, threshold_ms: float = 100.0, interval_ms: float = 20.0, max_recent: int = 20):
+        self.threshold = threshold_ms / 1000.0
+        self.interval = interval_ms / 1000.0
+        self.endpoints: Dict[str, Dict[str, Any]] = {}
+        self.recent = deque(maxlen=max_recent)
+        self.max_lag_ms = 0.0
+        self.last_lag_ms = 0.0
+        self.samples = 0
+        self._task_endpoints: Dict[asyncio.Task, str] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._suspect: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._sampler: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._running = False
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._running = True
+        self._sampler = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-stall-watchdog", daemon=True)
+        self._watchdog.start()
+        print(f"🔍 Event-loop stall monitor enabled (threshold {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self):
+        self._running = False
+        if self._sampler:
+            self._sampler.cancel()
+
+    def enter(self, endpoint: str):
+        task = asyncio.current_task()
+        if task is not None:
+            self._task_endpoints[task] = endpoint
+
+    def exit(self):
+        task = asyncio.current_task()
+        if task is not None:
+            self._task_endpoints.pop(task, None)
+
+    async def _sample(self):
+        while self._running:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            lag = max(0.0, now - expected)
+            self.samples += 1
+            self.last_lag_ms = lag * 1000
+            self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+
+            with self._lock:
+                suspect, self._suspect = self._suspect, None
+            if lag >= self.threshold:
+                self._record(lag * 1000, suspect)
+
+    def _watch(self):
+        while self._running:
+            time.sleep(self.interval / 2)
+            if time.monotonic() - self._last_beat < self.threshold:
+                continue
+            with self._lock:
+                if self._suspect is not None:
+                    continue
+            # The loop is blocked right now: whatever task is current is the culprit
+            frame = sys._current_frames().get(self._loop_thread)
+            task = asyncio.current_task(self._loop) if self._loop else None
+            suspect = {
+                "endpoint": self._task_endpoints.get(task, "<unattributed>"),
+                "stack": traceback.format_stack(frame) if frame else [],
+            }
+            with self._lock:
+                self._suspect = suspect
+
+    def _record(self, duration_ms: float, suspect: Optional[Dict[str, Any]]):
+        endpoint = suspect["endpoint"] if suspect else "<unattributed>"
+        stats = self.endpoints.setdefault(endpoint, {
+            "count": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "buckets": {self._bucket_label(i): 0 for i in range(len(STALL_BUCKETS_MS) + 1)},
+        })
+        stats["count"] += 1
+        stats["total_ms"] += duration_ms
+        stats["max_ms"] = max(stats["max_ms"], duration_ms)
+        stats["buckets"][self._bucket_label(self._bucket_index(duration_ms))] += 1
+
+        self.recent.append({
+            "endpoint": endpoint,
+            "duration_ms": round(duration_ms, 1),
+            "at": time.time(),
+            "stack": suspect["stack"] if suspect else [],
+        })
+        print(f"[WARNING] Event loop stalled {duration_ms:.0f} ms in {endpoint}")
+
+    @staticmethod
+    def _bucket_index(duration_ms: float) -> int:
+        for i, bound in enumerate(STALL_BUCKETS_MS):
+            if duration_ms <= bound:
+                return i
+        return len(STALL_BUCKETS_MS)
+
+    @staticmethod
+    def _bucket_label(index: int) -> str:
+        if index < len(STALL_BUCKETS_MS):
+            return f"le_{STALL_BUCKETS_MS[index]}ms"
+        return f"gt_{STALL_BUCKETS_MS[-1]}ms"
+
+    def report(self) -> Dict[str, Any]:
+        endpoints = {
+            name: {**stats, "total_ms": round(stats["total_ms"], 1), "max_ms": round(stats["max_ms"], 1)}
+            for name, stats in self.endpoints.items()
+        }
+        return {
+            "enabled": True,
+            "threshold_ms": self.threshold * 1000,
+            "lag": {
+                "samples": self.samples,
+                "last_ms": round(self.last_lag_ms, 1),
+                "max_ms": round(self.max_lag_ms, 1),
+            },
+            "endpoints": endpoints,
+            "recent": list(self.recent),
+        }
+
+
+class LoopStallMiddleware:
+    """ASGI middleware tagging each request's task with its endpoint path.
+
+    Implemented as plain ASGI (not BaseHTTPMiddleware) so the handler runs in
+    the same task the monitor sees as current.
+    """
+
+    def __init__(self, app, monitor: LoopStallMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self.monitor.enter(f"{scope.get('method', '')} {scope.get('path', '')}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.exit()
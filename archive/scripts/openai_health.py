@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Lazily constructed OpenAI client with a background health probe.
+
+Nothing here touches the network at import time: the client is built on
+first use and availability is refreshed by a periodic probe task, so service
+startup is bounded by local work only.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+
+class OpenAIHealth:
+    """Owns the OpenAI client and a live `available` flag"""
+
+    def __init__(self, api_key: Optional[str], model: str = "gpt-4o-mini",
+                 interval: float = 60.0, timeout: float = 10.0):
+        self.api_key = api_key
+        self.model = model
+        self.interval = interval
+        self.timeout = timeout
+        self.available = False
+        self.last_checked: Optional[float] = None
+        self.last_latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._client = None
+        self._async_client = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    @property
+    def client(self):
+        if self._client is None and self.configured:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key, timeout=self.timeout * 3)
+        return self._client
+
+    @property
+    def async_client(self):
+        """Async client for streaming calls that must not hold the event loop"""
+        if self._async_client is None and self.configured:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(api_key=self.api_key, timeout=self.timeout * 3)
+        return self._async_client
+
+    async def probe(self) -> bool:
+        """One health check; the blocking SDK call runs off the event loop"""
+        if not self.configured:
+            return False
+
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(
+                self.client.chat.completions.create,
+                model=self.model,
+                messages=[{"role": "user", "content": "test"}],
+                max_tokens=5,
+                timeout=self.timeout,
+            ), timeout=self.timeout)
+            was_available = self.available
+            self.mark_success()
+            self.last_latency_ms = round((time.monotonic() - started) * 1000, 1)
+            if not was_available:
+                print(f"✅ OpenAI reachable with {self.model} ({self.last_latency_ms} ms)")
+        except Exception as e:
+            if self.available or self.last_checked is None:
+                print(f"⚠️ OpenAI health probe failed: {e!r}")
+            self.mark_failure(e)
+        self.last_checked = time.time()
+        return self.available
+
+    def mark_success(self):
+        self.available = True
+        self.last_error = None
+
+    def mark_failure(self, error: Exception):
+        """Real calls report failures too, so the fallback kicks in before the next probe"""
+        self.available = False
+        self.last_error = repr(error)
+
+    async def _run(self):
+        while True:
+            await self.probe()
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if not self.configured:
+            print("⚠️ WARNING: OPENAI_API_KEY environment variable not set!")
+            print("   The system will work but without natural language capabilities.")
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "configured": self.configured,
+            "available": self.available,
+            "model": self.model,
+            "last_checked": self.last_checked,
+            "last_latency_ms": self.last_latency_ms,
+            "last_error": self.last_error,
+            "probe_interval_seconds": self.interval,
+        }
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Serving proof artifacts without per-request copies.
+
+A plain `proof.bin` is memory-mapped once and shared by every download, so
+concurrent requests read the same page-cache pages. A request only holds
+the slice it is currently sending, never its own 18 MB copy. When the ASGI
+server offers the `http.response.zerocopysend` extension, the kernel sends
+the file directly (sendfile). Proofs moved into the chunked blob store
+stream through its chunk-at-a-time decompressor instead.
+
+Responses carry a strong ETag: the proof's recorded `file_hash`, else the
+blob manifest's sha256, else a sha256 computed once per file version.
+They also honour single-range `Range` / `If-Range` and `If-None-Match`
+requests.
+"""
+
+import asyncio
+import hashlib
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from starlette.concurrency import iterate_in_threadpool
+from starlette.responses import Response
+
+SEND_CHUNK = 256 * 1024
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """[start, end) for a single `bytes=` range; None means send the whole file"""
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None  # malformed or multi-range: ignoring Range is allowed
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+    else:
+        start, end = max(0, size - int(last)), size
+    if start >= size or start >= end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+class _MappedFiles:
+    """Shared read-only mmaps, reopened when a file is replaced; LRU-bounded"""
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._maps: "OrderedDict[str, Tuple[Tuple[int, int, int], mmap.mmap]]" = OrderedDict()
+
+    def get(self, path: Path) -> Tuple[mmap.mmap, os.stat_result]:
+        st = path.stat()
+        version = (st.st_ino, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            cached = self._maps.get(str(path))
+            if cached and cached[0] == version:
+                self._maps.move_to_end(str(path))
+                return cached[1], st
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        with self._lock:
+            # Evicted maps are not closed: responses still sending from them keep them alive
+            self._maps[str(path)] = (version, mapped)
+            while len(self._maps) > self.maxsize:
+                self._maps.popitem(last=False)
+        return mapped, st
+
+
+class ProofFileResponse(Response):
+    """206/200 body from an mmap, a file descriptor (zerocopysend) or a chunk iterator"""
+
+    def __init__(self, status_code: int, headers: Dict[str, str], start: int, end: int,
+                 path: Optional[Path] = None, mapped: Optional[mmap.mmap] = None,
+                 chunks: Optional[Callable[[int, int], Iterator[bytes]]] = None):
+        self.status_code = status_code
+        self.background = None
+        self.init_headers(headers)
+        self.start, self.end = start, end
+        self.path, self.mapped, self.chunks = path, mapped, chunks
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD" or self.end <= self.start:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if self.path is not None and "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({"type": "http.response.zerocopysend", "file": f.fileno(),
+                            "offset": self.start, "count": self.end - self.start, "more_body": False})
+            return
+
+        if self.mapped is not None:
+            view = memoryview(self.mapped)
+            try:
+                for offset in range(self.start, self.end, SEND_CHUNK):
+                    chunk = view[offset:min(offset + SEND_CHUNK, self.end)]
+                    await send({"type": "http.response.body", "body": bytes(chunk), "more_body": True})
+                    chunk.release()
+            finally:
+                view.release()
+        else:
+            async for data in iterate_in_threadpool(self.chunks(self.start, self.end)):
+                await send({"type": "http.response.body", "body": data, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+
+class ProofFileServer:
+    """Builds download responses for proofs/<id>/proof.bin or its blob-store manifest"""
+
+    def __init__(self, blob_store, record_lookup: Callable[[str], Optional[Dict[str, Any]]]):
+        self.blob_store = blob_store
+        self.record_lookup = record_lookup
+        self._maps = _MappedFiles()
+        self._hashes: Dict[Tuple[str, int, int, int], str] = {}
+
+    def _etag(self, proof_id: str, path: Optional[Path], manifest: Optional[Dict[str, Any]]) -> str:
+        record = self.record_lookup(proof_id) or {}
+        digest = (record.get("metrics") or {}).get("file_hash")
+        if not digest and manifest is not None:
+            digest = manifest["sha256"]
+        if not digest and path is not None:
+            st = path.stat()
+            key = (str(path), st.st_ino, st.st_size, st.st_mtime_ns)
+            digest = self._hashes.get(key)
+            if digest is None:
+                sha = hashlib.sha256()
+                with open(path, "rb") as f:
+                    for data in iter(lambda: f.read(1 << 20), b""):
+                        sha.update(data)
+                digest = self._hashes[key] = sha.hexdigest()
+        return f'"{digest}"'
+
+    def _resolve(self, proof_id: str):
+        """(path, manifest, etag, size) for a proof; blocking, run it in a thread"""
+        path = self.blob_store.proof_dir(proof_id) / "proof.bin"
+        if path.exists():
+            manifest, size = None, path.stat().st_size
+        else:
+            path, manifest = None, self.blob_store.manifest(proof_id)
+            if manifest is None:
+                raise FileNotFoundError(proof_id)
+            size = manifest["size"]
+        return path, manifest, self._etag(proof_id, path, manifest), size
+
+    async def response(self, proof_id: str, headers) -> Response:
+        path, manifest, etag, size = await asyncio.to_thread(self._resolve, proof_id)
+        common = {
+            "etag": etag,
+            "accept-ranges": "bytes",
+            "cache-control": "public, max-age=31536000, immutable",
+        }
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+            return Response(status_code=304, headers=common)
+
+        byte_range = None
+        if_range = headers.get("if-range")
+        if not if_range or if_range.strip() == etag:
+            try:
+                byte_range = parse_range(headers.get("range"), size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={**common, "content-range": f"bytes */{size}"})
+
+        start, end = byte_range or (0, size)
+        response_headers = {
+            **common,
+            "content-type": "application/octet-stream",
+            "content-disposition": f'attachment; filename="{proof_id}.bin"',
+            "content-length": str(end - start),
+        }
+        if byte_range:
+            response_headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+        status = 206 if byte_range else 200
+
+        if path is not None:
+            mapped = None
+            if size:
+                mapped, _ = await asyncio.to_thread(self._maps.get, path)
+            return ProofFileResponse(status, response_headers, start, end, path=path, mapped=mapped)
+        return ProofFileResponse(status, response_headers, start, end,
+                                 chunks=lambda s, e: self.blob_store.stream(proof_id, s, e))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Machine-wide admission control for zkEngine proof jobs.
+
+Every proof the Rust server generates first asks this controller for a
+lease. Waiting jobs are served strictly by priority (interactive chat before
+workflow steps before batch), FIFO within a priority. A job is admitted
+only while both limits hold: the number of running jobs stays under a
+CPU-derived cap, and the sum of their estimated peak memory stays within
+the budget. Per-function memory estimates come from `peak_memory_mb` in the
+proofs databases where it was recorded. When nothing is running, one job is
+always admitted, so a job whose estimate exceeds the budget still runs,
+just alone.
+
+Leases expire after `lease_ttl` seconds, so a prover that crashed without
+releasing cannot wedge the queue.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import statistics
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+PRIORITIES = {"interactive": 0, "workflow": 1, "batch": 2}
+
+
+def available_memory_mb() -> Optional[float]:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def historical_peak_memory(paths: Iterable[Path]) -> Dict[str, float]:
+    """Median recorded peak_memory_mb per proof function across proofs_db.json files"""
+    samples: Dict[str, List[float]] = {}
+    for path in paths:
+        try:
+            with open(path) as f:
+                records = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        for record in (records.values() if isinstance(records, dict) else records):
+            peak = (record.get("metrics") or {}).get("peak_memory_mb")
+            function = (record.get("metadata") or {}).get("function")
+            if function and isinstance(peak, (int, float)) and peak > 0:
+                samples.setdefault(function, []).append(float(peak))
+    return {function: statistics.median(values) for function, values in samples.items()}
+
+
+class _Waiter:
+    __slots__ = ("function", "priority", "owner", "memory_mb", "enqueued", "future")
+
+    def __init__(self, function: str, priority: str, owner: Optional[str], memory_mb: float):
+        self.function = function
+        self.priority = priority
+        self.owner = owner
+        self.memory_mb = memory_mb
+        self.enqueued = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class ProverAdmissionController:
+    """Priority queue of proof jobs admitted under a concurrency cap and a memory budget"""
+
+    def __init__(self, max_concurrent: int, memory_budget_mb: float,
+                 estimates: Optional[Dict[str, float]] = None, default_memory_mb: float = 1024.0,
+                 lease_ttl: float = 900.0, wait_samples: int = 1000):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.memory_budget_mb = float(memory_budget_mb)
+        self.estimates = dict(estimates or {})
+        self.default_memory_mb = default_memory_mb
+        self.lease_ttl = lease_ttl
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._leases: Dict[str, Dict[str, Any]] = {}
+        self._memory_in_use = 0.0
+        self._waits: Dict[str, Deque[float]] = {p: deque(maxlen=wait_samples) for p in PRIORITIES}
+        self._sweeper: Optional[asyncio.Task] = None
+        self.admitted = 0
+        self.expired = 0
+        self.cancelled = 0
+
+    def estimate(self, function: str) -> float:
+        return self.estimates.get(function, self.default_memory_mb)
+
+    def _fits(self, memory_mb: float) -> bool:
+        if not self._leases:
+            return True
+        return (len(self._leases) < self.max_concurrent
+                and self._memory_in_use + memory_mb <= self.memory_budget_mb)
+
+    def _dispatch(self):
+        # Head-of-line: a big high-priority job is not starved by smaller ones behind it
+        while self._queue:
+            waiter: _Waiter = self._queue[0][2]
+            if waiter.future.done():
+                heapq.heappop(self._queue)
+                continue
+            if not self._fits(waiter.memory_mb):
+                return
+            heapq.heappop(self._queue)
+            waiter.future.set_result(self._grant(waiter))
+
+    def _grant(self, waiter: _Waiter) -> Dict[str, Any]:
+        waited_ms = (time.monotonic() - waiter.enqueued) * 1000
+        lease = {
+            "lease_id": uuid.uuid4().hex,
+            "function": waiter.function,
+            "priority": waiter.priority,
+            "owner": waiter.owner,
+            "memory_mb": waiter.memory_mb,
+            "waited_ms": round(waited_ms, 1),
+            "granted": time.monotonic(),
+        }
+        self._leases[lease["lease_id"]] = lease
+        self._memory_in_use += waiter.memory_mb
+        self._waits[waiter.priority].append(waited_ms)
+        self.admitted += 1
+        return lease
+
+    async def acquire(self, function: str, priority: str = "workflow", owner: Optional[str] = None) -> Dict[str, Any]:
+        """Wait for a slot; returns the lease (pass its lease_id to `release`)"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        waiter = _Waiter(function, priority, owner, self.estimate(function))
+        heapq.heappush(self._queue, (PRIORITIES[priority], next(self._seq), waiter))
+        self._dispatch()
+        try:
+            lease = await waiter.future
+        except asyncio.CancelledError:
+            # Admitted just as the caller gave up: hand the slot straight back
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(waiter.future.result()["lease_id"])
+            self.cancelled += 1
+            self._dispatch()
+            raise
+        return {k: v for k, v in lease.items() if k != "granted"}
+
+    def release(self, lease_id: str) -> bool:
+        lease = self._leases.pop(lease_id, None)
+        if lease is None:
+            return False
+        self._memory_in_use = max(0.0, self._memory_in_use - lease["memory_mb"])
+        self._dispatch()
+        return True
+
+    def expire_stale(self) -> int:
+        cutoff = time.monotonic() - self.lease_ttl
+        stale = [lease_id for lease_id, lease in self._leases.items() if lease["granted"] < cutoff]
+        for lease_id in stale:
+            self.release(lease_id)
+        self.expired += len(stale)
+        return len(stale)
+
+    async def _sweep(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.expire_stale()
+
+    def start(self, interval: float = 30.0):
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep(interval))
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, Any]:
+        depth = {p: 0 for p in PRIORITIES}
+        for _, _, waiter in self._queue:
+            if not waiter.future.done():
+                depth[waiter.priority] += 1
+
+        waits = {}
+        for priority, samples in self._waits.items():
+            ordered = sorted(samples)
+            n = len(ordered)
+            waits[priority] = {
+                "samples": n,
+                "p50_ms": round(ordered[n // 2], 1) if n else 0.0,
+                "p95_ms": round(ordered[min(n - 1, int(n * 0.95))], 1) if n else 0.0,
+                "max_ms": round(ordered[-1], 1) if n else 0.0,
+            }
+
+        now = time.monotonic()
+        return {
+            "running": len(self._leases),
+            "max_concurrent": self.max_concurrent,
+            "memory_in_use_mb": round(self._memory_in_use, 1),
+            "memory_budget_mb": round(self.memory_budget_mb, 1),
+            "queue_depth": depth,
+            "queued": sum(depth.values()),
+            "wait": waits,
+            "admitted": self.admitted,
+            "expired": self.expired,
+            "cancelled": self.cancelled,
+            "estimates_mb": {**self.estimates, "default": self.default_memory_mb},
+            "leases": [
+                {"lease_id": l["lease_id"], "function": l["function"], "priority": l["priority"],
+                 "owner": l["owner"], "memory_mb": l["memory_mb"], "held_s": round(now - l["granted"], 1)}
+                for l in self._leases.values()
+            ],
+        }
+
+
+def from_env(proofs_dbs: Iterable[Path]) -> ProverAdmissionController:
+    """Controller sized from PROVER_MAX_CONCURRENT / PROVER_MEMORY_BUDGET_MB, else from this machine"""
+    max_concurrent = int(os.getenv("PROVER_MAX_CONCURRENT", "0")) or max(1, (os.cpu_count() or 2) // 2)
+    budget = float(os.getenv("PROVER_MEMORY_BUDGET_MB", "0"))
+    if not budget:
+        available = available_memory_mb()
+        budget = available * float(os.getenv("PROVER_MEMORY_FRACTION", "0.75")) if available else 4096.0
+    return ProverAdmissionController(
+        max_concurrent=max_concurrent,
+        memory_budget_mb=budget,
+        estimates=historical_peak_memory(proofs_dbs),
+        default_memory_mb=float(os.getenv("PROVER_DEFAULT_PROOF_MB", "1024")),
+        lease_ttl=float(os.getenv("PROVER_LEASE_TTL", "900")),
+    )
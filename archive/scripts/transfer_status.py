@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Batched, cached Circle transfer status lookups.
+
+Finished transfers never change, so their status is answered from a TTL
+cache; pending ones are cached briefly to absorb bursts of UI polling. All
+unresolved IDs of a request go upstream together in a single `status` call
+to a resident Circle worker, and concurrent polls for the same ID share one
+in-flight lookup.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+from circle_worker_pool import CircleWorkerPool
+
+FINAL_STATUSES = {"complete", "failed"}
+
+
+class TransferStatusService:
+    """Answers many transfer IDs per call, going upstream only for unresolved ones"""
+
+    def __init__(self, pool: CircleWorkerPool, final_ttl: float = 3600.0,
+                 pending_ttl: float = 2.0, maxsize: int = 10000):
+        self.pool = pool
+        self.final_ttl = final_ttl
+        self.pending_ttl = pending_ttl
+        self.maxsize = maxsize
+        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+
+    def _cached(self, transfer_id: str):
+        entry = self._cache.get(transfer_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _store(self, transfer_id: str, status: Dict[str, Any]):
+        ttl = self.final_ttl if status.get("status") in FINAL_STATUSES else self.pending_ttl
+        if len(self._cache) >= self.maxsize:
+            now = time.monotonic()
+            self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+            while len(self._cache) >= self.maxsize:
+                self._cache.pop(next(iter(self._cache)))
+        self._cache[transfer_id] = (time.monotonic() + ttl, status)
+
+    async def get_many(self, transfer_ids: Iterable[str], timeout: float = 10.0) -> Dict[str, Dict[str, Any]]:
+        results: Dict[str, Dict[str, Any]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        to_fetch: List[str] = []
+
+        for transfer_id in dict.fromkeys(transfer_ids):
+            cached = self._cached(transfer_id)
+            if cached is not None:
+                self.hits += 1
+                results[transfer_id] = cached
+            elif transfer_id in self._inflight:
+                self.hits += 1
+                waiting[transfer_id] = self._inflight[transfer_id]
+            else:
+                self.misses += 1
+                to_fetch.append(transfer_id)
+
+        if to_fetch:
+            loop = asyncio.get_running_loop()
+            futures = {transfer_id: loop.create_future() for transfer_id in to_fetch}
+            self._inflight.update(futures)
+            waiting.update(futures)
+            try:
+                self.upstream_calls += 1
+                fetched = await self.pool.submit("status", {"transferIds": to_fetch}, timeout=timeout)
+                for transfer_id, future in futures.items():
+                    status = fetched.get(transfer_id) or {"status": "unknown", "transactionHash": None}
+                    self._store(transfer_id, status)
+                    future.set_result(status)
+            except Exception as e:
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(e)
+                        future.exception()  # mark retrieved; waiters still see it
+                raise
+            finally:
+                for transfer_id in to_fetch:
+                    self._inflight.pop(transfer_id, None)
+
+        for transfer_id, future in waiting.items():
+            results[transfer_id] = await future
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached": len(self._cache),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "upstream_calls": self.upstream_calls,
+        }
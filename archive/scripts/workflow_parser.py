@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Warm, memoized workflow parsing.
+
+Commands are parsed by a resident `circle/workflowParserWorker.js` instead
+of a fresh `node workflowParser_generic_final.js` per workflow, and results
+are memoized per normalized command so a repeated workflow template parses
+without touching Node at all. Concurrent requests for the same command share
+one parse.
+"""
+
+import asyncio
+import copy
+from collections import OrderedDict
+from typing import Any, Dict
+
+from circle_worker_pool import CircleWorkerPool
+
+
+def normalize_command(command: str) -> str:
+    """Whitespace-insensitive key; case is kept since the parser echoes names back"""
+    return " ".join(command.split())
+
+
+class WorkflowParserService:
+    """LRU of parsed workflows in front of the parser worker pool"""
+
+    def __init__(self, pool: CircleWorkerPool, maxsize: int = 512):
+        self.pool = pool
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def parse(self, command: str, timeout: float = 30.0) -> Dict[str, Any]:
+        key = normalize_command(command)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return copy.deepcopy(cached)
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._parse(key, timeout))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        else:
+            self.hits += 1
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _parse(self, key: str, timeout: float) -> Dict[str, Any]:
+        try:
+            workflow = await self.pool.submit("parse", {"command": key}, timeout=timeout)
+            self._cache[key] = workflow
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+            return workflow
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "cached": len(self._cache),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "pool": self.pool.stats(),
+        }
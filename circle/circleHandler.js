@@ -213,6 +213,33 @@ class CircleUSDCHandler {
         }
     }
 
+    async getTransfer(transferId) {
+        // Status and transaction hash come from the same endpoint; fetch them together
+        try {
+            const response = await fetch(`${this.baseUrl}/transfers/${transferId}`, {
+                method: 'GET',
+                headers: {
+                    'Accept': 'application/json',
+                    'Authorization': `Bearer ${this.apiKey}`
+                }
+            });
+            
+            const data = await response.json();
+            
+            if (response.ok && data.data) {
+                return {
+                    status: data.data.status,
+                    transactionHash: data.data.transactionHash || null
+                };
+            }
+            
+            return { status: 'unknown', transactionHash: null };
+        } catch (error) {
+            console.error('Failed to get transfer:', error.message);
+            return { status: 'unknown', transactionHash: null };
+        }
+    }
+
     async getSolanaAddress() {
         return this.walletAddresses.SOL;
     }
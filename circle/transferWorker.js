@@ -0,0 +1,108 @@
+#!/usr/bin/env node
+// Long-lived Circle worker for the Python chat service.
+//
+// Reads one JSON request per line on stdin and writes one JSON response per
+// line on stdout:
+//   -> {"id": "...", "op": "transfer", "params": {"command": "send 0.1 USDC to ..."}}
+//   -> {"id": "...", "op": "status", "params": {"transferIds": ["...", "..."]}}
+//   <- {"id": "...", "ok": true, "result": {...}}
+//   <- {"id": "...", "ok": false, "error": "..."}
+//
+// stdout is reserved for the protocol, so all handler logging is sent to stderr.
+import readline from 'readline';
+import CircleUSDCHandler from './circleHandler.js';
+
+console.log = (...args) => console.error(...args);
+
+// The transfer integration is loaded lazily so status lookups (which only need
+// circleHandler.js) keep working when it fails to load. Loading starts right
+// away so the first transfer doesn't pay for it; a failed load is retried.
+let integration = null;
+function loadIntegration() {
+    if (!integration) {
+        integration = import('./zkpCircleIntegration.js').catch((error) => {
+            integration = null;
+            throw error;
+        });
+    }
+    return integration;
+}
+loadIntegration().catch((error) => console.error(`⚠️ Transfer integration failed to load: ${error.message}`));
+
+const statusHandler = new CircleUSDCHandler();
+await statusHandler.initialize();
+
+async function status({ transferIds = [] }) {
+    const results = await Promise.all(transferIds.map((id) => statusHandler.getTransfer(id)));
+    return Object.fromEntries(transferIds.map((id, i) => [id, results[i]]));
+}
+
+async function transfer({ command }) {
+    const { processNaturalLanguageCommand } = await loadIntegration();
+    const result = await processNaturalLanguageCommand(command);
+
+    if (!result.success) {
+        throw new Error(result.error || 'Transfer failed');
+    }
+
+    const response = {
+        success: true,
+        transactionId: result.transactionId,
+        transferId: result.transferId,
+        message: result.message,
+        amount: result.amount,
+        recipient: result.recipient,
+        from: result.from,
+        blockchain: result.blockchain || 'ETH'
+    };
+
+    if (result.simulated) {
+        response.simulated = true;
+    }
+
+    return response;
+}
+
+const handlers = {
+    ping: async () => ({ pong: true, pid: process.pid }),
+    status,
+    transfer
+};
+
+function reply(message) {
+    process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+async function handle(line) {
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (error) {
+        console.error(`❌ Invalid request line: ${line}`);
+        return;
+    }
+
+    const handler = handlers[request.op];
+    if (!handler) {
+        reply({ id: request.id, ok: false, error: `Unknown op: ${request.op}` });
+        return;
+    }
+
+    try {
+        const result = await handler(request.params || {});
+        reply({ id: request.id, ok: true, result });
+    } catch (error) {
+        reply({ id: request.id, ok: false, error: error.message });
+    }
+}
+
+const rl = readline.createInterface({ input: process.stdin });
+rl.on('line', (line) => {
+    if (line.trim()) {
+        handle(line);
+    }
+});
+rl.on('close', () => process.exit(0));
+
+console.error(`✅ Circle transfer worker ready (pid ${process.pid})`);
+reply({ id: null, ok: true, result: { ready: true, pid: process.pid } });
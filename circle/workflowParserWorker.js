@@ -0,0 +1,109 @@
+#!/usr/bin/env node
+// Long-lived workflow parser worker for the Python chat service.
+//
+// Same line-delimited JSON protocol as transferWorker.js:
+//   -> {"id": "...", "op": "parse", "params": {"command": "Generate KYC proof then send 0.01 to alice"}}
+//   <- {"id": "...", "ok": true, "result": {"description": "...", "steps": [...]}}
+//   <- {"id": "...", "ok": false, "error": "..."}
+//
+// If workflowParser_generic_final.js exports a parse function it is loaded
+// once and called in-process. Otherwise each parse falls back to running the
+// parser CLI, which is what callers did before.
+import readline from 'readline';
+import { execFile } from 'child_process';
+import { promisify } from 'util';
+import { dirname, join } from 'path';
+import { fileURLToPath, pathToFileURL } from 'url';
+
+console.log = (...args) => console.error(...args);
+
+const __dirname = dirname(fileURLToPath(import.meta.url));
+const parserPath = join(__dirname, 'workflowParser_generic_final.js');
+const execFileAsync = promisify(execFile);
+
+async function loadParser() {
+    // Keep a CLI-style module from treating the worker's argv as a command or exiting the worker
+    const argv = process.argv;
+    const exit = process.exit;
+    process.argv = [argv[0], parserPath];
+    process.exit = (code) => { throw new Error(`parser module called process.exit(${code}) on import`); };
+    try {
+        const mod = await import(pathToFileURL(parserPath).href);
+        const candidates = [mod.parseWorkflow, mod.parse, mod.default?.parseWorkflow, mod.default?.parse, mod.default];
+        return candidates.find((fn) => typeof fn === 'function') || null;
+    } catch (error) {
+        console.error(`⚠️ Parser not loadable in-process, using CLI: ${error.message}`);
+        return null;
+    } finally {
+        process.argv = argv;
+        process.exit = exit;
+    }
+}
+
+const parseInProcess = await loadParser();
+
+function extractJson(stdout) {
+    const lines = stdout.split('\n');
+    const start = lines.findIndex((line) => line.trim().startsWith('{'));
+    if (start < 0) {
+        throw new Error('No JSON found in parser output');
+    }
+    return JSON.parse(lines.slice(start).join('\n'));
+}
+
+async function parse({ command }) {
+    if (!command) {
+        throw new Error('command is required');
+    }
+    const workflow = parseInProcess
+        ? await parseInProcess(command)
+        : extractJson((await execFileAsync('node', [parserPath, command], { cwd: __dirname, maxBuffer: 16 * 1024 * 1024 })).stdout);
+
+    if (workflow && workflow.error) {
+        throw new Error(workflow.error);
+    }
+    return workflow;
+}
+
+const handlers = {
+    ping: async () => ({ pong: true, pid: process.pid, inProcess: Boolean(parseInProcess) }),
+    parse
+};
+
+function reply(message) {
+    process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+async function handle(line) {
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (error) {
+        console.error(`❌ Invalid request line: ${line}`);
+        return;
+    }
+
+    const handler = handlers[request.op];
+    if (!handler) {
+        reply({ id: request.id, ok: false, error: `Unknown op: ${request.op}` });
+        return;
+    }
+
+    try {
+        const result = await handler(request.params || {});
+        reply({ id: request.id, ok: true, result });
+    } catch (error) {
+        reply({ id: request.id, ok: false, error: error.message });
+    }
+}
+
+const rl = readline.createInterface({ input: process.stdin });
+rl.on('line', (line) => {
+    if (line.trim()) {
+        handle(line);
+    }
+});
+rl.on('close', () => process.exit(0));
+
+console.error(`✅ Workflow parser worker ready (pid ${process.pid}, ${parseInProcess ? 'in-process' : 'CLI'} parser)`);
+reply({ id: null, ok: true, result: { ready: true, pid: process.pid } });
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""Pipelined execution of many similar workflows (e.g. KYC-gated payouts to a list).
+
+Instead of one executor run per command, a batch flows through four stages,
+each with its own workers and all running at the same time:
+
+    parse -> prove -> verify -> transfer
+
+Item 40 can be parsing while item 3 is proving and item 1 is transferring.
+Throughput is then set by the slowest stage, not by the sum of each
+workflow's latency. Proofs with the same content key (see proof_cache) are
+generated once per batch, verifications run once per proof, and transfers
+go through the agent service's resident Circle workers under a rate limit.
+
+Each item is an ordinary workflow record (`<batch_id>_<n>`) in the workflow
+store, with `batchId` and `stage` fields, so per-item progress and step
+checkpoints are visible to the usual tools. A failed item can be finished
+with `workflow_executor_realtime.py --resume`. Items with IoTeX device steps
+or other step types the pipeline doesn't handle run through the regular
+executor instead.
+
+    python batch_workflows.py --file payouts.txt          # one command per line
+    python batch_workflows.py "Generate KYC proof then send 0.01 USDC to alice" ...
+    python batch_workflows.py --status <batch_id>
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from http_sessions import sessions
+from proof_cache import proof_cache
+from proof_index import get_proof_index, proof_record
+from rust_socket import rust_socket, verification_failure
+from span_tracer import tracer
+from step_scheduler import build_dependencies, step_kind
+from update_publisher import publisher
+from workflow_executor_realtime import (execute_workflow_with_updates, parse_workflow, send_update,
+                                        transfer_details, ui_steps_for)
+from workflow_store import WorkflowStore, batch_status, get_store
+
+STAGES = ("parse", "prove", "verify", "transfer")
+
+STAGE_WORKERS = {
+    "parse": int(os.getenv("BATCH_PARSE_WORKERS", "8")),
+    "prove": int(os.getenv("BATCH_PROOF_WORKERS", "4")),
+    "verify": int(os.getenv("BATCH_VERIFY_WORKERS", "4")),
+    "transfer": int(os.getenv("BATCH_TRANSFER_WORKERS", "2")),
+}
+
+# Transfers per second across the whole batch; Circle rate-limits the wallet, not us
+TRANSFER_RATE = float(os.getenv("BATCH_TRANSFER_RATE", "2"))
+TRANSFER_URL = os.getenv("BATCH_TRANSFER_URL", "http://localhost:8002/execute_direct_transfer")
+
+# Items the pipeline can't split into stages run through the regular executor, this many at once
+DIRECT_WORKERS = int(os.getenv("BATCH_DIRECT_WORKERS", "2"))
+
+
+def batch_item_id(batch_id: str, n: int) -> str:
+    return f"{batch_id}_{n:04d}"
+
+
+def new_batch_id() -> str:
+    return f"batch_{uuid.uuid4().hex[:12]}"
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+            self._next = max(now, self._next) + self.interval
+
+
+class BatchItem:
+    __slots__ = ("id", "index", "command", "steps", "proofs", "transfer_ids")
+
+    def __init__(self, item_id: str, index: int, command: str):
+        self.id = item_id
+        self.index = index
+        self.command = command
+        self.steps: List[Dict[str, Any]] = []
+        self.proofs: Dict[int, str] = {}
+        self.transfer_ids: List[str] = []
+
+    def indexes(self, kind: str) -> List[int]:
+        return [i for i, step in enumerate(self.steps) if step_kind(step) == kind]
+
+
+class BatchRunner:
+    """Runs one batch of workflow commands through the staged pipeline"""
+
+    def __init__(self, batch_id: str, commands: List[str], store: Optional[WorkflowStore] = None):
+        self.batch_id = batch_id
+        self.store = store or get_store()
+        self.items = [BatchItem(batch_item_id(batch_id, n), n, command) for n, command in enumerate(commands)]
+        self._proofs: Dict[str, asyncio.Future] = {}
+        self._verifications: Dict[str, asyncio.Future] = {}
+        self._verified = set()
+        self._limiter = RateLimiter(TRANSFER_RATE)
+        self._direct = asyncio.Semaphore(DIRECT_WORKERS)
+        self._direct_tasks: List[asyncio.Task] = []
+        self.stage_stats = {stage: {"done": 0, "failed": 0, "busy_s": 0.0} for stage in STAGES}
+        self.proofs_generated = 0
+        self.proofs_shared = 0
+        self.verifications_shared = 0
+
+    async def run(self) -> Dict[str, Any]:
+        created = datetime.now(timezone.utc).isoformat()
+        self.store.put_many({
+            "id": item.id,
+            "batchId": self.batch_id,
+            "description": item.command,
+            "status": "queued",
+            "stage": "queued",
+            "createdAt": created,
+            "checkpointed": True,
+            "completedSteps": [],
+            "results": {}
+        } for item in self.items)
+
+        started = time.monotonic()
+        with tracer.span("batch", batch_id=self.batch_id, items=len(self.items)):
+            queues = [asyncio.Queue() for _ in STAGES]
+            stages = [asyncio.create_task(self._stage(n, queues)) for n in range(len(STAGES))]
+            for item in self.items:
+                queues[0].put_nowait(item)
+            queues[0].put_nowait(None)
+            await asyncio.gather(*stages)
+            await asyncio.gather(*self._direct_tasks)
+
+        summary = self.summary()
+        summary["elapsed_s"] = round(time.monotonic() - started, 3)
+        return summary
+
+    async def _stage(self, n: int, queues: List[asyncio.Queue]):
+        stage = STAGES[n]
+        handler = getattr(self, f"_{stage}")
+        inbox = queues[n]
+        outbox = queues[n + 1] if n + 1 < len(queues) else None
+
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is None:
+                    inbox.put_nowait(None)  # let sibling workers see the end too
+                    return
+                began = time.monotonic()
+                try:
+                    with tracer.span(f"batch.{stage}", workflow_id=item.id):
+                        forward = await handler(item)
+                except Exception as e:
+                    self.stage_stats[stage]["failed"] += 1
+                    await self._fail(item, stage, e)
+                    continue
+                finally:
+                    self.stage_stats[stage]["busy_s"] += time.monotonic() - began
+                self.stage_stats[stage]["done"] += 1
+                if forward is False:
+                    continue
+                if outbox is not None:
+                    outbox.put_nowait(item)
+                else:
+                    await self._complete(item)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, STAGE_WORKERS[stage]))))
+        if outbox is not None:
+            outbox.put_nowait(None)
+
+    def _progress(self, item: BatchItem, stage: str, **fields: Any):
+        self.store.update(item.id, stage=stage, **fields)
+        print(f"[{self.batch_id}] {item.index:4d} {stage:<9} {fields.get('status', '')}".rstrip())
+
+    async def _step_update(self, item: BatchItem, i: int, **updates: Any):
+        await send_update({
+            "type": "workflow_step_update",
+            "workflowId": item.id,
+            "stepId": f"step_{i+1}",
+            "updates": updates
+        })
+
+    async def _parse(self, item: BatchItem):
+        workflow = await parse_workflow(item.command)
+        if workflow is None:
+            raise Exception("Failed to parse workflow")
+        item.steps = workflow.get('steps', [])
+        self._progress(item, "parse", status="running", steps=item.steps)
+
+        if any(step_kind(step) in ('device', 'other') for step in item.steps):
+            self._direct_tasks.append(asyncio.create_task(self._run_direct(item)))
+            return False
+
+        await send_update({
+            "type": "workflow_started",
+            "workflowId": item.id,
+            "steps": ui_steps_for(item.steps)
+        })
+
+    async def _run_direct(self, item: BatchItem):
+        async with self._direct:
+            self._progress(item, "direct")
+            try:
+                await execute_workflow_with_updates(item.command, item.id, resume=True)
+            except Exception as e:
+                await self._fail(item, "direct", e)
+                return
+            self.store.update(item.id, stage="completed")
+
+    async def _prove(self, item: BatchItem):
+        indexes = item.indexes('proof')
+        if indexes:
+            self._progress(item, "prove")
+            await asyncio.gather(*(self._prove_step(item, i) for i in indexes))
+
+    async def _prove_step(self, item: BatchItem, i: int):
+        step = item.steps[i]
+        proof_type = step.get('proofType', 'kyc')
+        function = f"prove_{proof_type}"
+        arguments = ["12345", "1"]
+        await self._step_update(item, i, status="executing", startTime=int(time.time() * 1000))
+
+        key = None
+        if not proof_cache.wants_fresh(step, fresh=step.get('fresh_proof', False)):
+            key = proof_cache.key_for(function, arguments, 50)
+        if key is None:
+            proof_id, cached = await self._generate(None, function, arguments, proof_type, item, i)
+        else:
+            # Every item needing the same proof waits on one generation
+            shared = self._proofs.get(key)
+            if shared is None:
+                shared = asyncio.ensure_future(self._generate(key, function, arguments, proof_type, item, i))
+                shared.add_done_callback(lambda t: t.cancelled() or t.exception())
+                self._proofs[key] = shared
+            else:
+                self.proofs_shared += 1
+            proof_id, cached = await asyncio.shield(shared)
+
+        item.proofs[i] = proof_id
+        self.store.checkpoint_step(item.id, i, {"success": True, "proofId": proof_id,
+                                                "proofType": proof_type, "cached": cached})
+        await self._step_update(item, i, status="completed", endTime=int(time.time() * 1000),
+                                proofId=proof_id, cached=cached)
+
+    async def _generate(self, key: Optional[str], function: str, arguments: List[str], proof_type: str,
+                        item: BatchItem, i: int):
+        try:
+            cached = proof_cache.lookup(key)
+            if cached:
+                self._verified.add(cached["proof_id"])
+                return cached["proof_id"], True
+
+            proof_id = f"proof_{proof_type}_{int(time.time() * 1000)}_{item.index}_{i}"
+            proof_request = {
+                "type": "generate_proof",
+                "metadata": {
+                    "function": function,
+                    "arguments": arguments,
+                    "step_size": 50,
+                    "explanation": f"Generating {proof_type} proof",
+                    "additional_context": {
+                        "workflow_id": item.id,
+                        "batch_id": self.batch_id,
+                        "step_index": i,
+                        "priority": "batch"
+                    }
+                },
+                "proof_id": proof_id
+            }
+            data = await rust_socket.request(proof_request, "proof", proof_id)
+            if data.get('type') == 'proof_error':
+                raise Exception(f"Proof generation failed: {data.get('error')}")
+            proof_cache.store(key, proof_id, function, data.get('metrics'))
+            get_proof_index().record(proof_record(proof_id, proof_request["metadata"], data.get('metrics')))
+            self.proofs_generated += 1
+            return proof_id, False
+        except Exception:
+            # Later items retry instead of inheriting this failure
+            self._proofs.pop(key, None)
+            raise
+
+    async def _verify(self, item: BatchItem):
+        indexes = item.indexes('verification')
+        if not indexes:
+            return
+        self._progress(item, "verify")
+        deps = build_dependencies(item.steps)
+
+        async def verify_step(i: int):
+            # The proof this step depends on, else the latest one generated
+            proof_ids = [item.proofs[d] for d in sorted(deps[i]) if d in item.proofs]
+            if not proof_ids and item.proofs:
+                proof_ids = [list(item.proofs.values())[-1]]
+            if not proof_ids:
+                # Nothing was verified, so the transfer stage must not treat this item as verified
+                raise Exception(f"No proof to verify for step {i + 1}")
+            await self._step_update(item, i, status="executing", startTime=int(time.time() * 1000))
+            await self._verify_proof(proof_ids[-1], item, i)
+            self.store.checkpoint_step(item.id, i, {"success": True, "proofId": proof_ids[-1], "verified": True})
+            await self._step_update(item, i, status="completed", endTime=int(time.time() * 1000))
+
+        await asyncio.gather(*(verify_step(i) for i in indexes))
+
+    async def _verify_proof(self, proof_id: str, item: BatchItem, i: int):
+        # Reused proofs were verified when first cached; shared ones are verified once per batch
+        if proof_id in self._verified:
+            return
+        shared = self._verifications.get(proof_id)
+        if shared is None:
+            shared = asyncio.ensure_future(self._verify_once(proof_id, item, i))
+            shared.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._verifications[proof_id] = shared
+        else:
+            self.verifications_shared += 1
+        await asyncio.shield(shared)
+
+    async def _verify_once(self, proof_id: str, item: BatchItem, i: int):
+        verify_request = {
+            "type": "verify_proof",
+            "proof_id": proof_id,
+            "metadata": {
+                "function": "verify_proof",
+                "arguments": [proof_id],
+                "step_size": 50,
+                "explanation": f"Verifying proof {proof_id}",
+                "additional_context": {
+                    "workflow_id": item.id,
+                    "batch_id": self.batch_id,
+                    "step_index": i
+                }
+            }
+        }
+        data = await rust_socket.request(verify_request, "verification", proof_id)
+        failure = verification_failure(data)
+        if failure is not None:
+            proof_cache.mark_verified(proof_id, valid=False)
+            get_proof_index().mark_verified(proof_id, valid=False)
+            raise Exception(f"Proof verification failed: {failure}")
+        proof_cache.mark_verified(proof_id)
+        get_proof_index().mark_verified(proof_id)
+        self._verified.add(proof_id)
+
+    async def _transfer(self, item: BatchItem):
+        indexes = item.indexes('transfer')
+        if not indexes:
+            return
+        self._progress(item, "transfer")
+        amount, recipient, blockchain = transfer_details(item.command)
+
+        for i in indexes:
+            await self._step_update(item, i, status="executing", startTime=int(time.time() * 1000))
+            await self._limiter.wait()
+
+            # Same guard as the executor: a started transfer is never blindly re-sent on resume
+            self.store.checkpoint_step(item.id, i, {"transferStarted": int(time.time() * 1000)}, completed=False)
+            headers = tracer.inject({'Content-Type': 'application/json',
+                                     'Idempotency-Key': f"batch:{item.id}:step_{i}"})
+            details = {"amount": amount, "recipient": recipient, "blockchain": blockchain, "workflow_id": item.id}
+            async with sessions.get().post(TRANSFER_URL, json={"transfer_details": details}, headers=headers) as resp:
+                if resp.status != 200:
+                    raise Exception(f"Transfer failed with status {resp.status}: {await resp.text()}")
+                transfer = await resp.json()
+
+            transfer_id = transfer.get('transferId') or transfer.get('id')
+            if not transfer_id:
+                # Nothing to check in Circle; leave transferStarted so a resume doesn't blindly re-send
+                raise Exception(f"Transfer returned no transfer ID: {transfer}")
+            item.transfer_ids.append(transfer_id)
+            self.store.checkpoint_step(item.id, i, {"success": True, "transferId": transfer_id, "amount": amount,
+                                                    "recipient": recipient, "blockchain": blockchain})
+            await self._step_update(item, i, status="completed", endTime=int(time.time() * 1000), transferData={
+                "id": transfer_id,
+                "amount": amount,
+                "destinationAddress": transfer.get('recipient'),
+                "blockchain": blockchain,
+                "status": "pending"
+            })
+
+    async def _complete(self, item: BatchItem):
+        proof_summary = {item.steps[i].get('proofType', 'kyc'): {"status": "generated", "proofId": proof_id}
+                         for i, proof_id in item.proofs.items()}
+        self._progress(item, "completed", status="completed", completedAt=datetime.now(timezone.utc).isoformat(),
+                       transferIds=item.transfer_ids, proofSummary=proof_summary)
+        await send_update({"type": "workflow_completed", "workflowId": item.id})
+
+    async def _fail(self, item: BatchItem, stage: str, error: Exception):
+        self._progress(item, stage, status="failed", error=str(error))
+        # workflowId is the publisher's ordering key: this must follow the item's earlier step updates
+        await send_update({"type": "workflow_failed", "workflowId": item.id, "error": str(error)})
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "batch_id": self.batch_id,
+            "items": len(self.items),
+            "stages": {stage: {**stats, "busy_s": round(stats["busy_s"], 3)}
+                       for stage, stats in self.stage_stats.items()},
+            "proofs_generated": self.proofs_generated,
+            "proofs_shared": self.proofs_shared,
+            "verifications_shared": self.verifications_shared,
+            "status": batch_status(self.batch_id, self.store)["counts"],
+        }
+
+
+if __name__ == "__main__":
+    tracer.service = "batch_workflows"
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    if args[0] == "--status":
+        print(json.dumps(batch_status(args[1]), indent=2))
+        sys.exit(0)
+
+    batch_id = new_batch_id()
+    if "--batch-id" in args:
+        n = args.index("--batch-id")
+        batch_id = args[n + 1]
+        del args[n:n + 2]
+    if args and args[0] == "--file":
+        with open(args[1]) as f:
+            commands = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        commands = args
+
+    async def main():
+        try:
+            return await BatchRunner(batch_id, commands).run()
+        finally:
+            await rust_socket.close()
+            await publisher.close()
+            await sessions.close()
+
+    print(f"🚀 Batch {batch_id}: {len(commands)} workflows")
+    print(json.dumps(asyncio.run(main()), indent=2))
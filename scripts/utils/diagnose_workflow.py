@@ -2,32 +2,27 @@ import json
 import subprocess
 import os
 
+from workflow_store import get_store
+
 print("=== Workflow Diagnostics ===\n")
 
 # 1. Check workflow history
-if os.path.exists("workflow_history.json"):
-    with open("workflow_history.json", 'r') as f:
-        history = json.load(f)
-    
-    # Count workflows by status
-    status_count = {}
-    for wf_id, wf_data in history.items():
-        status = wf_data.get('status', 'unknown')
-        status_count[status] = status_count.get(status, 0) + 1
-    
+store = get_store()
+store.import_json("workflow_history.json", only_if_changed=True)
+status_count = store.count_by_status()
+if status_count:
     print(f"Workflow Status Summary:")
     for status, count in status_count.items():
         print(f"  {status}: {count}")
     
     # Find latest created workflow
-    created_workflows = [(k, v) for k, v in history.items() if v.get('status') == 'created']
+    created_workflows = store.list(status='created', limit=1)
     if created_workflows:
-        created_workflows.sort(key=lambda x: x[1].get('createdAt', ''), reverse=True)
         latest = created_workflows[0]
         print(f"\nLatest stuck workflow:")
-        print(f"  ID: {latest[0]}")
-        print(f"  Description: {latest[1].get('description')}")
-        print(f"  Steps: {json.dumps(latest[1].get('steps', []), indent=2)}")
+        print(f"  ID: {latest['id']}")
+        print(f"  Description: {latest.get('description')}")
+        print(f"  Steps: {json.dumps(latest.get('steps', []), indent=2)}")
 
 # 2. Test workflow parser
 print("\n=== Testing Workflow Parser ===")
@@ -65,6 +60,28 @@ for cmd in test_commands:
     else:
         print(f"  ✗ Parser failed with code {result.returncode}")
 
+print("\n=== Testing Parser Service ===")
+import urllib.request
+for cmd in test_commands:
+    request = urllib.request.Request(
+        "http://localhost:8002/workflow/parse",
+        data=json.dumps({"command": cmd}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=30) as resp:
+            parsed = json.loads(resp.read())
+        print(f"  ✓ {cmd}: {len(parsed.get('steps', []))} steps")
+    except Exception as e:
+        print(f"  ✗ {cmd}: {e}")
+
+try:
+    with urllib.request.urlopen("http://localhost:8002/workflow/parse/stats", timeout=5) as resp:
+        stats = json.loads(resp.read())
+    print(f"  Parse cache: {stats['hits']} hits / {stats['misses']} misses, {stats['cached']} cached")
+except Exception as e:
+    print(f"  ✗ Parser service stats unavailable: {e}")
+
 print("\n=== Checking File Permissions ===")
 files_to_check = [
     "circle/workflowCLI_generic.js",
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Wait for changes to a set of files: inotify on Linux, mtime polling elsewhere.
+
+Directories rather than files are watched, so files that are atomically
+replaced (write to a temp file, then rename) or don't exist yet are still
+seen. A watched path that is itself a directory is reported when anything
+inside it changes.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT = struct.Struct("iIII")
+
+
+class FileWatcher:
+    def __init__(self, paths: Iterable[Path]):
+        self.paths = {Path(p).expanduser().resolve() for p in paths}
+        self._fd: Optional[int] = None
+        self._dirs: Dict[int, Path] = {}
+        self._watched_dirs: Set[int] = set()
+        self._signatures = {p: self._signature(p) for p in self.paths}
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd >= 0:
+                for directory in {p.parent for p in self.paths if not p.is_dir()}:
+                    wd = libc.inotify_add_watch(fd, str(directory).encode(), _MASK)
+                    if wd >= 0:
+                        self._dirs[wd] = directory
+                for directory in {p for p in self.paths if p.is_dir()}:
+                    wd = libc.inotify_add_watch(fd, str(directory).encode(), _MASK)
+                    if wd >= 0:
+                        self._dirs[wd] = directory
+                        self._watched_dirs.add(wd)
+                self._fd = fd
+        except (OSError, AttributeError):
+            self._fd = None
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    @staticmethod
+    def _signature(path: Path) -> Optional[Tuple[int, int, int]]:
+        try:
+            if path.is_dir():
+                mtimes = [entry.stat().st_mtime_ns for entry in os.scandir(path)]
+                return len(mtimes), sum(mtimes), max(mtimes, default=0)
+            st = path.stat()
+        except OSError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def wait(self, timeout: float) -> Set[Path]:
+        """Watched paths that changed, waiting at most `timeout` seconds for the first change"""
+        if self._fd is None:
+            deadline = time.monotonic() + timeout
+            while True:
+                changed = self._poll()
+                if changed or time.monotonic() >= deadline:
+                    return changed
+                time.sleep(min(0.25, max(0.0, deadline - time.monotonic())))
+
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        changed: Set[Path] = set()
+        while ready:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, _, _, length = _EVENT.unpack_from(buffer, offset)
+                name = buffer[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0").decode()
+                offset += _EVENT.size + length
+                if wd in self._watched_dirs:
+                    changed.add(self._dirs[wd])
+                    continue
+                path = self._dirs.get(wd, Path("/")) / name
+                if path in self.paths:
+                    changed.add(path)
+        return changed
+
+    def _poll(self) -> Set[Path]:
+        changed = set()
+        for path in self.paths:
+            signature = self._signature(path)
+            if signature != self._signatures[path]:
+                self._signatures[path] = signature
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Shared aiohttp sessions for the workflow executor.
+
+A single keep-alive ClientSession per name replaces the per-call
+`aiohttp.ClientSession()` pattern, so workflow updates and device calls to
+the Rust server reuse pooled connections. Call `sessions.start()` /
+`sessions.close()` from the owning app's startup and shutdown hooks; sessions
+are also created lazily on first use.
+"""
+
+from typing import Any, Dict
+
+import aiohttp
+
+
+class SessionRegistry:
+    """Named, pooled aiohttp sessions with per-host connection limits"""
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 20,
+                 keepalive_timeout: float = 30.0, timeout: float = 30.0):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+
+    def get(self, name: str = "default") -> aiohttp.ClientSession:
+        session = self._sessions.get(name)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Content-Type': 'application/json'},
+            )
+            self._sessions[name] = session
+        return session
+
+    async def start(self):
+        self.get()
+
+    async def close(self):
+        for session in self._sessions.values():
+            if not session.closed:
+                await session.close()
+        self._sessions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {"closed": session.closed, "limit_per_host": self.limit_per_host}
+            for name, session in self._sessions.items()
+        }
+
+
+sessions = SessionRegistry()
@@ -1,44 +1,45 @@
 import subprocess
-import json
 import os
+import sys
 
-# Get the latest workflow from history
-history_path = "workflow_history.json"
-if os.path.exists(history_path):
-    with open(history_path, 'r') as f:
-        history = json.load(f)
-    
-    # Get workflows sorted by creation time
-    workflows = [(k, v) for k, v in history.items()]
-    workflows.sort(key=lambda x: x[1].get('createdAt', ''), reverse=True)
+from proof_index import timestamp_of
+from workflow_store import HISTORY_PATH, get_store
+
+# Get the latest workflow from the store (refreshed from the JSON history if it changed)
+store = get_store()
+store.import_json(HISTORY_PATH, only_if_changed=True)
+
+# Newest "created" or interrupted "running" workflow, straight from the (status, createdAt) index
+stuck = store.list(status='created', limit=1) + store.list(status='running', limit=1)
+stuck.sort(key=lambda wf: timestamp_of(wf.get('createdAt')), reverse=True)  # UTC or older local-time strings
+if stuck:
+    wf_data = stuck[0]
+    wf_id = wf_data['id']
+    print(f"Found stuck workflow: {wf_id}")
+    print(f"Description: {wf_data.get('description')}")
     
-    # Find first "created" workflow
-    for wf_id, wf_data in workflows:
-        if wf_data.get('status') == 'created':
-            print(f"Found stuck workflow: {wf_id}")
-            print(f"Description: {wf_data.get('description')}")
-            
-            # Execute it manually
-            command = wf_data.get('description', 'Test workflow')
-            cli_command = f"node circle/workflowCLI_generic.js '{command}'"
-            
-            print(f"\nExecuting: {cli_command}")
-            
-            result = subprocess.run(
-                cli_command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                cwd=os.path.expanduser("~/agentkit")
-            )
-            
-            print(f"\nReturn code: {result.returncode}")
-            print(f"Output:\n{result.stdout}")
-            if result.stderr:
-                print(f"Stderr:\n{result.stderr}")
-            
-            break
+    command = wf_data.get('description', 'Test workflow')
+    if wf_data.get('completedSteps') or wf_data.get('results'):
+        # Partially executed: resume from its checkpoints instead of regenerating every proof
+        print(f"Resuming from {len(wf_data.get('completedSteps', []))}/{len(wf_data.get('steps', []))} completed steps")
+        cli_command = f"{sys.executable} scripts/utils/workflow_executor_realtime.py --resume {wf_id}"
     else:
-        print("No stuck workflows found")
+        # Execute it manually
+        cli_command = f"node circle/workflowCLI_generic.js '{command}'"
+    
+    print(f"\nExecuting: {cli_command}")
+    
+    result = subprocess.run(
+        cli_command,
+        shell=True,
+        capture_output=True,
+        text=True,
+        cwd=os.path.expanduser("~/agentkit")
+    )
+    
+    print(f"\nReturn code: {result.returncode}")
+    print(f"Output:\n{result.stdout}")
+    if result.stderr:
+        print(f"Stderr:\n{result.stderr}")
 else:
-    print("workflow_history.json not found")
+    print("No stuck workflows found")
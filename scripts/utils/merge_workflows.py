@@ -1,27 +1,17 @@
-import json
-import os
+from workflow_store import get_store
 
 root_path = "/home/hshadab/agentkit/workflow_history.json"
 circle_path = "/home/hshadab/agentkit/circle/workflow_history.json"
 
-# Read both files
-with open(root_path, 'r') as f:
-    root_workflows = json.load(f)
+# Import both copies into the workflow store (circle workflows override root if duplicate)
+store = get_store()
+imported = store.import_json(root_path, circle_path)
 
-circle_workflows = {}
-if os.path.exists(circle_path):
-    with open(circle_path, 'r') as f:
-        circle_workflows = json.load(f)
+# Write the merged view back to the root location for tools still reading JSON
+total = store.export_json(root_path)
 
-# Merge (circle workflows override root if duplicate)
-merged = {**root_workflows, **circle_workflows}
-
-# Save to root location
-with open(root_path, 'w') as f:
-    json.dump(merged, f, indent=2)
-
-print(f"Merged {len(circle_workflows)} workflows from circle/ into root")
-print(f"Total workflows: {len(merged)}")
+print(f"Imported {imported} workflow records from root and circle/ into {store.path}")
+print(f"Total workflows: {total}")
 
 # Optionally remove the circle workflow file to avoid confusion
 # os.remove(circle_path)
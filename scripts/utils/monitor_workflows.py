@@ -1,47 +1,232 @@
+"""Mark workflows completed once transfer evidence for them appears.
+
+A workflow that has been unfinished for more than two minutes is completed
+as soon as a transfer recorded for it shows up in the transfer ledger or
+transfer_history.json, or a transferId shows up in its own step results.
+Failed workflows are never completed. Neither is a run the Python executors
+drive (marked `checkpointed`) until `completedSteps` covers every step: a
+transfer from step 2 says nothing about whether step 3 ran. JS-driven
+workflows never fill in completedSteps, so for them transfer evidence alone
+still decides.
+
+`WorkflowMonitor` builds its workflowId -> transfers index and its set of
+unfinished workflows once. After that it only applies what changed: new
+transfer IDs when the transfer file changes, and store rows written since
+its last pass (via the indexed updated_at column). The daemon wakes on
+inotify events for the transfer ledger, the transfer file, the workflow
+store and the legacy history file, so evidence is acted on within about a
+second.
+
+    python monitor_workflows.py            # one pass (what cron used to run)
+    python monitor_workflows.py --daemon   # stay resident and react to changes
+"""
+
 import json
 import os
+import sys
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set
+
+from file_watcher import FileWatcher
+from proof_index import timestamp_of
+from transfer_ledger import TransferLedger, get_transfer_ledger
+from workflow_store import HISTORY_PATH, WorkflowStore, get_store
+
+TRANSFER_PATH = Path(os.path.expanduser("~/agentkit/transfer_history.json"))
+
+# Workflows younger than this are still being driven by their executor
+GRACE = timedelta(minutes=2)
+
+
+def _transfer_records(data: Any) -> Iterable[Dict[str, Any]]:
+    if isinstance(data, dict):
+        return ({"id": transfer_id, **t} for transfer_id, t in data.items() if isinstance(t, dict))
+    return (t for t in data if isinstance(t, dict)) if isinstance(data, list) else ()
+
+
+def _has_transfer_result(workflow: Dict[str, Any]) -> bool:
+    if workflow.get("transferIds"):
+        return True
+    return any(isinstance(r, dict) and r.get("transferId") for r in workflow.get("results", {}).values())
+
+
+def _steps_done(workflow: Dict[str, Any]) -> bool:
+    """True unless a checkpointed run still has steps outside completedSteps"""
+    if not workflow.get("checkpointed"):
+        return True
+    steps = workflow.get("steps") or []
+    return set(range(len(steps))) <= set(workflow.get("completedSteps") or [])
+
+
+def _completable(workflow: Dict[str, Any]) -> bool:
+    return workflow.get("status") not in ("completed", "failed") and _steps_done(workflow)
+
+
+class WorkflowMonitor:
+    """Incremental workflowId -> transfers index plus the set of unfinished workflows"""
+
+    def __init__(self, store: WorkflowStore = None, transfer_path: Path = TRANSFER_PATH,
+                 history_path: Path = HISTORY_PATH, ledger: TransferLedger = None):
+        self.store = store or get_store()
+        self.ledger = ledger or get_transfer_ledger()
+        self.transfer_path = Path(transfer_path).expanduser().resolve()
+        self.history_path = Path(history_path).expanduser().resolve()
+        self.transfers_by_workflow: Dict[str, List[str]] = {}
+        self._seen_transfers: Set[str] = set()
+        self._transfer_signature = None
+        self._unfinished: Dict[str, Dict[str, Any]] = {}
+        self._cursor = ""
+        self._seen_at_cursor: Set[str] = set()
+        self.completed = 0
+
+    # --- transfers ---
+
+    def _load_transfers(self) -> Set[str]:
+        """Index transfers not seen before; returns the workflow IDs that gained one"""
+        try:
+            st = self.transfer_path.stat()
+        except OSError:
+            return set()
+        signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if signature == self._transfer_signature:
+            return set()
+        try:
+            with open(self.transfer_path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return set()  # caught mid-write; the next change event retries
+        self._transfer_signature = signature
+
+        touched = set()
+        for transfer in _transfer_records(data):
+            transfer_id = transfer.get("transferId") or transfer.get("id")
+            if not transfer_id or transfer_id in self._seen_transfers:
+                continue
+            self._seen_transfers.add(transfer_id)
+            workflow_id = transfer.get("workflowId")
+            if workflow_id:
+                self.transfers_by_workflow.setdefault(workflow_id, []).append(transfer_id)
+                touched.add(workflow_id)
+        return touched
+
+    # --- workflows ---
+
+    def _track(self, workflow: Dict[str, Any]) -> bool:
+        workflow_id = workflow["id"]
+        if not _completable(workflow):
+            self._unfinished.pop(workflow_id, None)
+            return False
+        self._unfinished[workflow_id] = {
+            "createdAt": workflow.get("createdAt", ""),
+            "hasResult": _has_transfer_result(workflow),
+        }
+        return True
+
+    def _load_all_unfinished(self):
+        self._unfinished.clear()
+        for workflow in self.store.list(exclude_status="completed"):
+            self._track(workflow)
+
+    def _load_changed(self) -> Set[str]:
+        touched = set()
+        rows = self.store.changed_since(self._cursor)
+        for workflow in rows:
+            marker = f"{workflow['id']}@{workflow['_updated_at']}"
+            if workflow["_updated_at"] == self._cursor and marker in self._seen_at_cursor:
+                continue
+            if self._track(workflow):
+                touched.add(workflow["id"])
+        if rows:
+            last = rows[-1]["_updated_at"]
+            if last != self._cursor:
+                self._cursor, self._seen_at_cursor = last, set()
+            self._seen_at_cursor.update(f"{w['id']}@{w['_updated_at']}" for w in rows if w["_updated_at"] == last)
+        return touched
+
+    def _import_history(self) -> bool:
+        """Pick up workflows other tools appended to the JSON file; True if anything was imported"""
+        return self.store.import_json(self.history_path, only_if_changed=True) > 0
+
+    # --- decisions ---
+
+    def _evaluate(self, workflow_ids: Iterable[str]) -> int:
+        # createdAt is UTC now, naive local time in older records; compare as epoch seconds
+        cutoff = time.time() - GRACE.total_seconds()
+        completed = 0
+        for workflow_id in list(workflow_ids):
+            state = self._unfinished.get(workflow_id)
+            if state is None or timestamp_of(state["createdAt"]) >= cutoff:
+                continue
+            if self._has_transfer(workflow_id) or state["hasResult"]:
+                # Our copy may predate a failure or a new step; decide on the current record
+                current = self.store.get(workflow_id)
+                if current is None or not _completable(current):
+                    self._unfinished.pop(workflow_id, None)
+                    continue
+                self.store.update(workflow_id, status="completed", completedAt=datetime.now(timezone.utc).isoformat())
+                self._unfinished.pop(workflow_id, None)
+                completed += 1
+                print(f"Marked workflow {workflow_id} as completed")
+        self.completed += completed
+        return completed
+
+    def _has_transfer(self, workflow_id: str) -> bool:
+        return workflow_id in self.transfers_by_workflow or self.ledger.has_workflow(workflow_id)
+
+    def _pending(self) -> List[str]:
+        """Unfinished workflows that already have evidence and are waiting out the grace period"""
+        return [workflow_id for workflow_id, state in self._unfinished.items()
+                if state["hasResult"] or self._has_transfer(workflow_id)]
+
+    def _sync_history(self):
+        # Keep the legacy JSON file in sync for readers that haven't moved to the store
+        self.store.import_json(self.history_path, only_if_changed=True)
+        self.store.export_json(self.history_path)
+
+    def run_once(self) -> int:
+        """Full build of both indexes, then one decision pass"""
+        self._import_history()
+        self._load_transfers()
+        self._load_all_unfinished()
+        self._load_changed()  # only to position the cursor
+        completed = self._evaluate(list(self._unfinished))
+        if completed:
+            self._sync_history()
+        return completed
+
+    def run_forever(self, tick: float = 1.0):
+        self.run_once()
+        db = self.store.path
+        watcher = FileWatcher([self.transfer_path, self.history_path, self.ledger.path,
+                               db, db.with_name(db.name + "-wal")])
+        print(f"👀 Monitoring workflows ({'inotify' if watcher.uses_inotify else 'polling'}), "
+              f"{len(self._unfinished)} unfinished")
+        try:
+            while True:
+                changed = watcher.wait(tick)
+                touched = set()
+                if self.history_path in changed and self._import_history():
+                    self._load_all_unfinished()
+                    touched.update(self._unfinished)
+                if self.transfer_path in changed:
+                    touched |= self._load_transfers()
+                touched |= self._load_changed()
+                # Covers new ledger transfers too; workflows whose evidence arrived early become
+                # eligible once they age past GRACE
+                touched.update(self._pending())
+                if self._evaluate(touched):
+                    self._sync_history()
+        finally:
+            watcher.close()
+
 
 def check_and_update_workflows():
-    history_path = os.path.expanduser("~/agentkit/workflow_history.json")
-    transfer_path = os.path.expanduser("~/agentkit/transfer_history.json")
-    
-    if not os.path.exists(history_path):
-        return
-    
-    with open(history_path, 'r') as f:
-        workflows = json.load(f)
-    
-    transfers = {}
-    if os.path.exists(transfer_path):
-        with open(transfer_path, 'r') as f:
-            transfers = json.load(f)
-    
-    updated = False
-    
-    for wf_id, wf_data in workflows.items():
-        if wf_data.get("status") != "completed":
-            # Check if workflow has been running for more than 2 minutes
-            created_at = datetime.fromisoformat(wf_data.get("createdAt", datetime.now().isoformat()))
-            if datetime.now() - created_at > timedelta(minutes=2):
-                # Check if any transfers were completed
-                has_transfer = False
-                for transfer_id, transfer_data in transfers.items():
-                    if transfer_data.get("workflowId") == wf_id:
-                        has_transfer = True
-                        break
-                
-                if has_transfer or wf_data.get("results", {}).get("step_1", {}).get("transferId"):
-                    # Mark as completed
-                    workflows[wf_id]["status"] = "completed"
-                    workflows[wf_id]["completedAt"] = datetime.now().isoformat()
-                    updated = True
-                    print(f"Marked workflow {wf_id} as completed")
-    
-    if updated:
-        with open(history_path, 'w') as f:
-            json.dump(workflows, f, indent=2)
+    return WorkflowMonitor().run_once()
 
 if __name__ == "__main__":
-    check_and_update_workflows()
+    if "--daemon" in sys.argv:
+        WorkflowMonitor().run_forever()
+    else:
+        check_and_update_workflows()
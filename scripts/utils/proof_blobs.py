@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""Chunked, compressed, content-addressed storage for proof.bin artifacts.
+
+A proof is split into fixed-size chunks. Each chunk is compressed (zstd
+when the `zstandard` package is installed, zlib otherwise) and stored once
+under the sha256 of its uncompressed bytes. Proofs of the same circuit
+serialize to the same layout, so their identical regions line up on chunk
+boundaries and are stored only once. `proofs/<id>/proof.manifest.json`
+lists the chunks and replaces `proof.bin`.
+
+Readers never see the difference: `open_proof` returns a seekable file
+object that decompresses one chunk at a time, and `materialize` streams a
+proof back to a file for zkEngine's verifier.
+
+    python proof_blobs.py migrate [--keep]     # move proofs/*/proof.bin (older than 5 min) into the store
+    python proof_blobs.py report               # logical vs stored bytes
+    python proof_blobs.py cat <proof_id> > proof.bin
+    python proof_blobs.py gc                   # drop chunks no manifest references (older than 1 h)
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # zlib still gets most of the win; zstd is faster at the same ratio
+    zstandard = None
+
+PROOFS_DIR = Path(os.path.expanduser(os.getenv("PROOFS_DIR", "~/agentkit/proofs")))
+BLOB_DIR = Path(os.path.expanduser(os.getenv("PROOF_BLOB_DIR", "~/agentkit/data/proof_blobs")))
+CHUNK_SIZE = int(os.getenv("PROOF_CHUNK_SIZE", str(256 * 1024)))
+ZSTD_LEVEL = int(os.getenv("PROOF_ZSTD_LEVEL", "3"))
+
+MANIFEST = "proof.manifest.json"
+
+
+class _Codec:
+    def __init__(self, name: str):
+        self.name = name
+        if name == "zstd":
+            if zstandard is None:
+                raise RuntimeError("Proof was stored with zstd; install the zstandard package to read it")
+            self.compress = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress
+            self.decompress = zstandard.ZstdDecompressor().decompress
+        else:
+            self.compress = lambda data: zlib.compress(data, 6)
+            self.decompress = zlib.decompress
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "zlib"
+
+
+class ProofReader(io.RawIOBase):
+    """Seekable, read-only view of a stored proof; holds one decompressed chunk at a time"""
+
+    def __init__(self, store: "ProofBlobStore", manifest: Dict[str, Any]):
+        self._store = store
+        self._manifest = manifest
+        self._codec = _Codec(manifest["codec"])
+        self._pos = 0
+        self._chunk_index = -1
+        self._chunk = b""
+
+    @property
+    def size(self) -> int:
+        return self._manifest["size"]
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self.size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def _load(self, index: int) -> bytes:
+        if index != self._chunk_index:
+            digest, _ = self._manifest["chunks"][index]
+            with open(self._store.chunk_path(digest, self._codec.name), "rb") as f:
+                self._chunk = self._codec.decompress(f.read())
+            self._chunk_index = index
+        return self._chunk
+
+    def readinto(self, buffer) -> int:
+        if self._pos >= self.size:
+            return 0
+        chunk_size = self._manifest["chunk_size"]
+        index, start = divmod(self._pos, chunk_size)
+        chunk = self._load(index)
+        n = min(len(buffer), len(chunk) - start)
+        buffer[:n] = chunk[start:start + n]
+        self._pos += n
+        return n
+
+
+class ProofBlobStore:
+    """Content-addressed chunk store plus per-proof manifests"""
+
+    def __init__(self, blob_dir: Path = BLOB_DIR, proofs_dir: Path = PROOFS_DIR, chunk_size: int = CHUNK_SIZE):
+        self.blob_dir = Path(blob_dir)
+        self.proofs_dir = Path(proofs_dir)
+        self.chunk_size = chunk_size
+
+    def chunk_path(self, digest: str, codec: str) -> Path:
+        return self.blob_dir / digest[:2] / f"{digest}.{codec}"
+
+    def proof_dir(self, proof_id: str) -> Path:
+        # IDs arrive from URLs; never let one name a path outside proofs/
+        if not proof_id or proof_id.startswith(".") or "/" in proof_id or "\\" in proof_id:
+            raise FileNotFoundError(f"Invalid proof id: {proof_id!r}")
+        return self.proofs_dir / proof_id
+
+    def manifest_path(self, proof_id: str) -> Path:
+        return self.proof_dir(proof_id) / MANIFEST
+
+    def manifest(self, proof_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.manifest_path(proof_id)) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def has(self, proof_id: str) -> bool:
+        return self.manifest_path(proof_id).exists()
+
+    def put(self, proof_id: str, source: Optional[Path] = None) -> Dict[str, Any]:
+        """Chunk `source` (default proofs/<id>/proof.bin) into the store and write its manifest"""
+        source = Path(source) if source else self.proof_dir(proof_id) / "proof.bin"
+        codec = _Codec(default_codec())
+        whole = hashlib.sha256()
+        chunks, new_bytes = [], 0
+        with open(source, "rb") as f:
+            for data in iter(lambda: f.read(self.chunk_size), b""):
+                whole.update(data)
+                digest = hashlib.sha256(data).hexdigest()
+                path = self.chunk_path(digest, codec.name)
+                try:
+                    # Refresh the mtime so gc's grace period also covers chunks we reuse
+                    os.utime(path)
+                except FileNotFoundError:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+                    tmp.write_bytes(codec.compress(data))
+                    os.replace(tmp, path)
+                    new_bytes += path.stat().st_size
+                chunks.append([digest, len(data)])
+
+        manifest = {
+            "proof_id": proof_id,
+            "size": sum(n for _, n in chunks),
+            "sha256": whole.hexdigest(),
+            "chunk_size": self.chunk_size,
+            "codec": codec.name,
+            "chunks": chunks,
+            "new_bytes": new_bytes,
+        }
+        target = self.manifest_path(proof_id)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, target)
+        return manifest
+
+    def open_proof(self, proof_id: str) -> io.BufferedReader:
+        """proof.bin as a file object: the plain file if present, else decompressed from the store"""
+        plain = self.proof_dir(proof_id) / "proof.bin"
+        if plain.exists():
+            return open(plain, "rb")
+        manifest = self.manifest(proof_id)
+        if manifest is None:
+            raise FileNotFoundError(f"No proof artifact for {proof_id}")
+        return io.BufferedReader(ProofReader(self, manifest), buffer_size=self.chunk_size)
+
+    def stream(self, proof_id: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Bytes [start, end) of a proof, one chunk at a time"""
+        with self.open_proof(proof_id) as f:
+            f.seek(start)
+            remaining = None if end is None else max(0, end - start)
+            while remaining is None or remaining > 0:
+                data = f.read(self.chunk_size if remaining is None else min(self.chunk_size, remaining))
+                if not data:
+                    return
+                if remaining is not None:
+                    remaining -= len(data)
+                yield data
+
+    def verify(self, proof_id: str) -> bool:
+        manifest = self.manifest(proof_id)
+        if manifest is None:
+            return False
+        digest = hashlib.sha256()
+        for data in self.stream(proof_id):
+            digest.update(data)
+        return digest.hexdigest() == manifest["sha256"]
+
+    def materialize(self, proof_id: str, dest: Optional[Path] = None) -> Path:
+        """Write the proof to a file zkEngine can read; a unique temp name by default so callers can delete it"""
+        dest = Path(dest) if dest else self.proof_dir(proof_id) / f".proof.{uuid.uuid4().hex[:8]}.bin"
+        tmp = dest.with_name(dest.name + ".part")
+        with self.open_proof(proof_id) as src, open(tmp, "wb") as out:
+            shutil.copyfileobj(src, out, self.chunk_size)
+        os.replace(tmp, dest)
+        return dest
+
+    def migrate(self, keep: bool = False, min_age: float = 300.0) -> Dict[str, Any]:
+        """Move proofs/<id>/proof.bin files into the store; originals go only after a verified round trip.
+
+        Files modified within `min_age` seconds are skipped, since zkEngine may
+        still be writing them. This makes migrate safe to run from cron.
+        """
+        migrated, failed = 0, []
+        cutoff = time.time() - min_age
+        for proof_bin in sorted(self.proofs_dir.glob("*/proof.bin")):
+            if proof_bin.stat().st_mtime > cutoff:
+                continue
+            proof_id = proof_bin.parent.name
+            self.put(proof_id, proof_bin)
+            if not self.verify(proof_id):
+                self.manifest_path(proof_id).unlink(missing_ok=True)
+                failed.append(proof_id)
+                continue
+            if not keep:
+                proof_bin.unlink()
+            migrated += 1
+        return {"migrated": migrated, "failed": failed, **self.report()}
+
+    def report(self) -> Dict[str, Any]:
+        logical, proofs, referenced = 0, 0, set()
+        for path in self.proofs_dir.glob(f"*/{MANIFEST}"):
+            with open(path) as f:
+                manifest = json.load(f)
+            proofs += 1
+            logical += manifest["size"]
+            referenced.update((digest, manifest["codec"]) for digest, _ in manifest["chunks"])
+        stored = sum(p.stat().st_size for p in self.blob_dir.glob("*/*.*") if not p.name.endswith(".tmp"))
+        return {
+            "proofs": proofs,
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+            "unique_chunks": len(referenced),
+            "bytes_saved": logical - stored,
+            "ratio": round(logical / stored, 2) if stored else 0.0,
+        }
+
+    def gc(self, min_age: float = 3600.0) -> int:
+        """Drop chunks no manifest references, sparing those touched in the last `min_age` seconds:
+        put writes chunks before its manifest, so a young unreferenced chunk may belong to one in flight"""
+        cutoff = time.time() - min_age
+        referenced = set()
+        for path in self.proofs_dir.glob(f"*/{MANIFEST}"):
+            with open(path) as f:
+                manifest = json.load(f)
+            referenced.update(self.chunk_path(digest, manifest["codec"]) for digest, _ in manifest["chunks"])
+        removed = 0
+        for path in self.blob_dir.glob("*/*.*"):
+            if path in referenced or path.name.endswith(".tmp"):
+                continue
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+        return removed
+
+
+proof_blobs = ProofBlobStore()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("migrate", "report", "cat", "gc"):
+        print(__doc__)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == "migrate":
+        print(json.dumps(proof_blobs.migrate(keep="--keep" in sys.argv), indent=2))
+    elif command == "report":
+        print(json.dumps(proof_blobs.report(), indent=2))
+    elif command == "cat":
+        for data in proof_blobs.stream(sys.argv[2]):
+            sys.stdout.buffer.write(data)
+    else:
+        print(f"Removed {proof_blobs.gc()} unreferenced chunks")
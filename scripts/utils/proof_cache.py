@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Content-addressed reuse of zkEngine proofs.
+
+A proof is fully determined by the WASM module, the function, its arguments
+and the step size, so the key is a hash of exactly those: the module's
+content digest (not its file name), the function, the canonicalized
+arguments and the step size. Once a proof with a given key has been
+generated and verified, later requests with the same key reuse its
+artifact in `PROOFS_DIR/<proof_id>` instead of spending another ~12 s and
+~18 MB. Requests carrying a nonce, or asking for `fresh`, always prove anew.
+
+The index is a small JSON file shared by executor processes (flock-guarded).
+Lookups only take the shared lock and never rewrite it; hit/miss counters
+are kept in memory and folded into the file every `flush_interval`
+seconds, on the next write, and at exit. `python proof_cache.py` prints
+hit rate and bytes/seconds saved.
+"""
+
+import atexit
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+WASM_DIR = Path(os.path.expanduser(os.getenv("WASM_DIR", "~/agentkit/zkengine_binary")))
+PROOFS_DIR = Path(os.path.expanduser(os.getenv("PROOFS_DIR", "~/agentkit/proofs")))
+INDEX_PATH = Path(os.path.expanduser(os.getenv("PROOF_CACHE_INDEX", "~/agentkit/data/proof_cache.json")))
+
+# Same function -> module mapping as generate_proof in src/main.rs
+WASM_FILES = {
+    "prove_kyc": "prove_kyc.wasm",
+    "prove_ai_content": "prove_ai_content.wasm",
+    "prove_location": "prove_location.wasm",
+}
+
+
+def wasm_file_for(function: str, additional_context: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    if function == "prove_custom":
+        return (additional_context or {}).get("wasm_file", "prime_checker.wasm")
+    return WASM_FILES.get(function)
+
+
+class ProofCache:
+    """Maps proof keys to verified artifacts and tracks what reuse saved"""
+
+    def __init__(self, index_path: Path = INDEX_PATH, wasm_dir: Path = WASM_DIR,
+                 proofs_dir: Path = PROOFS_DIR, enabled: bool = True, flush_interval: float = 30.0):
+        self.index_path = Path(index_path)
+        self.wasm_dir = Path(wasm_dir)
+        self.proofs_dir = Path(proofs_dir)
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self._digests: Dict[Path, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+        self._pending = self._empty_stats()
+        self._pending_hits: Dict[str, Tuple[int, float]] = {}  # key -> (hits, last hit)
+        self._last_flush = time.monotonic()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {"hits": 0, "misses": 0, "bytes_saved": 0, "seconds_saved": 0.0}
+
+    def wasm_digest(self, wasm_file: str) -> Optional[str]:
+        """sha256 of the module, recomputed only when its size or mtime changes"""
+        path = self.wasm_dir / wasm_file
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        cached = self._digests.get(path)
+        if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        self._digests[path] = (st.st_size, st.st_mtime_ns, digest.hexdigest())
+        return digest.hexdigest()
+
+    def key_for(self, function: str, arguments: Iterable[Any], step_size: int,
+                additional_context: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        wasm_file = wasm_file_for(function, additional_context)
+        digest = self.wasm_digest(wasm_file) if wasm_file else None
+        if digest is None:
+            return None
+        canonical = json.dumps({
+            "wasm": digest,
+            "function": function,
+            "arguments": [str(a).strip() for a in arguments],
+            "step_size": int(step_size),
+        }, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    @staticmethod
+    def wants_fresh(additional_context: Optional[Dict[str, Any]] = None, fresh: bool = False) -> bool:
+        """Nonce-bound or explicitly fresh proofs must never be served from cache"""
+        context = additional_context or {}
+        return fresh or bool(context.get("fresh")) or "nonce" in context
+
+    @contextmanager
+    def _index(self, write: bool):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.index_path.with_suffix(".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if write else fcntl.LOCK_SH)
+            try:
+                with open(self.index_path) as f:
+                    index = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                index = {}
+            index.setdefault("entries", {})
+            index.setdefault("stats", self._empty_stats())
+            yield index
+            if write:
+                self._merge_pending(index)
+                tmp = self.index_path.with_suffix(".tmp")
+                with open(tmp, "w") as f:
+                    json.dump(index, f, indent=2)
+                os.replace(tmp, self.index_path)
+
+    def _merge_pending(self, index: Dict[str, Any]):
+        """Fold in-memory counters into an index held under the write lock"""
+        with self._lock:
+            pending, self._pending = self._pending, self._empty_stats()
+            pending_hits, self._pending_hits = self._pending_hits, {}
+            self._last_flush = time.monotonic()
+        stats = index["stats"]
+        for name in ("hits", "misses", "bytes_saved"):
+            stats[name] += pending[name]
+        stats["seconds_saved"] = round(stats["seconds_saved"] + pending["seconds_saved"], 3)
+        for key, (hits, last_hit) in pending_hits.items():
+            entry = index["entries"].get(key)
+            if entry is not None:
+                entry["hits"] = entry.get("hits", 0) + hits
+                entry["last_hit"] = max(entry.get("last_hit", 0.0), last_hit)
+
+    def flush(self):
+        with self._lock:
+            idle = not self._pending["hits"] and not self._pending["misses"]
+        if not idle:
+            with self._index(write=True):
+                pass
+
+    def lookup(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Verified artifact for `key` still on disk (plain or in proof_blobs), else None (counted as a miss)"""
+        if not self.enabled or key is None:
+            return None
+        with self._index(write=False) as index:
+            entry = index["entries"].get(key)
+        proof_dir = self.proofs_dir / entry["proof_id"] if entry else None
+        usable = (entry is not None and entry.get("verified")
+                  and ((proof_dir / "proof.bin").exists() or (proof_dir / "proof.manifest.json").exists()))
+        with self._lock:
+            if usable:
+                self._pending["hits"] += 1
+                self._pending["bytes_saved"] += entry.get("proof_size", 0)
+                self._pending["seconds_saved"] += entry.get("generation_time_secs", 0.0)
+                hits, _ = self._pending_hits.get(key, (0, 0.0))
+                self._pending_hits[key] = (hits + 1, time.time())
+            else:
+                self._pending["misses"] += 1
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+        return dict(entry) if usable else None
+
+    def store(self, key: Optional[str], proof_id: str, function: str, metrics: Optional[Dict[str, Any]] = None):
+        if not self.enabled or key is None:
+            return
+        metrics = metrics or {}
+        with self._index(write=True) as index:
+            index["entries"][key] = {
+                "proof_id": proof_id,
+                "function": function,
+                "proof_size": metrics.get("proof_size", 0),
+                "generation_time_secs": metrics.get("time_ms", 0) / 1000.0,
+                "verified": False,
+                "created": time.time(),
+                "hits": 0,
+            }
+
+    def mark_verified(self, proof_id: str, valid: bool = True):
+        """Only proofs that passed verification become reusable; failed ones are evicted"""
+        if not self.enabled:
+            return
+        with self._index(write=True) as index:
+            for key, entry in list(index["entries"].items()):
+                if entry["proof_id"] == proof_id:
+                    if valid:
+                        entry["verified"] = True
+                    else:
+                        del index["entries"][key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._index(write=False) as index:
+            stats = dict(index["stats"])
+            entries = index["entries"]
+        with self._lock:
+            for name, value in self._pending.items():
+                stats[name] += value
+        stats["seconds_saved"] = round(stats["seconds_saved"], 3)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["entries"] = len(entries)
+        stats["verified_entries"] = sum(1 for e in entries.values() if e.get("verified"))
+        return stats
+
+
+proof_cache = ProofCache(enabled=os.getenv("PROOF_CACHE_DISABLED", "").lower() not in ("1", "true", "yes"))
+
+if __name__ == "__main__":
+    print(json.dumps(proof_cache.stats(), indent=2))
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""Append-only proof index replacing whole-file rewrites of proofs_db.json.
+
+Records keep the proofs_db.json shape (id, file_path, metadata, metrics,
+status, timestamp) and are appended to a JSONL log, one line per version.
+The latest line for an ID wins, and `{"id": ..., "deleted": true}` removes
+one. Each process keeps only a small in-memory entry per proof: the log
+offset plus the fields queries filter on (function, workflow ID, timestamp,
+verified). Listing a page therefore touches only that page's lines.
+Recording is a single append. Writers from other processes are picked up
+incrementally by reading past the last known offset. Once superseded lines
+outnumber live ones, the log is compacted.
+
+On startup the index also takes in what it may have missed: proofs_db.json
+records and proof directories it doesn't know yet, and `.verified` markers
+the Rust server wrote for proofs whose record has no verification result.
+
+    python proof_index.py import ~/agentkit/data/proofs_db.json ~/agentkit/circle/proofs_db.json
+    python proof_index.py import-dirs [~/agentkit/proofs]
+    python proof_index.py list [function] [limit]
+    python proof_index.py compact
+    python proof_index.py stats
+"""
+
+import bisect
+import fcntl
+import json
+import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+INDEX_PATH = Path(os.path.expanduser(os.getenv("PROOF_INDEX", "~/agentkit/data/proofs_index.jsonl")))
+PROOFS_DIR = Path(os.path.expanduser(os.getenv("PROOFS_DIR", "~/agentkit/proofs")))
+LEGACY_DBS = [Path(os.path.expanduser(p)) for p in ("~/agentkit/data/proofs_db.json", "~/agentkit/circle/proofs_db.json")]
+
+_FRACTION = re.compile(r"(\.\d{6})\d+")
+
+
+def timestamp_of(value: Any) -> float:
+    """Epoch seconds from an ISO string (nanosecond or Z suffixes allowed), seconds or milliseconds"""
+    if isinstance(value, (int, float)):
+        return value / 1000.0 if value > 1e11 else float(value)
+    if isinstance(value, str) and value:
+        try:
+            return timestamp_of(float(value))
+        except ValueError:
+            pass
+        try:
+            return datetime.fromisoformat(_FRACTION.sub(r"\1", value).replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    return 0.0
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def proof_record(proof_id: str, metadata: Dict[str, Any], metrics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """proofs_db.json-style record for a proof the Rust server just completed"""
+    metrics = dict(metrics or {})
+    if "time_ms" in metrics:
+        metrics.setdefault("generation_time_secs", metrics["time_ms"] / 1000.0)
+    return {
+        "id": proof_id,
+        "file_path": f"./proofs/{proof_id}/proof.bin",
+        "metadata": metadata,
+        "metrics": metrics,
+        "status": "complete",
+        "timestamp": now_iso(),
+    }
+
+
+class _Entry:
+    __slots__ = ("offset", "length", "function", "workflow_id", "ts", "verified")
+
+    def __init__(self, offset: int, length: int, record: Dict[str, Any]):
+        metadata = record.get("metadata") or {}
+        context = metadata.get("additional_context")
+        self.offset = offset
+        self.length = length
+        self.function = metadata.get("function") or record.get("function")
+        self.workflow_id = (context.get("workflow_id") if isinstance(context, dict) else None) or record.get("workflow_id")
+        self.ts = timestamp_of(record.get("timestamp"))
+        self.verified = bool(record.get("verified"))
+
+
+class ProofIndex:
+    """Proof records by ID, with newest-first pages filtered by function, workflow and verified flag"""
+
+    def __init__(self, path: Path = INDEX_PATH, compact_min_dead: int = 1000,
+                 proofs_dir: Optional[Path] = PROOFS_DIR):
+        self.path = Path(path)
+        self.compact_min_dead = compact_min_dead
+        self._lock = threading.RLock()
+        self._reset()
+        # Both imports skip what the index already has, so this is cheap after the first run
+        self.import_json(*LEGACY_DBS)
+        if proofs_dir is not None:
+            self.import_dirs(proofs_dir)
+
+    def _reset(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._timeline: List[Tuple[float, str]] = []
+        self._by_function: Dict[str, List[Tuple[float, str]]] = {}
+        self._by_workflow: Dict[str, List[Tuple[float, str]]] = {}
+        self._deleted: Set[str] = set()
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._dead = 0
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Writers and compaction hold it exclusively; readers hold it shared across refresh + read,
+        so offsets can't go stale under them when another process compacts"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    # --- in-memory index ---
+
+    def _lists_for(self, entry: _Entry) -> Iterator[List[Tuple[float, str]]]:
+        yield self._timeline
+        if entry.function:
+            yield self._by_function.setdefault(entry.function, [])
+        if entry.workflow_id:
+            yield self._by_workflow.setdefault(entry.workflow_id, [])
+
+    def _apply(self, record: Dict[str, Any], offset: int, length: int):
+        proof_id = record.get("id")
+        if not proof_id:
+            return
+        old = self._entries.pop(proof_id, None)
+        if old is not None:
+            self._dead += 1
+            for keys in self._lists_for(old):
+                i = bisect.bisect_left(keys, (old.ts, proof_id))
+                if i < len(keys) and keys[i] == (old.ts, proof_id):
+                    del keys[i]
+        if record.get("deleted"):
+            # Tombstones survive compaction so the startup imports don't bring deleted proofs back
+            self._deleted.add(proof_id)
+            return
+        self._deleted.discard(proof_id)
+        entry = _Entry(offset, length, record)
+        self._entries[proof_id] = entry
+        for keys in self._lists_for(entry):
+            # New proofs are the newest, so this is almost always an append
+            if not keys or keys[-1] <= (entry.ts, proof_id):
+                keys.append((entry.ts, proof_id))
+            else:
+                bisect.insort(keys, (entry.ts, proof_id))
+
+    def _refresh(self):
+        """Index lines appended by any process since the last call; full reload after a compaction"""
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            if self._inode is not None:
+                self._reset()
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            self._reset()
+            self._inode = st.st_ino
+        if st.st_size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a concurrent append still in progress
+                offset = self._offset
+                self._offset += len(line)
+                if line.strip():
+                    try:
+                        self._apply(json.loads(line), offset, len(line))
+                    except json.JSONDecodeError:
+                        self._dead += 1
+
+    def _read(self, entry: _Entry) -> Dict[str, Any]:
+        with open(self.path, "rb") as f:
+            f.seek(entry.offset)
+            return json.loads(f.read(entry.length))
+
+    # --- writes ---
+
+    @staticmethod
+    def _encode(records: Iterable[Dict[str, Any]]) -> List[bytes]:
+        return [json.dumps(r, separators=(",", ":")).encode() + b"\n" for r in records]
+
+    def _append(self, records: Iterable[Dict[str, Any]]) -> int:
+        lines = self._encode(records)
+        if not lines:
+            return 0
+        with self._lock, self._file_lock(exclusive=True):
+            self._append_locked(lines)
+        return len(lines)
+
+    def _append_locked(self, lines: List[bytes]):
+        self._refresh()
+        with open(self.path, "ab") as f:
+            f.write(b"".join(lines))
+        self._refresh()
+        if self._dead >= max(self.compact_min_dead, len(self._entries)):
+            self._compact_locked()
+
+    def record(self, record: Dict[str, Any]):
+        """Add one proof record (proofs_db.json shape), merged over any existing record for its ID.
+
+        The executor and the Rust server both record proofs they see complete, in either order
+        relative to verification, so fields such as `verified` are never dropped by a later record.
+        """
+        record = {**record, "timestamp": record.get("timestamp") or now_iso()}
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            entry = self._entries.get(record.get("id"))
+            if entry is not None:
+                record = {**self._read(entry), **record}
+            self._append_locked(self._encode([record]))
+
+    def update(self, proof_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        # Read-modify-write under the exclusive lock so concurrent processes can't drop each other's fields
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            entry = self._entries.get(proof_id)
+            if entry is None:
+                return None
+            current = self._read(entry)
+            current.update(fields)
+            self._append_locked(self._encode([current]))
+            return current
+
+    def mark_verified(self, proof_id: str, valid: bool = True) -> Optional[Dict[str, Any]]:
+        return self.update(proof_id, verified=valid, verifiedAt=now_iso())
+
+    def delete(self, proof_id: str):
+        self._append([{"id": proof_id, "deleted": True}])
+
+    def import_json(self, *paths: Path) -> int:
+        """Append proofs_db.json records whose IDs the index doesn't have (and never deleted)"""
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            new = []
+            for path in map(Path, paths):
+                try:
+                    with open(path) as f:
+                        records = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    continue
+                for proof_id, record in (records.items() if isinstance(records, dict) else
+                                         ((r.get("id"), r) for r in records)):
+                    if proof_id and proof_id not in self._entries and proof_id not in self._deleted:
+                        new.append({"id": proof_id, **record})
+            new.sort(key=lambda r: timestamp_of(r.get("timestamp")))
+            if new:
+                self._append_locked(self._encode(new))
+            return len(new)
+
+    def import_dirs(self, proofs_dir: Path = PROOFS_DIR) -> int:
+        """Index proof directories (proof.bin or a blob manifest) the index lacks, and `.verified`
+        markers for records that carry no verification result"""
+        proofs_dir = Path(proofs_dir)
+        if not proofs_dir.is_dir():
+            return 0
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            new = []
+            for proof_dir in proofs_dir.glob("proof_*"):
+                if not ((proof_dir / "proof.bin").exists() or (proof_dir / "proof.manifest.json").exists()):
+                    continue
+                verified = (proof_dir / ".verified").exists()
+                if proof_dir.name in self._deleted:
+                    continue
+                entry = self._entries.get(proof_dir.name)
+                if entry is not None:
+                    if verified and not entry.verified:
+                        record = self._read(entry)
+                        if "verified" not in record:
+                            new.append({**record, "verified": True})
+                    continue
+                try:
+                    with open(proof_dir / "metadata.json") as f:
+                        metadata = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    metadata = {}
+                record = proof_record(proof_dir.name, metadata)
+                record["timestamp"] = datetime.fromtimestamp(proof_dir.stat().st_mtime, timezone.utc).isoformat()
+                if verified:
+                    record["verified"] = True
+                new.append(record)
+            new.sort(key=lambda r: timestamp_of(r.get("timestamp")))
+            if new:
+                self._append_locked(self._encode(new))
+            return len(new)
+
+    def _compact_locked(self):
+        live = [self._read(self._entries[proof_id]) for _, proof_id in self._timeline]
+        live += [{"id": proof_id, "deleted": True} for proof_id in sorted(self._deleted)]
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            for record in live:
+                f.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._reset()
+        self._refresh()
+
+    def compact(self) -> Dict[str, int]:
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            before = self._offset
+            self._compact_locked()
+            return {"bytes_before": before, "bytes_after": self._offset, "records": len(self._entries)}
+
+    # --- reads ---
+
+    def get(self, proof_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh()
+            entry = self._entries.get(proof_id)
+            return self._read(entry) if entry else None
+
+    def query(self, function: Optional[str] = None, workflow_id: Optional[str] = None,
+              verified: Optional[bool] = None, since: Any = None, until: Any = None,
+              limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """One newest-first page; pass the returned `next_cursor` to get the following page"""
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh()
+            if workflow_id is not None:
+                keys = self._by_workflow.get(workflow_id, [])
+            elif function is not None:
+                keys = self._by_function.get(function, [])
+            else:
+                keys = self._timeline
+
+            hi = len(keys)
+            if until is not None:
+                hi = bisect.bisect_right(keys, (timestamp_of(until), "\uffff"))
+            if cursor:
+                ts, _, proof_id = cursor.partition("|")
+                hi = min(hi, bisect.bisect_left(keys, (float(ts), proof_id)))
+            lo = bisect.bisect_left(keys, (timestamp_of(since), "")) if since is not None else 0
+
+            page, i = [], hi
+            while i > lo and len(page) < limit:
+                i -= 1
+                ts, proof_id = keys[i]
+                entry = self._entries[proof_id]
+                if function is not None and entry.function != function:
+                    continue
+                if verified is not None and entry.verified != verified:
+                    continue
+                page.append((ts, proof_id, entry))
+
+            more = len(page) == limit and i > lo
+            return {
+                "proofs": [self._read(entry) for _, _, entry in page],
+                "next_cursor": f"{page[-1][0]!r}|{page[-1][1]}" if more else None,
+                "total": len(self._entries),
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh()
+            return {
+                "path": str(self.path),
+                "records": len(self._entries),
+                "superseded_lines": self._dead,
+                "log_bytes": self._offset,
+                "by_function": {f: len(keys) for f, keys in sorted(self._by_function.items())},
+                "verified": sum(1 for e in self._entries.values() if e.verified),
+            }
+
+
+_default_index: Optional[ProofIndex] = None
+
+
+def get_proof_index() -> ProofIndex:
+    """Process-wide index at PROOF_INDEX (default ~/agentkit/data/proofs_index.jsonl)"""
+    global _default_index
+    if _default_index is None:
+        _default_index = ProofIndex()
+    return _default_index
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("import", "import-dirs", "list", "compact", "stats"):
+        print(__doc__)
+        sys.exit(1)
+
+    index = get_proof_index()
+    command, args = sys.argv[1], sys.argv[2:]
+    if command == "import":
+        print(f"Imported {index.import_json(*(args or LEGACY_DBS))} proofs into {index.path}")
+    elif command == "import-dirs":
+        print(f"Indexed {index.import_dirs(Path(args[0]) if args else PROOFS_DIR)} proof directories into {index.path}")
+    elif command == "list":
+        page = index.query(function=args[0] if args else None, limit=int(args[1]) if len(args) > 1 else 20)
+        for proof in page["proofs"]:
+            print(f"{proof.get('timestamp', '')}  {proof['id']}  {(proof.get('metadata') or {}).get('function', '')}")
+    elif command == "compact":
+        print(json.dumps(index.compact(), indent=2))
+    else:
+        print(json.dumps(index.stats(), indent=2))
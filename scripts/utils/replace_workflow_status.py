@@ -22,64 +22,61 @@ async def workflow_status(request: WorkflowStatusRequest):
     """Get the status of a workflow"""
     try:
         print(f"[DEBUG] workflow_status called for: {request.workflowId}")
-        # Read the workflow history file directly
-        history_path = os.path.expanduser("~/agentkit/workflow_history.json")
+        # Indexed lookup in the workflow store instead of loading the whole history file
+        import sys
+        from pathlib import Path
+        utils_dir = str(Path(__file__).resolve().parent / "scripts" / "utils")
+        if utils_dir not in sys.path:
+            sys.path.append(utils_dir)
+        from workflow_store import HISTORY_PATH, get_store
+        store = get_store()
+        store.import_json(HISTORY_PATH, only_if_changed=True)
+        workflow_data = store.get(request.workflowId)
         
-        if os.path.exists(history_path):
-            with open(history_path, 'r') as f:
-                history = json.load(f)
-            
-            workflow_data = history.get(request.workflowId)
-            
-            if not workflow_data:
-                return {
-                    "success": False,
-                    "error": f"Workflow {request.workflowId} not found"
-                }
-            
-            # Build response with step details
-            steps = []
-            for i, step in enumerate(workflow_data.get("steps", [])):
-                step_status = "pending"
-                
-                # Check if step is completed
-                if i in workflow_data.get("completedSteps", []):
-                    step_status = "completed"
-                elif i == workflow_data.get("currentStep", -1):
-                    step_status = "executing"
-                
-                # Check results for this step
-                step_result = workflow_data.get("results", {}).get(f"step_{i}", {})
-                if step_result.get("error"):
-                    step_status = "failed"
-                elif step_result.get("skipped"):
-                    step_status = "skipped"
-                elif step_result:
-                    step_status = "completed"
-                
-                steps.append({
-                    "step": i,
-                    "status": step_status,
-                    "description": step.get("description", step.get("type", "Unknown step"))
-                })
-            
-            # Get the actual status from workflow data
-            actual_status = workflow_data.get("status", "unknown")
-            print(f"[DEBUG] Returning status: {actual_status} for {request.workflowId}")
-            
-            return {
-                "success": True,
-                "workflowId": request.workflowId,
-                "status": actual_status,
-                "steps": steps,
-                "currentStep": workflow_data.get("currentStep", -1),
-                "results": workflow_data.get("results", {})
-            }
-        else:
+        if not workflow_data:
             return {
                 "success": False,
-                "error": "Workflow history file not found"
+                "error": f"Workflow {request.workflowId} not found"
             }
+        
+        # Build response with step details
+        steps = []
+        for i, step in enumerate(workflow_data.get("steps", [])):
+            step_status = "pending"
+            
+            # Check if step is completed
+            if i in workflow_data.get("completedSteps", []):
+                step_status = "completed"
+            elif i == workflow_data.get("currentStep", -1):
+                step_status = "executing"
+            
+            # Check results for this step
+            step_result = workflow_data.get("results", {}).get(f"step_{i}", {})
+            if step_result.get("error"):
+                step_status = "failed"
+            elif step_result.get("skipped"):
+                step_status = "skipped"
+            elif step_result:
+                step_status = "completed"
+            
+            steps.append({
+                "step": i,
+                "status": step_status,
+                "description": step.get("description", step.get("type", "Unknown step"))
+            })
+        
+        # Get the actual status from workflow data
+        actual_status = workflow_data.get("status", "unknown")
+        print(f"[DEBUG] Returning status: {actual_status} for {request.workflowId}")
+        
+        return {
+            "success": True,
+            "workflowId": request.workflowId,
+            "status": actual_status,
+            "steps": steps,
+            "currentStep": workflow_data.get("currentStep", -1),
+            "results": workflow_data.get("results", {})
+        }
             
     except Exception as e:
         print(f"[DEBUG] Error in workflow_status: {str(e)}")
@@ -96,4 +93,4 @@ content = content[:func_start] + new_function + content[func_end:]
 with open('/home/hshadab/agentkit/langchain_service.py', 'w') as f:
     f.write(content)
 
-print("Replaced workflow_status function to read from workflow_history.json")
+print("Replaced workflow_status function to read from the workflow store")
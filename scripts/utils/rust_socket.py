@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Single multiplexed WebSocket to the Rust server.
+
+Proof and verification requests share one long-lived connection instead of
+opening a socket per step. One reader task parses each broadcast message
+once and resolves the oldest future waiting on its proof ID, so concurrent
+requests for the same proof each get one reply, in order; every other
+message is ignored. The connection is re-established with backoff if it
+drops, and waiters stay registered across reconnects since the server keeps
+working on requests already sent.
+"""
+
+import asyncio
+import contextvars
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from http_sessions import sessions
+from span_tracer import tracer
+
+# Message type -> kind of request it answers
+ROUTES = {
+    "proof_complete": "proof",
+    "proof_error": "proof",
+    "verification_result": "verification",
+    "verification_complete": "verification",
+    "verification_error": "verification",
+}
+
+
+def verification_failure(data: Dict[str, Any]) -> Optional[str]:
+    """None only for an explicitly valid verification result; otherwise why the proof must not be trusted.
+
+    The Rust server reports a failed zkEngine verify as a `verification_complete`
+    with status "invalid", so the message type alone says nothing about validity.
+    """
+    kind = data.get("type")
+    if kind == "verification_result" and data.get("isValid") is True:
+        return None
+    if kind == "verification_complete" and data.get("status") == "verified" and data.get("result") == "VALID":
+        return None
+    if kind == "verification_error":
+        return data.get("error") or "verification error"
+    return f"invalid proof ({data.get('result') or data.get('status') or kind})"
+
+
+class RustSocket:
+    """Routes proof/verification results to per-request futures by proof ID"""
+
+    def __init__(self, url: str = 'ws://localhost:8001/ws',
+                 reconnect_delay: float = 0.5, max_reconnect_delay: float = 10.0):
+        self.url = url
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._connected: Optional[asyncio.Event] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._waiters: Dict[Tuple[str, Optional[str]], List[asyncio.Future]] = {}
+        self.connects = 0
+        self.routed = 0
+        self.ignored = 0
+
+    def _ensure_started(self):
+        if self._reader is None or self._reader.done():
+            self._connected = asyncio.Event()
+            self._reader = contextvars.Context().run(asyncio.ensure_future, self._run())
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with sessions.get("ws").ws_connect(self.url, heartbeat=30) as ws:
+                    self._ws = ws
+                    self.connects += 1
+                    delay = self.reconnect_delay
+                    self._connected.set()
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self._route(msg.data)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[WARNING] Rust WebSocket error: {e}")
+            finally:
+                self._ws = None
+                self._connected.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _route(self, raw: str):
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            self.ignored += 1
+            return
+        kind = ROUTES.get(data.get("type"))
+        if kind is None:
+            self.ignored += 1
+            return
+
+        key = (kind, data.get("proof_id"))
+        if key[1] is None:
+            # Untagged result: hand it to the oldest waiter of that kind
+            key = next((k for k in self._waiters if k[0] == kind), key)
+        waiters = self._waiters.get(key)
+        future = waiters.pop(0) if waiters else None
+        if waiters == []:
+            del self._waiters[key]
+        if future is None or future.done():
+            self.ignored += 1
+            return
+        self.routed += 1
+        future.set_result(data)
+
+    async def request(self, payload: Dict[str, Any], kind: str, proof_id: str,
+                      timeout: Optional[float] = 600.0) -> Dict[str, Any]:
+        """Send `payload` and wait for the matching `kind` result for `proof_id`"""
+        self._ensure_started()
+        key = (kind, proof_id)
+        future = asyncio.get_running_loop().create_future()
+        # Register before sending so a fast reply can't slip past
+        self._waiters.setdefault(key, []).append(future)
+        try:
+            with tracer.span(f"ws.{kind}", proof_id=proof_id) as span:
+                await asyncio.wait_for(self._connected.wait(), timeout=timeout)
+                await self._ws.send_json(tracer.inject(dict(payload)))
+                data = await asyncio.wait_for(future, timeout=timeout)
+                span.set(result=data.get("type"))
+                return data
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._waiters[key]
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        for waiters in self._waiters.values():
+            for future in waiters:
+                if not future.done():
+                    future.cancel()
+        self._waiters.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self._ws is not None and not self._ws.closed,
+            "connects": self.connects,
+            "waiting": sum(len(waiters) for waiters in self._waiters.values()),
+            "routed": self.routed,
+            "ignored": self.ignored,
+        }
+
+
+rust_socket = RustSocket()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Lightweight hierarchical span tracing for workflow execution.
+
+Spans nest through a context variable, so steps running as separate asyncio
+tasks still attach to their workflow's span. Trace context crosses HTTP and
+WebSocket hops as a W3C `traceparent` value (`inject()` / `extract()`).
+Finished spans are kept in a bounded buffer. They can be summarised per
+span name or exported as a Chrome trace (chrome://tracing, Perfetto) so a
+slow workflow shows where its time actually went.
+"""
+
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_remote_parent: contextvars.ContextVar[Optional[Tuple[str, str]]] = contextvars.ContextVar("remote_parent", default=None)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "service", "start_ns", "end_ns",
+                 "attrs", "error", "thread")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, service: str, attrs: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.service = service
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attrs = attrs
+        self.error: Optional[str] = None
+        self.thread = threading.get_ident()
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set(self, **attrs: Any):
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": self.service,
+            "start_us": self.start_ns // 1000,
+            "duration_ms": round(self.duration_ms, 3),
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+class Tracer:
+    """Records spans for one process; `service` labels them in exports"""
+
+    def __init__(self, service: str = "workflow", max_spans: int = 20000):
+        self.service = service
+        self._spans: "deque[Span]" = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        parent = _current.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            remote = _remote_parent.get()
+            trace_id, parent_id = remote if remote else (secrets.token_hex(16), None)
+
+        span = Span(trace_id, parent_id, name, self.service, attrs)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current.reset(token)
+            with self._lock:
+                self._spans.append(span)
+
+    def current(self) -> Optional[Span]:
+        return _current.get()
+
+    def inject(self, carrier: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Add the current trace context to outgoing headers / message fields"""
+        carrier = {} if carrier is None else carrier
+        span = _current.get()
+        if span is not None:
+            carrier["traceparent"] = f"00-{span.trace_id}-{span.span_id}-01"
+        return carrier
+
+    def extract(self, carrier: Mapping[str, Any]) -> contextvars.Token:
+        """Adopt an incoming traceparent as the parent of spans started next; pass the token to `detach`"""
+        value = carrier.get("traceparent") if carrier else None
+        parent = None
+        if isinstance(value, str):
+            parts = value.split("-")
+            if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+                parent = (parts[1], parts[2])
+        return _remote_parent.set(parent)
+
+    def detach(self, token: contextvars.Token):
+        _remote_parent.reset(token)
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            spans = list(self._spans)
+        if trace_id is not None:
+            spans = [s for s in spans if s.trace_id == trace_id]
+        return spans
+
+    def summary(self, trace_id: Optional[str] = None) -> Dict[str, Any]:
+        """Count / total / p50 / p95 / max milliseconds per span name"""
+        by_name: Dict[str, List[float]] = {}
+        for span in self.spans(trace_id):
+            by_name.setdefault(span.name, []).append(span.duration_ms)
+
+        result = {}
+        for name, durations in sorted(by_name.items(), key=lambda kv: -sum(kv[1])):
+            durations.sort()
+            n = len(durations)
+            result[name] = {
+                "count": n,
+                "total_ms": round(sum(durations), 3),
+                "p50_ms": round(durations[n // 2], 3),
+                "p95_ms": round(durations[min(n - 1, int(n * 0.95))], 3),
+                "max_ms": round(durations[-1], 3),
+            }
+        return {"service": self.service, "spans": sum(v["count"] for v in result.values()), "by_name": result}
+
+    def chrome_trace(self, trace_id: Optional[str] = None) -> Dict[str, Any]:
+        events = []
+        for span in self.spans(trace_id):
+            events.append({
+                "name": span.name,
+                "cat": span.service,
+                "ph": "X",
+                "ts": span.start_ns // 1000,
+                "dur": max(1, int(span.duration_ms * 1000)),
+                "pid": span.service,
+                "tid": span.trace_id[:8],
+                "args": {**span.attrs, "span_id": span.span_id, "parent_id": span.parent_id,
+                         **({"error": span.error} if span.error else {})},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path, trace_id: Optional[str] = None) -> Path:
+        """Write a Chrome trace file (and the raw spans alongside it as .spans.json)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(trace_id), f)
+        with open(path.with_suffix(".spans.json"), "w") as f:
+            json.dump([s.to_dict() for s in self.spans(trace_id)], f, indent=2)
+        return path
+
+
+class TraceMiddleware:
+    """Plain ASGI middleware: one span per HTTP request, continuing any incoming traceparent"""
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        token = self.tracer.extract(headers)
+        status = {}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            with self.tracer.span(f"{scope['method']} {scope['path']}") as span:
+                await self.app(scope, receive, send_wrapper)
+                span.set(status=status.get("code"))
+        finally:
+            self.tracer.detach(token)
+
+
+tracer = Tracer(service=os.getenv("TRACE_SERVICE_NAME", "workflow"))
+
+# Directory for per-workflow trace files; unset disables the export
+TRACE_EXPORT_DIR = os.getenv("TRACE_EXPORT_DIR")
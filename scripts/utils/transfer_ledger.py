@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""Append-only transfer ledger replacing whole-file rewrites of transfer_history.json.
+
+Transfers keep the transfer_history.json shape (id, transferId, amount,
+recipient, blockchain, status, timestamp, optionally workflowId). They are
+appended as JSON lines to numbered segment files. The latest line for a
+transfer ID wins, so a status change is just another append. A segment is
+sealed once it holds `segment_records` lines. Sealing writes a `.idx`
+sidecar (the offset, length and indexed fields of every line), so later
+opens load sealed segments without parsing them.
+
+In memory, each process keeps:
+
+- the location of every live transfer by ID;
+- per-recipient and per-workflow lists sorted by timestamp;
+- per segment, a min/max timestamp and a sparse timestamp index (one mark
+  every SPARSE_EVERY lines).
+
+Recording is one append. Key lookups are a bisect plus reads of the
+matching lines. A time range skips whole segments and then seeks to the
+nearest mark. Neither depends on the size of the ledger. A background
+thread rewrites sealed segments that are mostly superseded lines.
+
+    python transfer_ledger.py import ~/agentkit/circle/transfer_history.json
+    python transfer_ledger.py list [recipient] [limit]
+    python transfer_ledger.py report [since]     # totals per recipient and chain, streamed
+    python transfer_ledger.py compact
+    python transfer_ledger.py stats
+"""
+
+import bisect
+import fcntl
+import json
+import os
+import sys
+import threading
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from proof_index import now_iso, timestamp_of
+
+LEDGER_DIR = Path(os.path.expanduser(os.getenv("TRANSFER_LEDGER_DIR", "~/agentkit/data/transfer_ledger")))
+LEGACY_HISTORY = [Path(os.path.expanduser(p)) for p in ("~/agentkit/circle/transfer_history.json",
+                                                        "~/agentkit/transfer_history.json")]
+SEGMENT_RECORDS = int(os.getenv("TRANSFER_LEDGER_SEGMENT_RECORDS", "4096"))
+SPARSE_EVERY = 64
+
+# Touched by every compaction; other processes reload when its mtime changes
+COMPACTED_MARKER = "compacted"
+
+_Posting = Tuple[float, int, int, str]  # (ts, segment, offset, transfer id)
+
+
+def recipient_key(recipient: Any) -> str:
+    """EVM addresses are case-insensitive; Solana addresses and names are not"""
+    recipient = str(recipient or "")
+    return recipient.lower() if recipient.startswith("0x") else recipient
+
+
+class _Loc:
+    __slots__ = ("id", "seq", "offset", "length", "ts", "recipient", "workflow_id")
+
+    def __init__(self, transfer_id: str, seq: int, offset: int, length: int, ts: float,
+                 recipient: Optional[str], workflow_id: Optional[str]):
+        self.id = transfer_id
+        self.seq = seq
+        self.offset = offset
+        self.length = length
+        self.ts = ts
+        self.recipient = recipient
+        self.workflow_id = workflow_id
+
+    @property
+    def posting(self) -> _Posting:
+        return (self.ts, self.seq, self.offset, self.id)
+
+    def row(self) -> list:
+        return [self.id, self.offset, self.length, self.ts, self.recipient, self.workflow_id]
+
+
+class _Segment:
+    __slots__ = ("seq", "lines", "dead", "min_ts", "max_ts", "marks", "rows")
+
+    def __init__(self, seq: int):
+        self.seq = seq
+        self.lines = 0
+        self.dead = 0
+        self.min_ts = float("inf")
+        self.max_ts = float("-inf")
+        # (max timestamp of every line before `offset`, offset); lines before a mark below `since` can be skipped
+        self.marks: List[Tuple[float, int]] = []
+        self.rows: List[list] = []  # kept for the active segment only, becomes its sidecar when sealed
+
+
+class TransferLedger:
+    """Transfers by ID, recipient, workflow and time range over append-only segments"""
+
+    def __init__(self, path: Path = LEDGER_DIR, segment_records: int = SEGMENT_RECORDS):
+        self.path = Path(path)
+        self.segment_records = segment_records
+        self._lock = threading.RLock()
+        self._compactor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        fresh = not self.path.exists()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._reset()
+        if fresh:
+            self.import_json(*LEGACY_HISTORY)
+
+    def _reset(self):
+        self._segments: Dict[int, _Segment] = {}
+        self._by_id: Dict[str, _Loc] = {}
+        self._by_recipient: Dict[str, List[_Posting]] = {}
+        self._by_workflow: Dict[str, List[_Posting]] = {}
+        self._active: Optional[int] = None
+        self._offset = 0
+        self._generation: Optional[int] = None
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.path / f"{seq:08d}.jsonl"
+
+    def _sidecar_path(self, seq: int) -> Path:
+        return self.path / f"{seq:08d}.idx"
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.path / "ledger.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    # --- in-memory index ---
+
+    def _postings_for(self, loc: _Loc) -> Iterator[List[_Posting]]:
+        if loc.recipient:
+            yield self._by_recipient.setdefault(loc.recipient, [])
+        if loc.workflow_id:
+            yield self._by_workflow.setdefault(loc.workflow_id, [])
+
+    def _apply(self, segment: _Segment, row: list, keep_row: bool):
+        transfer_id, offset, length, ts, recipient, workflow_id = row
+        if segment.lines % SPARSE_EVERY == 0:
+            segment.marks.append((segment.max_ts, offset))
+        segment.lines += 1
+        segment.min_ts = min(segment.min_ts, ts)
+        segment.max_ts = max(segment.max_ts, ts)
+        if keep_row:
+            segment.rows.append(row)
+
+        old = self._by_id.get(transfer_id)
+        if old is not None:
+            if old.seq in self._segments:
+                self._segments[old.seq].dead += 1
+            for postings in self._postings_for(old):
+                i = bisect.bisect_left(postings, old.posting)
+                if i < len(postings) and postings[i] == old.posting:
+                    del postings[i]
+        loc = _Loc(transfer_id, segment.seq, offset, length, ts, recipient, workflow_id)
+        self._by_id[transfer_id] = loc
+        for postings in self._postings_for(loc):
+            # Transfers arrive roughly in time order, so this is almost always an append
+            if not postings or postings[-1] <= loc.posting:
+                postings.append(loc.posting)
+            else:
+                bisect.insort(postings, loc.posting)
+
+    @staticmethod
+    def _row_for(record: Dict[str, Any], offset: int, length: int) -> Optional[list]:
+        transfer_id = record.get("transferId") or record.get("id")
+        if not transfer_id:
+            return None
+        return [transfer_id, offset, length, timestamp_of(record.get("timestamp")),
+                recipient_key(record.get("recipient")) or None, record.get("workflowId")]
+
+    def _scan(self, seq: int, start: int, keep_rows: bool) -> int:
+        """Apply complete lines of a segment from `start`; returns the offset after the last one"""
+        segment = self._segments.setdefault(seq, _Segment(seq))
+        offset = start
+        try:
+            with open(self._segment_path(seq), "rb") as f:
+                f.seek(start)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # a concurrent append still in progress
+                    try:
+                        row = self._row_for(json.loads(line), offset, len(line))
+                    except json.JSONDecodeError:
+                        row = None
+                    if row is not None:
+                        self._apply(segment, row, keep_rows)
+                    offset += len(line)
+        except FileNotFoundError:
+            pass
+        return offset
+
+    def _load_sealed(self, seq: int):
+        try:
+            with open(self._sidecar_path(seq)) as f:
+                rows = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._scan(seq, 0, keep_rows=False)
+            return
+        segment = self._segments.setdefault(seq, _Segment(seq))
+        for row in rows:
+            self._apply(segment, row, keep_row=False)
+
+    def _refresh(self):
+        """Index lines appended by any process since the last call; full reload after a compaction"""
+        try:
+            generation = (self.path / COMPACTED_MARKER).stat().st_mtime_ns
+        except FileNotFoundError:
+            generation = None
+        if self._active is None or generation != self._generation:
+            self._reset()
+            self._generation = generation
+            seqs = sorted(int(p.stem) for p in self.path.glob("*.jsonl") if p.stem.isdigit())
+            for seq in seqs[:-1]:
+                self._load_sealed(seq)
+            self._active = seqs[-1] if seqs else 1
+
+        while True:
+            # Once the next segment exists this one is sealed, so one more read drains it completely
+            sealed = self._segment_path(self._active + 1).exists()
+            self._offset = self._scan(self._active, self._offset, keep_rows=True)
+            if not sealed:
+                return
+            self._segments[self._active].rows = []
+            self._active, self._offset = self._active + 1, 0
+
+    def _read(self, loc: _Loc) -> Dict[str, Any]:
+        with open(self._segment_path(loc.seq), "rb") as f:
+            f.seek(loc.offset)
+            return json.loads(f.read(loc.length))
+
+    def _read_ids(self, transfer_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            transfer_ids = list(transfer_ids)
+            try:
+                return [self._read(self._by_id[t]) for t in transfer_ids if t in self._by_id]
+            except (OSError, json.JSONDecodeError):
+                # Another process compacted between our refresh and the read
+                self._active = None
+                self._refresh()
+                return [self._read(self._by_id[t]) for t in transfer_ids if t in self._by_id]
+
+    # --- writes ---
+
+    def _write_sidecar(self, seq: int, rows: List[list]):
+        tmp = self._sidecar_path(seq).with_suffix(".idx.tmp")
+        with open(tmp, "w") as f:
+            json.dump(rows, f, separators=(",", ":"))
+        os.replace(tmp, self._sidecar_path(seq))
+
+    def _seal_locked(self):
+        segment = self._segments[self._active]
+        self._write_sidecar(self._active, segment.rows)
+        segment.rows = []
+        self._segment_path(self._active + 1).touch()
+        self._active, self._offset = self._active + 1, 0
+
+    def _append(self, records: Iterable[Dict[str, Any]]) -> int:
+        lines = [json.dumps(r, separators=(",", ":")).encode() + b"\n" for r in records]
+        if not lines:
+            return 0
+        with self._lock, self._file_lock():
+            self._refresh()
+            with open(self._segment_path(self._active), "ab") as f:
+                f.write(b"".join(lines))
+            self._refresh()
+            if self._segments[self._active].lines >= self.segment_records:
+                self._seal_locked()
+        return len(lines)
+
+    @staticmethod
+    def _normalize(transfer: Dict[str, Any]) -> Dict[str, Any]:
+        transfer_id = transfer.get("transferId") or transfer.get("id") or str(uuid.uuid4())
+        return {"id": transfer_id, **transfer, "transferId": transfer_id,
+                "timestamp": transfer.get("timestamp") or now_iso()}
+
+    def record(self, transfer: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a transfer, or a newer version of one (same transferId), in transfer_history.json shape"""
+        transfer = self._normalize(transfer)
+        self._append([transfer])
+        return transfer
+
+    def update(self, transfer_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            current = self.get(transfer_id)
+            if current is None:
+                return None
+            current.update(fields)
+            self._append([current])
+            return current
+
+    def import_json(self, *paths: Path) -> int:
+        """Append transfer_history.json records (list or {id: record}) whose IDs the ledger doesn't have yet"""
+        with self._lock:
+            self._refresh()
+            new = {}
+            for path in map(Path, paths):
+                try:
+                    with open(path) as f:
+                        records = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    continue
+                for record in (({"id": k, **v} for k, v in records.items()) if isinstance(records, dict) else records):
+                    if isinstance(record, dict) and (record.get("transferId") or record.get("id")):
+                        record = self._normalize(record)
+                        if record["transferId"] not in self._by_id:
+                            new.setdefault(record["transferId"], record)
+            return self._append(sorted(new.values(), key=lambda r: timestamp_of(r.get("timestamp"))))
+
+    # --- compaction ---
+
+    def _compact_segment_locked(self, seq: int) -> int:
+        live = sorted((loc for loc in self._by_id.values() if loc.seq == seq), key=lambda loc: loc.offset)
+        segment_path = self._segment_path(seq)
+        if not live:
+            self._sidecar_path(seq).unlink(missing_ok=True)
+            segment_path.unlink(missing_ok=True)
+            return self._segments[seq].lines
+
+        tmp = segment_path.with_suffix(".jsonl.tmp")
+        rows, offset = [], 0
+        with open(segment_path, "rb") as src, open(tmp, "wb") as out:
+            for loc in live:
+                src.seek(loc.offset)
+                out.write(src.read(loc.length))
+                rows.append([loc.id, offset, loc.length, loc.ts, loc.recipient, loc.workflow_id])
+                offset += loc.length
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, segment_path)
+        self._write_sidecar(seq, rows)
+        return self._segments[seq].lines - len(live)
+
+    def compact(self, min_dead_fraction: float = 0.5) -> Dict[str, int]:
+        """Rewrite sealed segments where superseded lines are at least `min_dead_fraction` of the total"""
+        with self._lock, self._file_lock():
+            self._refresh()
+            candidates = [seq for seq, segment in self._segments.items()
+                          if seq != self._active and segment.dead and segment.dead >= segment.lines * min_dead_fraction]
+            dropped = sum(self._compact_segment_locked(seq) for seq in candidates)
+            if candidates:
+                (self.path / COMPACTED_MARKER).touch()
+                self._active = None
+                self._refresh()
+            return {"segments_compacted": len(candidates), "lines_dropped": dropped, "transfers": len(self._by_id)}
+
+    def start_compaction(self, interval: float = 600.0):
+        """Compact in a daemon thread every `interval` seconds"""
+        if self._compactor is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.compact()
+                except OSError as e:
+                    print(f"Transfer ledger compaction failed: {e}")
+
+        self._compactor = threading.Thread(target=run, name="transfer-ledger-compaction", daemon=True)
+        self._compactor.start()
+
+    def stop_compaction(self):
+        if self._compactor is not None:
+            self._stop.set()
+            self._compactor.join()
+            self._compactor = None
+
+    # --- reads ---
+
+    def get(self, transfer_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            records = self._read_ids([transfer_id])
+            return records[0] if records else None
+
+    def has_workflow(self, workflow_id: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return bool(self._by_workflow.get(workflow_id))
+
+    def _keyed(self, postings: List[_Posting], since: Any, until: Any) -> List[str]:
+        lo = bisect.bisect_left(postings, (timestamp_of(since),)) if since is not None else 0
+        hi = bisect.bisect_right(postings, (timestamp_of(until), float("inf"))) if until is not None else len(postings)
+        return [transfer_id for _, _, _, transfer_id in postings[lo:hi]]
+
+    def _segment_lines(self, seq: int, since: float, until: float) -> List[Dict[str, Any]]:
+        """Live records of one segment within [since, until], starting from the nearest sparse mark"""
+        segment = self._segments[seq]
+        start = segment.marks[max(0, bisect.bisect_left(segment.marks, (since, -1)) - 1)][1] if segment.marks else 0
+        live, offset = [], start
+        with open(self._segment_path(seq), "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                loc = self._by_id.get(record.get("transferId") or record.get("id"))
+                if loc is not None and loc.seq == seq and loc.offset == offset and since <= loc.ts <= until:
+                    live.append(record)
+                offset += len(line)
+                if seq == self._active and offset >= self._offset:
+                    break
+        return live
+
+    def iter_transfers(self, since: Any = None, until: Any = None) -> Iterator[Dict[str, Any]]:
+        """Live transfers in ledger (append) order, one segment in memory at a time; for reports"""
+        low = timestamp_of(since) if since is not None else float("-inf")
+        high = timestamp_of(until) if until is not None else float("inf")
+        with self._lock:
+            self._refresh()
+            seqs = sorted(self._segments)
+        for seq in seqs:
+            with self._lock:
+                segment = self._segments.get(seq)
+                if segment is None or not segment.lines or segment.max_ts < low or segment.min_ts > high:
+                    continue
+                try:
+                    records = self._segment_lines(seq, low, high)
+                except (OSError, json.JSONDecodeError):
+                    continue  # compacted away by another process since the refresh
+            yield from records
+
+    def query(self, recipient: Optional[str] = None, workflow_id: Optional[str] = None,
+              status: Optional[str] = None, since: Any = None, until: Any = None,
+              limit: int = 100) -> List[Dict[str, Any]]:
+        """Newest-first transfers for a recipient or workflow, or for a time range when neither is given"""
+        with self._lock:
+            self._refresh()
+            if workflow_id is not None or recipient is not None:
+                postings = (self._by_workflow.get(workflow_id, []) if workflow_id is not None
+                            else self._by_recipient.get(recipient_key(recipient), []))
+                ids = self._keyed(postings, since, until)
+                if status is None:
+                    return self._read_ids(reversed(ids[-limit:]))
+                page = []
+                for record in self._read_ids(reversed(ids)):
+                    if record.get("status") == status:
+                        page.append(record)
+                        if len(page) >= limit:
+                            break
+                return page
+
+        records = [r for r in self.iter_transfers(since, until) if status is None or r.get("status") == status]
+        records.sort(key=lambda r: timestamp_of(r.get("timestamp")), reverse=True)
+        return records[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            return {
+                "path": str(self.path),
+                "transfers": len(self._by_id),
+                "segments": len(self._segments),
+                "active_segment": self._active,
+                "superseded_lines": sum(s.dead for s in self._segments.values()),
+                "recipients": len([p for p in self._by_recipient.values() if p]),
+                "workflows": len([p for p in self._by_workflow.values() if p]),
+            }
+
+
+def report(ledger: "TransferLedger", since: Any = None, until: Any = None) -> Dict[str, Any]:
+    """Transfer count and amount per (recipient_key, blockchain), streamed from the ledger"""
+    totals: Dict[Tuple[str, str], List[Any]] = defaultdict(lambda: [0, Decimal(0)])
+    for transfer in ledger.iter_transfers(since, until):
+        entry = totals[(recipient_key(transfer.get("recipient")), str(transfer.get("blockchain", "")))]
+        entry[0] += 1
+        try:
+            entry[1] += Decimal(str(transfer.get("amount") or 0))
+        except InvalidOperation:
+            pass
+    return {"rows": [{"recipient": r, "blockchain": b, "transfers": n, "amount": str(amount)}
+                     for (r, b), (n, amount) in sorted(totals.items())]}
+
+
+_default_ledger: Optional[TransferLedger] = None
+
+
+def get_transfer_ledger() -> TransferLedger:
+    """Process-wide ledger at TRANSFER_LEDGER_DIR (default ~/agentkit/data/transfer_ledger)"""
+    global _default_ledger
+    if _default_ledger is None:
+        _default_ledger = TransferLedger()
+    return _default_ledger
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("import", "list", "report", "compact", "stats"):
+        print(__doc__)
+        sys.exit(1)
+
+    ledger = get_transfer_ledger()
+    command, args = sys.argv[1], sys.argv[2:]
+    if command == "import":
+        print(f"Imported {ledger.import_json(*(args or LEGACY_HISTORY))} transfers into {ledger.path}")
+    elif command == "list":
+        for transfer in ledger.query(recipient=args[0] if args else None, limit=int(args[1]) if len(args) > 1 else 20):
+            print(f"{transfer.get('timestamp', '')}  {transfer['transferId']}  {transfer.get('amount')} "
+                  f"{transfer.get('blockchain', '')} -> {transfer.get('recipient')}  {transfer.get('status', '')}")
+    elif command == "report":
+        print(json.dumps(report(ledger, since=args[0] if args else None), indent=2))
+    elif command == "compact":
+        print(json.dumps(ledger.compact(), indent=2))
+    else:
+        print(json.dumps(ledger.stats(), indent=2))
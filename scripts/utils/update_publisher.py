@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Coalescing, batched publisher for workflow updates to the Rust server.
+
+`publish()` only enqueues and returns; a background task flushes pending
+updates every `flush_interval` seconds, or as soon as `batch_size` are
+waiting. Consecutive `workflow_step_update`s for the same workflow and step
+are merged into one delta before sending. Within a flush, each workflow's
+updates are posted in order, and different workflows are posted concurrently
+over the shared session pool.
+"""
+
+import asyncio
+import contextvars
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from http_sessions import sessions
+from span_tracer import tracer
+
+STEP_UPDATE = "workflow_step_update"
+
+
+class UpdatePublisher:
+    """Bounded per-workflow queues drained by a single background flusher"""
+
+    def __init__(self, url: str = 'http://localhost:8001/workflow_update', maxsize: int = 1000,
+                 flush_interval: float = 0.05, batch_size: int = 50):
+        self.url = url
+        self.maxsize = maxsize
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._size = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._idle: Optional[asyncio.Event] = None
+        self.published = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._idle.set()
+            # Fresh context: the flusher must not inherit the span of whichever workflow started it
+            self._task = contextvars.Context().run(asyncio.ensure_future, self._run())
+
+    def publish(self, update: Dict[str, Any]):
+        """Queue an update without waiting for it to be sent"""
+        self._ensure_started()
+        self.published += 1
+        queue = self._pending.setdefault(update.get("workflowId") or "", [])
+
+        last = queue[-1] if queue else None
+        if (update.get("type") == STEP_UPDATE and last is not None
+                and last.get("type") == STEP_UPDATE and last.get("stepId") == update.get("stepId")):
+            last["updates"] = {**last.get("updates", {}), **update.get("updates", {})}
+            self.coalesced += 1
+            return
+
+        if self._size >= self.maxsize and not self._drop_oldest_step_update():
+            self.dropped += 1
+            return
+        entry = {**update, "updates": dict(update["updates"])} if "updates" in update else dict(update)
+        # Remember the publishing span so the eventual POST is traced under it
+        entry["_traceparent"] = tracer.inject().get("traceparent")
+        queue.append(entry)
+        self._size += 1
+        self._idle.clear()
+        if self._size >= self.batch_size:
+            self._wakeup.set()
+
+    def _drop_oldest_step_update(self) -> bool:
+        # Lifecycle events (started/completed) are kept; intermediate step deltas go first
+        for queue in self._pending.values():
+            for i, update in enumerate(queue):
+                if update.get("type") == STEP_UPDATE:
+                    del queue[i]
+                    self._size -= 1
+                    self.dropped += 1
+                    return True
+        return False
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._size:
+                continue
+
+            batch, self._pending, self._size = self._pending, OrderedDict(), 0
+            await asyncio.gather(*(self._send_in_order(queue) for queue in batch.values()))
+            if not self._size:
+                self._idle.set()
+
+    async def _send_in_order(self, queue: List[Dict[str, Any]]):
+        for update in queue:
+            token = tracer.extract({"traceparent": update.pop("_traceparent", None)})
+            try:
+                with tracer.span("update.post", type=update.get("type"), step_id=update.get("stepId")):
+                    async with sessions.get().post(self.url, json=update,
+                                                   headers=tracer.inject({'Content-Type': 'application/json'})) as resp:
+                        if resp.status != 200:
+                            self.failed += 1
+                            print(f"[WARNING] Failed to send update: {resp.status}")
+                        else:
+                            self.sent += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"[WARNING] Error sending update: {e}")
+            finally:
+                tracer.detach(token)
+
+    async def flush(self):
+        """Wait until everything queued so far has been sent"""
+        if self._task is None or self._task.done():
+            return
+        self._wakeup.set()
+        await self._idle.wait()
+
+    async def close(self):
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._size,
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+
+publisher = UpdatePublisher()
@@ -17,14 +17,31 @@ if (!command) {
     process.exit(1);
 }
 
+async function parseWorkflow(command) {
+    // Prefer the agent service's resident, cached parser; fall back to a one-off CLI run
+    try {
+        const response = await fetch('http://localhost:8002/workflow/parse', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ command })
+        });
+        if (response.ok) {
+            return await response.json();
+        }
+    } catch (error) {
+        // Service not running
+    }
+    
+    const parserPath = path.join(__dirname, 'workflowParser_generic_final.js');
+    const parserOutput = execSync(`node "${parserPath}" "${command}"`, { encoding: 'utf-8' });
+    return JSON.parse(parserOutput);
+}
+
 async function runWorkflow() {
     try {
         console.log(`\\n🔄 Processing workflow with REAL zkEngine: ${command}\\n`);
         
-        const parserPath = path.join(__dirname, 'workflowParser_generic_final.js');
-        const parserOutput = execSync(`node "${parserPath}" "${command}"`, { encoding: 'utf-8' });
-        
-        const workflow = JSON.parse(parserOutput);
+        const workflow = await parseWorkflow(command);
         
         if (workflow.error) {
             console.error(`❌ Parser error: ${workflow.error}`);
@@ -7,40 +7,34 @@ import subprocess
 import os
 import re
 import time
-from datetime import datetime
-import aiohttp
+from datetime import datetime, timezone
+from pathlib import Path
+
+from http_sessions import sessions
+from update_publisher import publisher
+from rust_socket import rust_socket, verification_failure
+from step_scheduler import build_dependencies, run_dag, step_kind
+from span_tracer import TRACE_EXPORT_DIR, tracer
+from proof_cache import proof_cache
+from proof_index import get_proof_index, proof_record
+from transfer_ledger import get_transfer_ledger
+from workflow_store import get_store
+
+# Independent steps (e.g. two proofs) run concurrently, up to this many at once
+MAX_PARALLEL_STEPS = int(os.getenv("WORKFLOW_MAX_PARALLEL_STEPS", "4"))
+
+# langchain_service keeps the parser resident and memoizes results per command
+PARSER_URL = os.getenv("WORKFLOW_PARSER_URL", "http://localhost:8002/workflow/parse")
+
+# Prover admission priority for this workflow's proofs (interactive | workflow | batch)
+PROOF_PRIORITY = os.getenv("WORKFLOW_PROOF_PRIORITY", "workflow")
 
 async def send_update(update):
-    """Send update to Rust server via HTTP"""
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post('http://localhost:8001/workflow_update', 
-                                  json=update,
-                                  headers={'Content-Type': 'application/json'}) as resp:
-                if resp.status != 200:
-                    print(f"[WARNING] Failed to send update: {resp.status}")
-    except Exception as e:
-        print(f"[WARNING] Error sending update: {e}")
+    """Queue update for the Rust server; delivery happens in the background"""
+    publisher.publish(update)
 
-async def execute_workflow_with_updates(command, workflow_id):
-    """Execute workflow and send real-time updates"""
-    
-    # Parse workflow
-    print(f"🔄 Parsing workflow: {command}")
-    parser_result = subprocess.run(
-        ['node', 'workflowParser_generic_final.js', command],
-        capture_output=True,
-        text=True,
-        cwd=os.path.expanduser("~/agentkit/circle"),
-    )
-    
-    if parser_result.returncode != 0:
-        return {"success": False, "error": "Failed to parse workflow"}
-    
-    workflow_data = json.loads(parser_result.stdout)
-    steps = workflow_data.get('steps', [])
-    
-    # Create UI steps
+def ui_steps_for(steps):
+    """Pending step cards for the workflow_started message"""
     ui_steps = []
     for i, step in enumerate(steps):
         step_type = step.get('type', '')
@@ -53,20 +47,146 @@ async def execute_workflow_with_updates(command, workflow_id):
             "status": "pending"
         }
         ui_steps.append(ui_step)
+    return ui_steps
+
+def transfer_details(command):
+    """(amount, recipient, blockchain) for a workflow's transfer step, taken from its command"""
+    amount = "0.1"
+    recipient = "alice"
+    blockchain = "ETH"
+    
+    amount_match = re.search(r'(\d+\.?\d*)\s*USDC', command)
+    if amount_match:
+        amount = amount_match.group(1)
+    
+    recipient_match = re.search(r'to\s+(\w+)', command.lower())
+    if recipient_match:
+        recipient = recipient_match.group(1)
+    
+    if 'solana' in command.lower():
+        blockchain = "SOL"
+    return amount, recipient, blockchain
+
+def transfer_id_from(stdout):
+    """Transfer ID from executeTransfer.js's JSON result line, else from circleHandler's "Transfer ID:" text"""
+    for line in reversed(stdout.splitlines()):
+        line = line.strip()
+        if not line.startswith('{'):
+            continue
+        try:
+            response = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(response, dict) and response.get('transferId'):
+            return str(response['transferId'])
+    match = re.search(r'Transfer ID: ([a-f0-9\-]{36})', stdout)
+    return match.group(1) if match else None
+
+async def execute_workflow_with_updates(command, workflow_id, resume=False, force_transfers=False):
+    """Execute workflow and send real-time updates.
+
+    Every finished step is checkpointed in the workflow store; with `resume`
+    the checkpointed steps are skipped and only the remaining ones run.
+    """
+    span = None
+    try:
+        with tracer.span("workflow", workflow_id=workflow_id, command=command, resume=resume) as span:
+            return await _execute_workflow(command, workflow_id, resume, force_transfers)
+    except Exception as e:
+        get_store().update(workflow_id, status="failed", error=str(e))
+        raise
+    finally:
+        if TRACE_EXPORT_DIR and span is not None:
+            await publisher.flush()
+            path = tracer.export(Path(TRACE_EXPORT_DIR) / f"{workflow_id}.trace.json", span.trace_id)
+            print(f"🧭 Trace written to {path}")
+
+async def parse_workflow(command):
+    """Parse via the agent service's warm, cached parser; cold-start the CLI only if it's unreachable"""
+    with tracer.span("parse") as span:
+        try:
+            async with sessions.get().post(PARSER_URL, json={"command": command},
+                                           headers=tracer.inject({'Content-Type': 'application/json'})) as resp:
+                if resp.status == 200:
+                    span.set(source="service")
+                    return await resp.json()
+                print(f"[WARNING] Parser service returned {resp.status}, falling back to CLI")
+        except Exception as e:
+            print(f"[WARNING] Parser service unavailable ({e}), falling back to CLI")
+        
+        span.set(source="cli")
+        parser_result = await asyncio.to_thread(
+            subprocess.run,
+            ['node', 'workflowParser_generic_final.js', command],
+            capture_output=True,
+            text=True,
+            cwd=os.path.expanduser("~/agentkit/circle"),
+        )
+        if parser_result.returncode != 0:
+            return None
+        return json.loads(parser_result.stdout)
+
+async def _execute_workflow(command, workflow_id, resume=False, force_transfers=False):
+    store = get_store()
+    record = store.get(workflow_id) if resume else None
+    
+    if record and record.get('steps'):
+        # Resume: reuse the recorded steps and skip everything already checkpointed
+        steps = record['steps']
+        checkpoints = record.get('results', {})
+        done = set(record.get('completedSteps', []))
+        print(f"⏩ Resuming {workflow_id}: {len(done)}/{len(steps)} steps already completed")
+        store.update(workflow_id, status="running")
+    else:
+        # Parse workflow
+        print(f"🔄 Parsing workflow: {command}")
+        workflow_data = await parse_workflow(command)
+        
+        if workflow_data is None:
+            return {"success": False, "error": "Failed to parse workflow"}
+        
+        steps = workflow_data.get('steps', [])
+        checkpoints = {}
+        done = set()
+    
+    # Record the run in the workflow store (the CLI tools may already have created it)
+    if store.update(workflow_id, status="running", steps=steps, checkpointed=True) is None:
+        store.put({
+            "id": workflow_id,
+            "description": command,
+            "steps": steps,
+            "status": "running",
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+            "checkpointed": True,
+            "completedSteps": [],
+            "results": {}
+        })
     
     # Send workflow started
     await send_update({
         "type": "workflow_started",
         "workflowId": workflow_id,
-        "steps": ui_steps
+        "steps": ui_steps_for(steps)
     })
     
-    # Execute each step
+    # Execute steps as their dependencies complete
     transfer_ids = []
     proof_summary = {}
+    step_proofs = {}
+    deps = build_dependencies(steps)
     
-    for i, step in enumerate(steps):
+    # Rebuild what later steps need from the checkpoints of completed ones
+    for i in sorted(done):
+        checkpoint = checkpoints.get(f"step_{i}", {})
+        if checkpoint.get('proofId') and step_kind(steps[i]) == 'proof':
+            step_proofs[i] = checkpoint['proofId']
+            proof_summary[checkpoint.get('proofType', 'kyc')] = {"status": "generated", "proofId": checkpoint['proofId']}
+        if checkpoint.get('transferId'):
+            transfer_ids.append(checkpoint['transferId'])
+    
+    async def run_step(i, step):
         step_id = f"step_{i+1}"
+        result = {"success": True}
         
         # Update step to executing
         await send_update({
@@ -97,25 +217,24 @@ async def execute_workflow_with_updates(command, workflow_id):
             }
             
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post('http://localhost:8001/device_registration', 
-                                          json=registration_request,
-                                          headers={'Content-Type': 'application/json'}) as resp:
-                        if resp.status == 200:
-                            registration_result = await resp.json()
-                            
-                            # Update step with registration data
-                            await send_update({
-                                "type": "workflow_step_update",
-                                "workflowId": workflow_id,
-                                "stepId": step_id,
-                                "updates": {
-                                    "registrationData": registration_result,
-                                    "transactionHash": registration_result.get('transactionHash', 'pending')
-                                }
-                            })
-                        else:
-                            raise Exception(f"Registration request failed with status {resp.status}")
+                async with sessions.get().post('http://localhost:8001/device_registration', 
+                                               json=registration_request,
+                                               headers=tracer.inject({'Content-Type': 'application/json'})) as resp:
+                    if resp.status == 200:
+                        registration_result = await resp.json()
+                        
+                        # Update step with registration data
+                        await send_update({
+                            "type": "workflow_step_update",
+                            "workflowId": workflow_id,
+                            "stepId": step_id,
+                            "updates": {
+                                "registrationData": registration_result,
+                                "transactionHash": registration_result.get('transactionHash', 'pending')
+                            }
+                        })
+                    else:
+                        raise Exception(f"Registration request failed with status {resp.status}")
             except Exception as e:
                 # Fall back to mock registration if frontend call fails
                 mock_registration = {
@@ -153,25 +272,24 @@ async def execute_workflow_with_updates(command, workflow_id):
             }
             
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post('http://localhost:8001/iotex_verification',
-                                          json=verification_request,
-                                          headers={'Content-Type': 'application/json'}) as resp:
-                        if resp.status == 200:
-                            verification_result = await resp.json()
-                            
-                            # Update step with verification data
-                            await send_update({
-                                "type": "workflow_step_update",
-                                "workflowId": workflow_id,
-                                "stepId": step_id,
-                                "updates": {
-                                    "verificationData": verification_result,
-                                    "transactionHash": verification_result.get('transactionHash', 'pending')
-                                }
-                            })
-                        else:
-                            raise Exception(f"Verification request failed with status {resp.status}")
+                async with sessions.get().post('http://localhost:8001/iotex_verification',
+                                               json=verification_request,
+                                               headers=tracer.inject({'Content-Type': 'application/json'})) as resp:
+                    if resp.status == 200:
+                        verification_result = await resp.json()
+                        
+                        # Update step with verification data
+                        await send_update({
+                            "type": "workflow_step_update",
+                            "workflowId": workflow_id,
+                            "stepId": step_id,
+                            "updates": {
+                                "verificationData": verification_result,
+                                "transactionHash": verification_result.get('transactionHash', 'pending')
+                            }
+                        })
+                    else:
+                        raise Exception(f"Verification request failed with status {resp.status}")
             except Exception as e:
                 # Fall back to mock verification if frontend call fails
                 mock_verification = {
@@ -206,25 +324,24 @@ async def execute_workflow_with_updates(command, workflow_id):
             }
             
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post('http://localhost:8001/claim_rewards',
-                                          json=rewards_request,
-                                          headers={'Content-Type': 'application/json'}) as resp:
-                        if resp.status == 200:
-                            rewards_result = await resp.json()
-                            
-                            # Update step with rewards data
-                            await send_update({
-                                "type": "workflow_step_update",
-                                "workflowId": workflow_id,
-                                "stepId": step_id,
-                                "updates": {
-                                    "rewardData": rewards_result,
-                                    "transactionHash": rewards_result.get('transactionHash', 'no_rewards')
-                                }
-                            })
-                        else:
-                            raise Exception(f"Rewards request failed with status {resp.status}")
+                async with sessions.get().post('http://localhost:8001/claim_rewards',
+                                               json=rewards_request,
+                                               headers=tracer.inject({'Content-Type': 'application/json'})) as resp:
+                    if resp.status == 200:
+                        rewards_result = await resp.json()
+                        
+                        # Update step with rewards data
+                        await send_update({
+                            "type": "workflow_step_update",
+                            "workflowId": workflow_id,
+                            "stepId": step_id,
+                            "updates": {
+                                "rewardData": rewards_result,
+                                "transactionHash": rewards_result.get('transactionHash', 'no_rewards')
+                            }
+                        })
+                    else:
+                        raise Exception(f"Rewards request failed with status {resp.status}")
             except Exception as e:
                 # Fall back to mock rewards if frontend call fails
                 mock_rewards = {
@@ -248,62 +365,69 @@ async def execute_workflow_with_updates(command, workflow_id):
         elif 'proof' in step_type:
             # Generate proof
             proof_type = step.get('proofType', 'kyc')
-            proof_id = f"proof_{proof_type}_{int(time.time() * 1000)}"
+            function = f"prove_{proof_type}"
+            arguments = ["12345", "1"]
+            
+            # Same module, arguments and step size -> reuse an already verified proof
+            cache_key = None
+            if not proof_cache.wants_fresh(step, fresh=step.get('fresh_proof', False)):
+                cache_key = proof_cache.key_for(function, arguments, 50)
+            cached = proof_cache.lookup(cache_key)
+            proof_id = cached["proof_id"] if cached else f"proof_{proof_type}_{int(time.time() * 1000)}_{i}"
             
             # Send proof generation started
             await send_update({
                 "type": "proof_generation",
                 "proofId": proof_id,
-                "function": f"prove_{proof_type}",
+                "function": function,
                 "stepSize": 50,
-                "workflowId": workflow_id
+                "workflowId": workflow_id,
+                **({"cached": True} if cached else {})
             })
             
-            # Call zkEngine via Rust
-            proof_request = {
-                "type": "generate_proof",
-                "metadata": {
-                    "function": f"prove_{proof_type}",
-                    "arguments": ["12345", "1"],
-                    "step_size": 50,
-                    "explanation": f"Generating {proof_type} proof",
-                    "additional_context": {
-                        "workflow_id": workflow_id,
-                        "step_index": i
-                    }
-                },
-                "proof_id": proof_id
-            }
+            if not cached:
+                # Call zkEngine via Rust
+                proof_request = {
+                    "type": "generate_proof",
+                    "metadata": {
+                        "function": function,
+                        "arguments": arguments,
+                        "step_size": 50,
+                        "explanation": f"Generating {proof_type} proof",
+                        "additional_context": {
+                            "workflow_id": workflow_id,
+                            "step_index": i,
+                            "priority": PROOF_PRIORITY
+                        }
+                    },
+                    "proof_id": proof_id
+                }
+                
+                # Send to Rust over the shared WebSocket and wait for this proof's result
+                data = await rust_socket.request(proof_request, "proof", proof_id)
+                if data.get('type') == 'proof_error':
+                    raise Exception(f"Proof generation failed: {data.get('error')}")
+                proof_cache.store(cache_key, proof_id, function, data.get('metrics'))
+                get_proof_index().record(proof_record(proof_id, proof_request["metadata"], data.get('metrics')))
             
-            # Send to Rust via WebSocket
-            async with aiohttp.ClientSession() as session:
-                ws_url = 'ws://localhost:8001/ws'
-                async with session.ws_connect(ws_url) as ws:
-                    await ws.send_json(proof_request)
-                    
-                    # Wait for proof completion
-                    async for msg in ws:
-                        if msg.type == aiohttp.WSMsgType.TEXT:
-                            data = json.loads(msg.data)
-                            if data.get('type') == 'proof_complete' and data.get('proof_id') == proof_id:
-                                proof_summary[proof_type] = {
-                                    "status": "generated",
-                                    "proofId": proof_id
-                                }
-                                break
-                            elif data.get('type') == 'proof_error':
-                                raise Exception(f"Proof generation failed: {data.get('error')}")
-                    
-                    await ws.close()
+            proof_summary[proof_type] = {
+                "status": "reused" if cached else "generated",
+                "proofId": proof_id
+            }
+            step_proofs[i] = proof_id
+            result.update(proofId=proof_id, proofType=proof_type, cached=bool(cached))
         
         elif 'verification' in step_type:
-            # Verify the proof from previous step
-            if proof_summary:
-                last_proof = list(proof_summary.values())[-1]
-                proof_id = last_proof['proofId']
+            # Verify the proof this step depends on, else the latest one generated
+            proof_ids = [step_proofs[d] for d in sorted(deps[i]) if d in step_proofs]
+            if not proof_ids and proof_summary:
+                proof_ids = [list(proof_summary.values())[-1]['proofId']]
+            if proof_ids:
+                proof_id = proof_ids[-1]
                 
                 verify_request = {
                     "type": "verify_proof", 
+                    "proof_id": proof_id,
                     "metadata": {
                         "function": "verify_proof",
                         "arguments": [proof_id],
@@ -316,73 +440,72 @@ async def execute_workflow_with_updates(command, workflow_id):
                     }
                 }
                 
-                # Send verification request
-                async with aiohttp.ClientSession() as session:
-                    ws_url = 'ws://localhost:8001/ws'
-                    async with session.ws_connect(ws_url) as ws:
-                        await ws.send_json(verify_request)
-                        
-                        # Wait for verification
-                        async for msg in ws:
-                            if msg.type == aiohttp.WSMsgType.TEXT:
-                                data = json.loads(msg.data)
-                                if data.get('type') == 'verification_result':
-                                    if not data.get('isValid'):
-                                        raise Exception("Proof verification failed")
-                                    break
-                        
-                        await ws.close()
+                # Send verification request and wait for its result
+                data = await rust_socket.request(verify_request, "verification", proof_id)
+                failure = verification_failure(data)
+                if failure is not None:
+                    proof_cache.mark_verified(proof_id, valid=False)
+                    get_proof_index().mark_verified(proof_id, valid=False)
+                    raise Exception(f"Proof verification failed: {failure}")
+                proof_cache.mark_verified(proof_id)
+                get_proof_index().mark_verified(proof_id)
+                result.update(proofId=proof_id, verified=True)
         
         elif step_type == 'transfer':
             # Execute transfer
-            amount = "0.1"
-            recipient = "alice"
-            blockchain = "ETH"
-            
-            # Extract from command
-            amount_match = re.search(r'(\d+\.?\d*)\s*USDC', command)
-            if amount_match:
-                amount = amount_match.group(1)
-            
-            recipient_match = re.search(r'to\s+(\w+)', command.lower())
-            if recipient_match:
-                recipient = recipient_match.group(1)
+            amount, recipient, blockchain = transfer_details(command)
             
-            if 'solana' in command.lower():
-                blockchain = "SOL"
+            # Mark the send before it happens so a crash mid-transfer is never blindly re-sent on resume
+            store.checkpoint_step(workflow_id, i, {"transferStarted": int(time.time() * 1000)}, completed=False)
+            result["success"] = False
             
             # Call Circle transfer
             env = os.environ.copy()
-            transfer_result = subprocess.run(
-                ['node', 'executeTransfer.js', amount, recipient, blockchain],
-                capture_output=True,
-                text=True,
-                cwd=os.path.expanduser("~/agentkit/circle"),
-                env=env,
-            )
+            with tracer.span("transfer.subprocess", amount=amount, blockchain=blockchain):
+                env["TRACEPARENT"] = tracer.inject()["traceparent"]
+                transfer_result = await asyncio.to_thread(
+                    subprocess.run,
+                    ['node', 'executeTransfer.js', amount, recipient, blockchain],
+                    capture_output=True,
+                    text=True,
+                    cwd=os.path.expanduser("~/agentkit/circle"),
+                    env=env,
+                )
             
-            if transfer_result.returncode == 0:
-                # Extract transfer ID
-                transfer_id_match = re.search(r'Transfer ID: ([a-f0-9\-]{36})', transfer_result.stdout)
-                if transfer_id_match:
-                    transfer_id = transfer_id_match.group(1)
-                    transfer_ids.append(transfer_id)
-                    
-                    # Update step with transfer data
-                    await send_update({
-                        "type": "workflow_step_update",
-                        "workflowId": workflow_id,
-                        "stepId": step_id,
-                        "updates": {
-                            "transferData": {
-                                "id": transfer_id,
-                                "amount": amount,
-                                "destinationAddress": "0x70997970C51812dc3A010C7d01b50e0d17dc79C8",
-                                "blockchain": blockchain,
-                                "status": "pending"
-                            }
-                        }
-                    })
+            if transfer_result.returncode != 0:
+                if re.search(r'^❌ Error:', transfer_result.stderr or '', re.MULTILINE):
+                    # Circle rejected the send outright, so a resume may safely retry it. A "Fatal error"
+                    # (exception) may come after Circle accepted it, so transferStarted stays set then
+                    store.checkpoint_step(workflow_id, i, {"transferStarted": None}, completed=False)
+                error = (transfer_result.stderr or transfer_result.stdout).strip().splitlines()
+                raise Exception(f"Transfer failed (exit {transfer_result.returncode}): "
+                                f"{error[-1] if error else 'no output'}")
+            
+            # Extract transfer ID
+            transfer_id = transfer_id_from(transfer_result.stdout)
+            if not transfer_id:
+                # The send may have happened; transferStarted stays so resume asks for --force-transfers
+                raise Exception("Transfer finished without reporting a Transfer ID; check Circle before resuming")
+            transfer_ids.append(transfer_id)
+            result.update(success=True, transferId=transfer_id, amount=amount, recipient=recipient, blockchain=blockchain)
+            get_transfer_ledger().record({"transferId": transfer_id, "amount": amount, "recipient": recipient,
+                                          "blockchain": blockchain, "status": "pending", "workflowId": workflow_id})
+            
+            # Update step with transfer data
+            await send_update({
+                "type": "workflow_step_update",
+                "workflowId": workflow_id,
+                "stepId": step_id,
+                "updates": {
+                    "transferData": {
+                        "id": transfer_id,
+                        "amount": amount,
+                        "destinationAddress": "0x70997970C51812dc3A010C7d01b50e0d17dc79C8",
+                        "blockchain": blockchain,
+                        "status": "pending"
+                    }
+                }
+            })
         
         # Update step to completed
         await send_update({
@@ -397,12 +520,35 @@ async def execute_workflow_with_updates(command, workflow_id):
         
         # Small delay between steps
         await asyncio.sleep(0.3)
+        return result
+    
+    async def traced_step(i, step):
+        if i in done:
+            await send_update({
+                "type": "workflow_step_update",
+                "workflowId": workflow_id,
+                "stepId": f"step_{i+1}",
+                "updates": {"status": "completed", "resumed": True}
+            })
+            return
+        if checkpoints.get(f"step_{i}", {}).get('transferStarted') and not force_transfers:
+            raise Exception(f"Transfer in step {i+1} was started before the interruption; check it in Circle, "
+                            f"then resume with --force-transfers to send it again")
+        
+        with tracer.span("step", step_id=f"step_{i+1}", step_type=step.get('type', '')):
+            result = await run_step(i, step)
+        # Durable before any dependent step starts; an unconfirmed transfer stays incomplete
+        store.checkpoint_step(workflow_id, i, result, completed=result["success"])
+    
+    await run_dag(steps, deps, traced_step, parallelism=MAX_PARALLEL_STEPS)
     
     # Send workflow completed
     await send_update({
         "type": "workflow_completed",
         "workflowId": workflow_id
     })
+    store.update(workflow_id, status="completed", completedAt=datetime.now(timezone.utc).isoformat(),
+                 transferIds=transfer_ids, proofSummary=proof_summary)
     
     return {
         "success": True,
@@ -413,11 +559,31 @@ async def execute_workflow_with_updates(command, workflow_id):
 
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) < 3:
+    tracer.service = "workflow_executor"
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    resume = '--resume' in sys.argv
+    if len(args) < (1 if resume else 2):
         print("Usage: workflow_executor_realtime.py <workflow_id> <command>")
+        print("       workflow_executor_realtime.py --resume [--force-transfers] <workflow_id>")
         sys.exit(1)
     
-    workflow_id = sys.argv[1]
-    command = sys.argv[2]
+    workflow_id = args[0]
+    if resume:
+        record = get_store().get(workflow_id)
+        if record is None:
+            print(f"Workflow {workflow_id} not found in {get_store().path}")
+            sys.exit(1)
+        command = record.get('description', '')
+    else:
+        command = args[1]
+    
+    async def main():
+        try:
+            await execute_workflow_with_updates(command, workflow_id, resume=resume,
+                                                force_transfers='--force-transfers' in sys.argv)
+        finally:
+            await rust_socket.close()
+            await publisher.close()
+            await sessions.close()
     
-    asyncio.run(execute_workflow_with_updates(command, workflow_id))
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""SQLite-backed workflow store replacing whole-file rewrites of workflow_history.json.
+
+Each workflow is one row: indexed `status` and `created_at` columns plus
+the full record as JSON in `data`, keyed by workflow ID. The database runs
+in WAL mode, so readers never block the writer. Updates are single-row
+read-modify-write transactions, so concurrent writers no longer drop each
+other's changes the way overlapping json.dump calls did.
+
+    python workflow_store.py import ~/agentkit/workflow_history.json ~/agentkit/circle/workflow_history.json
+    python workflow_store.py export ~/agentkit/workflow_history.json
+    python workflow_store.py status <workflow_id>
+    python workflow_store.py stats
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from proof_index import timestamp_of
+
+DB_PATH = Path(os.path.expanduser(os.getenv("WORKFLOW_DB", "~/agentkit/data/workflows.db")))
+HISTORY_PATH = Path(os.path.expanduser("~/agentkit/workflow_history.json"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workflows (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'created',
+    created_at TEXT NOT NULL DEFAULT '',
+    updated_at TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_workflows_status ON workflows(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_workflows_created ON workflows(created_at);
+CREATE INDEX IF NOT EXISTS idx_workflows_updated ON workflows(updated_at);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+
+def _now() -> str:
+    # UTC, so it orders correctly against the JS tools' toISOString() timestamps
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _sortable(value: Any) -> str:
+    """One fixed-width UTC form for the updated_at column, whatever the writer's format ("" if missing)"""
+    if not value:
+        return ""
+    return datetime.fromtimestamp(timestamp_of(value), timezone.utc).isoformat(timespec="microseconds")
+
+
+def _supersedes(incoming: Dict[str, Any], stored_updated_at: Optional[str]) -> bool:
+    """Whether a workflow_history.json copy may replace the stored row (`updatedAt` of the stored record).
+
+    updatedAt is stamped by every store write. A stored row without it has
+    only ever come from the JSON file, so the file's copy wins. A file copy
+    without it was never re-read from the store since JS wrote it; it cannot
+    prove it is newer than a row the store has written, so that row is kept.
+    """
+    if not stored_updated_at:
+        return True
+    if not incoming.get("updatedAt"):
+        return False
+    return timestamp_of(incoming["updatedAt"]) >= timestamp_of(stored_updated_at)
+
+
+class WorkflowStore:
+    """Workflow records keyed by ID, with O(log n) lookups by ID, status and creation time"""
+
+    def __init__(self, path: Path = DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=10000")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        db = self._connection()
+        # IMMEDIATE takes the write lock up front, so read-modify-write can't interleave
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    @staticmethod
+    def _row(workflow: Dict[str, Any]) -> tuple:
+        return (
+            workflow["id"],
+            workflow.get("status", "created"),
+            workflow.get("createdAt", ""),
+            _sortable(workflow.get("updatedAt") or workflow.get("completedAt") or workflow.get("createdAt")),
+            workflow.get("description", ""),
+            json.dumps(workflow),
+        )
+
+    def _upsert(self, db: sqlite3.Connection, workflows: Iterable[Dict[str, Any]], keep_newer: bool = False) -> int:
+        if keep_newer:
+            # A stale JSON copy must not roll back progress recorded in the store (status, checkpoints)
+            workflows = [w for w in workflows if _supersedes(w, self._stored_updated_at(db, w["id"]))]
+        rows = [self._row(w) for w in workflows]
+        sql = ("INSERT INTO workflows (id, status, created_at, updated_at, description, data) VALUES (?, ?, ?, ?, ?, ?) "
+               "ON CONFLICT(id) DO UPDATE SET status=excluded.status, created_at=excluded.created_at, "
+               "updated_at=excluded.updated_at, description=excluded.description, data=excluded.data")
+        db.executemany(sql, rows)
+        return len(rows)
+
+    @staticmethod
+    def _stored_updated_at(db: sqlite3.Connection, workflow_id: str) -> Optional[str]:
+        row = db.execute("SELECT json_extract(data, '$.updatedAt') AS updated FROM workflows WHERE id = ?",
+                         (workflow_id,)).fetchone()
+        return row["updated"] if row else None
+
+    def get(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT data FROM workflows WHERE id = ?", (workflow_id,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def put(self, workflow: Dict[str, Any]):
+        with self._transaction() as db:
+            self._upsert(db, [{**workflow, "updatedAt": _now()}])
+
+    def put_many(self, workflows: Iterable[Dict[str, Any]]) -> int:
+        """Insert or replace many workflows in one transaction"""
+        now = _now()
+        with self._transaction() as db:
+            return self._upsert(db, ({**w, "updatedAt": now} for w in workflows))
+
+    def update(self, workflow_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Merge `fields` into one workflow atomically; returns the new record (None if missing)"""
+        with self._transaction() as db:
+            row = db.execute("SELECT data FROM workflows WHERE id = ?", (workflow_id,)).fetchone()
+            if row is None:
+                return None
+            workflow = json.loads(row["data"])
+            workflow.update(fields)
+            workflow["updatedAt"] = _now()
+            self._upsert(db, [workflow])
+            return workflow
+
+    def checkpoint_step(self, workflow_id: str, index: int, result: Dict[str, Any],
+                        completed: bool = True) -> Optional[Dict[str, Any]]:
+        """Durably record one step's result under results["step_<index>"] (and completedSteps)"""
+        with self._transaction() as db:
+            row = db.execute("SELECT data FROM workflows WHERE id = ?", (workflow_id,)).fetchone()
+            if row is None:
+                return None
+            workflow = json.loads(row["data"])
+            results = workflow.setdefault("results", {})
+            results[f"step_{index}"] = {**results.get(f"step_{index}", {}), **result}
+            completed_steps = workflow.setdefault("completedSteps", [])
+            if completed and index not in completed_steps:
+                completed_steps.append(index)
+            # completedSteps is authoritative only for runs driven through here (see monitor_workflows)
+            workflow["checkpointed"] = True
+            workflow["updatedAt"] = _now()
+            self._upsert(db, [workflow])
+            return workflow
+
+    def list(self, status: Optional[str] = None, exclude_status: Optional[str] = None,
+             created_before: Optional[str] = None, limit: Optional[int] = None,
+             newest_first: bool = True, id_prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        clauses, params = [], []
+        if id_prefix is not None:
+            # Range scan on the primary key (LIKE would not use the index)
+            clauses.append("id >= ? AND id < ?")
+            params.extend([id_prefix, id_prefix + "\uffff"])
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if exclude_status is not None:
+            clauses.append("status != ?")
+            params.append(exclude_status)
+        if created_before is not None:
+            clauses.append("created_at < ?")
+            params.append(created_before)
+        sql = "SELECT data FROM workflows"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY created_at {'DESC' if newest_first else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [json.loads(r["data"]) for r in self._connection().execute(sql, params)]
+
+    def changed_since(self, updated_at: str = "") -> List[Dict[str, Any]]:
+        """Workflows written at or after `updated_at`, oldest change first (indexed, so cost follows the change count)"""
+        rows = self._connection().execute(
+            "SELECT data, updated_at FROM workflows WHERE updated_at >= ? ORDER BY updated_at", (updated_at,))
+        return [{**json.loads(r["data"]), "_updated_at": r["updated_at"]} for r in rows]
+
+    def count_by_status(self) -> Dict[str, int]:
+        rows = self._connection().execute("SELECT status, COUNT(*) AS n FROM workflows GROUP BY status")
+        return {r["status"]: r["n"] for r in rows}
+
+    def import_json(self, *paths: Path, only_if_changed: bool = False) -> int:
+        """Load workflow_history.json-style files; later paths override earlier ones on duplicate IDs.
+
+        With `only_if_changed`, files whose mtime matches the last import are
+        skipped, which makes this cheap enough to call before every read while
+        other tools still write the JSON file.
+        """
+        imported = 0
+        for path in map(Path, paths):
+            try:
+                mtime_ns = path.stat().st_mtime_ns
+            except OSError:
+                continue
+            if only_if_changed:
+                row = self._connection().execute("SELECT mtime_ns FROM imports WHERE path = ?", (str(path),)).fetchone()
+                if row and row["mtime_ns"] == mtime_ns:
+                    continue
+            with open(path) as f:
+                history = json.load(f)
+            with self._transaction() as db:
+                imported += self._upsert(db, ({"id": wf_id, **wf} for wf_id, wf in history.items()), keep_newer=True)
+                db.execute("INSERT OR REPLACE INTO imports (path, mtime_ns) VALUES (?, ?)", (str(path), mtime_ns))
+        return imported
+
+    def export_json(self, path: Path) -> int:
+        """Write the classic {id: workflow} JSON for tools that still read the file"""
+        path = Path(path)
+        workflows = {w["id"]: w for w in self.list(newest_first=False)}
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(workflows, f, indent=2)
+        os.replace(tmp, path)
+        with self._transaction() as db:
+            db.execute("INSERT OR REPLACE INTO imports (path, mtime_ns) VALUES (?, ?)",
+                       (str(path), path.stat().st_mtime_ns))
+        return len(workflows)
+
+
+_default_store: Optional[WorkflowStore] = None
+
+
+def get_store() -> WorkflowStore:
+    """Process-wide store at WORKFLOW_DB (default ~/agentkit/data/workflows.db)"""
+    global _default_store
+    if _default_store is None:
+        _default_store = WorkflowStore()
+    return _default_store
+
+
+def batch_status(batch_id: str, store: Optional[WorkflowStore] = None) -> Dict[str, Any]:
+    """Per-item stage/status of a batch_workflows.py run (items are `<batch_id>_<n>`)"""
+    store = store or get_store()
+    # The prefix scan narrows via the index; batchId drops items of a batch named "<batch_id>_..."
+    items = sorted((w for w in store.list(id_prefix=f"{batch_id}_") if w.get("batchId") == batch_id),
+                   key=lambda w: w["id"])
+    counts: Dict[str, int] = {}
+    for item in items:
+        counts[item.get("status", "queued")] = counts.get(item.get("status", "queued"), 0) + 1
+    return {
+        "batch_id": batch_id,
+        "counts": counts,
+        "items": [{
+            "id": item["id"],
+            "command": item.get("description", ""),
+            "status": item.get("status"),
+            "stage": item.get("stage"),
+            "completedSteps": len(item.get("completedSteps", [])),
+            "steps": len(item.get("steps", [])),
+            "transferIds": item.get("transferIds", []),
+            "error": item.get("error"),
+        } for item in items],
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("import", "export", "status", "stats"):
+        print(__doc__)
+        sys.exit(1)
+
+    store = get_store()
+    command, args = sys.argv[1], sys.argv[2:]
+    if command == "import":
+        print(f"Imported {store.import_json(*(args or [HISTORY_PATH]))} workflows into {store.path}")
+    elif command == "export":
+        target = Path(args[0]) if args else HISTORY_PATH
+        print(f"Exported {store.export_json(target)} workflows to {target}")
+    elif command == "status":
+        print(json.dumps(store.get(args[0]), indent=2))
+    else:
+        print(json.dumps(store.count_by_status(), indent=2))
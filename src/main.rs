@@ -12,7 +12,7 @@ use futures_util::{stream::StreamExt, SinkExt};
 use serde_json::json;
 use std::net::SocketAddr;
 use tokio::sync::broadcast;
-use tracing::{error, info};
+use tracing::{error, info, warn};
 use uuid::Uuid;
 use std::process::Stdio;
 use tokio::process::Command;
@@ -273,6 +273,9 @@ async fn generate_proof(state: AppState, proof_id: String, metadata: ProofMetada
         error!("Failed to save proof metadata: {}", e);
     }
     
+    // Wait for the agent service's prover admission controller to grant a slot
+    let lease_id = acquire_prover_slot(&state, &proof_id, &metadata).await;
+    
     // Build zkEngine command
     let mut cmd = Command::new(&state.zkengine_binary);
     cmd.arg("prove")
@@ -318,6 +321,15 @@ async fn generate_proof(state: AppState, proof_id: String, metadata: ProofMetada
                         });
                         let _ = state.tx.send(success_msg.to_string());
                         
+                        // Index the proof before any verification result for it can arrive
+                        post_to_proof_index(&state, &format!("/proofs/{}/record", proof_id), json!({
+                            "metadata": metadata,
+                            "metrics": {
+                                "time_ms": duration.as_millis() as u64,
+                                "proof_size": proof_size
+                            }
+                        })).await;
+                        
                         // If this is an automated transfer, proceed to verification
                         if let Some(ref context) = metadata.additional_context {
                             if context.get("is_automated_transfer").and_then(|v| v.as_bool()).unwrap_or(false) {
@@ -349,6 +361,64 @@ async fn generate_proof(state: AppState, proof_id: String, metadata: ProofMetada
             let _ = state.tx.send(err_msg.to_string());
         }
     }
+    
+    release_prover_slot(&state, lease_id).await;
+}
+
+// Priority comes from additional_context.priority, else "workflow" for workflow
+// steps and "interactive" for everything else (chat). If the agent service is
+// unreachable the proof runs unthrottled rather than not at all.
+async fn acquire_prover_slot(state: &AppState, proof_id: &str, metadata: &ProofMetadata) -> Option<String> {
+    let context = metadata.additional_context.as_ref();
+    let priority = context
+        .and_then(|ctx| ctx.get("priority"))
+        .and_then(|p| p.as_str())
+        .unwrap_or_else(|| {
+            if context.and_then(|ctx| ctx.get("workflow_id")).is_some() { "workflow" } else { "interactive" }
+        })
+        .to_string();
+    
+    let client = reqwest::Client::new();
+    let res = client
+        .post(&format!("{}/prover/admit", state.langchain_url))
+        .json(&json!({
+            "function": metadata.function,
+            "priority": priority,
+            "owner": proof_id
+        }))
+        .send()
+        .await;
+    
+    match res {
+        Ok(response) if response.status().is_success() => {
+            let lease = response.json::<serde_json::Value>().await.ok()?;
+            info!("Prover slot granted for {} ({} priority) after {} ms",
+                proof_id, priority, lease.get("waited_ms").and_then(|w| w.as_f64()).unwrap_or(0.0));
+            lease.get("lease_id").and_then(|id| id.as_str()).map(|id| id.to_string())
+        }
+        Ok(response) => {
+            warn!("Prover admission refused for {}: {}", proof_id, response.status());
+            None
+        }
+        Err(e) => {
+            warn!("Prover admission unavailable, running {} unthrottled: {}", proof_id, e);
+            None
+        }
+    }
+}
+
+async fn release_prover_slot(state: &AppState, lease_id: Option<String>) {
+    if let Some(lease_id) = lease_id {
+        let client = reqwest::Client::new();
+        if let Err(e) = client
+            .post(&format!("{}/prover/release", state.langchain_url))
+            .json(&json!({ "lease_id": lease_id }))
+            .send()
+            .await
+        {
+            warn!("Failed to release prover slot {}: {}", lease_id, e);
+        }
+    }
 }
 
 // --- Proof Verification ---
@@ -366,9 +436,18 @@ async fn verify_proof(state: AppState, proof_id: String, metadata: ProofMetadata
     let _ = state.tx.send(status_msg.to_string());
     
     let proof_dir = PathBuf::from(&state.proofs_dir).join(&proof_id);
-    let proof_path = proof_dir.join("proof.bin");
+    let mut proof_path = proof_dir.join("proof.bin");
     let public_path = proof_dir.join("public.json");
     
+    // Proofs moved into the compressed blob store are decompressed to a temporary file for zkEngine
+    let mut materialized = false;
+    if !proof_path.exists() && proof_dir.join("proof.manifest.json").exists() {
+        if let Some(path) = materialize_proof(&state, &proof_id).await {
+            proof_path = path;
+            materialized = true;
+        }
+    }
+    
     // Check if proof files exist
     if !proof_path.exists() || !public_path.exists() {
         error!("Proof files not found for {}", proof_id);
@@ -378,9 +457,12 @@ async fn verify_proof(state: AppState, proof_id: String, metadata: ProofMetadata
             "error": "Proof files not found. Make sure the proof ID is correct."
         });
         let _ = state.tx.send(err_msg.to_string());
+        if materialized {
+            let _ = std::fs::remove_file(&proof_path);
+        }
         return;
     }
-    
+
     // Build verification command
     let mut cmd = Command::new(&state.zkengine_binary);
     cmd.arg("verify")
@@ -400,6 +482,8 @@ async fn verify_proof(state: AppState, proof_id: String, metadata: ProofMetadata
                         
                         // Create .verified marker file
                         std::fs::write(proof_dir.join(".verified"), "").ok();
+                        post_to_proof_index(&state, &format!("/proofs/{}/verified", proof_id),
+                            json!({ "valid": true })).await;
                         
                         let success_msg = json!({
                             "type": "verification_complete",
@@ -416,6 +500,8 @@ async fn verify_proof(state: AppState, proof_id: String, metadata: ProofMetadata
                             }
                         }
                     } else {
+                        post_to_proof_index(&state, &format!("/proofs/{}/verified", proof_id),
+                            json!({ "valid": false })).await;
                         let err_msg = json!({
                             "type": "verification_complete",
                             "proof_id": proof_id,
@@ -446,6 +532,49 @@ async fn verify_proof(state: AppState, proof_id: String, metadata: ProofMetadata
             let _ = state.tx.send(err_msg.to_string());
         }
     }
+    
+    if materialized {
+        let _ = std::fs::remove_file(&proof_path);
+    }
+}
+
+// Keeps the agent service's proof index in step with proofs generated and verified here.
+// The index is only a listing aid, so failures are logged and otherwise ignored.
+async fn post_to_proof_index(state: &AppState, path: &str, body: serde_json::Value) {
+    let client = reqwest::Client::new();
+    match client
+        .post(&format!("{}{}", state.langchain_url, path))
+        .json(&body)
+        .send()
+        .await
+    {
+        Ok(response) if response.status().is_success() => {}
+        Ok(response) => warn!("Proof index rejected {}: {}", path, response.status()),
+        Err(e) => warn!("Proof index unavailable, {} not recorded: {}", path, e),
+    }
+}
+
+async fn materialize_proof(state: &AppState, proof_id: &str) -> Option<PathBuf> {
+    let client = reqwest::Client::new();
+    let res = client
+        .post(&format!("{}/proofs/{}/materialize", state.langchain_url, proof_id))
+        .send()
+        .await;
+    
+    match res {
+        Ok(response) if response.status().is_success() => {
+            let body = response.json::<serde_json::Value>().await.ok()?;
+            body.get("path").and_then(|p| p.as_str()).map(PathBuf::from)
+        }
+        Ok(response) => {
+            error!("Failed to restore stored proof {}: {}", proof_id, response.status());
+            None
+        }
+        Err(e) => {
+            error!("Failed to restore stored proof {}: {}", proof_id, e);
+            None
+        }
+    }
 }
 
 // --- List Proofs ---
@@ -457,6 +586,58 @@ async fn list_proofs(state: AppState, metadata: ProofMetadata) {
         .map(|s| s.as_str())
         .unwrap_or("proofs");
     
+    // The agent service's proof index returns just the page; scan the proofs directory if it's down
+    let proofs = match indexed_proofs(&state, list_type).await {
+        Some(proofs) => proofs,
+        None => scan_proof_dirs(&state, list_type),
+    };
+    
+    let response_msg = json!({
+        "type": "list_response",
+        "list_type": list_type,
+        "proofs": proofs,
+        "count": proofs.len()
+    });
+    
+    let _ = state.tx.send(response_msg.to_string());
+}
+
+// 20 most recent proofs (or verified proofs) from the agent service's proof index
+async fn indexed_proofs(state: &AppState, list_type: &str) -> Option<Vec<serde_json::Value>> {
+    let client = reqwest::Client::new();
+    let mut url = format!("{}/proofs?limit=20", state.langchain_url);
+    if list_type == "verifications" {
+        url.push_str("&verified=true");
+    }
+    let page = match client.get(&url).send().await {
+        Ok(response) if response.status().is_success() => response.json::<serde_json::Value>().await.ok()?,
+        Ok(response) => {
+            warn!("Proof index returned {}, scanning proofs directory", response.status());
+            return None;
+        }
+        Err(e) => {
+            warn!("Proof index unavailable, scanning proofs directory: {}", e);
+            return None;
+        }
+    };
+    
+    let records = page.get("proofs")?.as_array()?;
+    Some(records.iter().map(|record| {
+        json!({
+            "proof_id": record.get("id"),
+            // Epoch seconds, like the directory scan
+            "timestamp": record.get("timestamp")
+                .and_then(|t| t.as_str())
+                .and_then(|t| chrono::DateTime::parse_from_rfc3339(t).ok())
+                .map(|t| t.timestamp())
+                .unwrap_or(0),
+            "verified": record.get("verified").and_then(|v| v.as_bool()).unwrap_or(false),
+            "function": record.get("metadata").and_then(|m| m.get("function")).and_then(|f| f.as_str()).unwrap_or("unknown")
+        })
+    }).collect())
+}
+
+fn scan_proof_dirs(state: &AppState, list_type: &str) -> Vec<serde_json::Value> {
     let proofs_dir = PathBuf::from(&state.proofs_dir);
     
     let mut proofs = Vec::new();
@@ -468,8 +649,8 @@ async fn list_proofs(state: AppState, metadata: ProofMetadata) {
                 if file_name.starts_with("proof_") {
                     let proof_path = entry.path();
                     
-                    // Check if this is a valid proof directory
-                    if proof_path.join("proof.bin").exists() {
+                    // Check if this is a valid proof directory (plain or moved into the blob store)
+                    if proof_path.join("proof.bin").exists() || proof_path.join("proof.manifest.json").exists() {
                         // Get creation time
                         let timestamp = entry.metadata()
                             .ok()
@@ -523,14 +704,7 @@ async fn list_proofs(state: AppState, metadata: ProofMetadata) {
     // Limit to 20 most recent
     proofs.truncate(20);
     
-    let response_msg = json!({
-        "type": "list_response",
-        "list_type": list_type,
-        "proofs": proofs,
-        "count": proofs.len()
-    });
-    
-    let _ = state.tx.send(response_msg.to_string());
+    proofs
 }
 
 // Helper function to infer function from filename
@@ -585,6 +759,16 @@ async fn execute_transfer(state: AppState, proof_id: String, context: serde_json
                         "result": transfer_result
                     });
                     let _ = state.tx.send(complete_msg.to_string());
+                } else if transfer_result.get("status").and_then(|s| s.as_str()) == Some("unknown") {
+                    // The send timed out in the worker and may still go through; don't report it as failed
+                    let pending_msg = json!({
+                        "type": "transfer_status",
+                        "proof_id": proof_id,
+                        "status": "unknown",
+                        "message": transfer_result.get("message").and_then(|m| m.as_str())
+                            .unwrap_or("Transfer outcome unknown; check Circle before sending again")
+                    });
+                    let _ = state.tx.send(pending_msg.to_string());
                 } else {
                     let err_msg = json!({
                         "type": "transfer_error",